@@ -0,0 +1,2 @@
+"""Benchmarks of spotcast against local stand-ins of Spotify and the cast
+devices. See `python -m benchmarks.run --help`."""
@@ -0,0 +1,203 @@
+"""Stress test of the Spotify app handshake against fake cast devices.
+
+Connects pychromecast to `FakeChromecast` devices over the Cast v2
+protocol and runs many `SpotifyController.launch_app` handshakes at
+once, the device-auth request going to `FakeSpotify`. Reports the
+latency of each step, the failures and the number of threads used.
+
+    python -m benchmarks.bench_receiver --devices 10 --handshakes 100 \\
+        --concurrency 20 --launch-delay 0.2 --add-user-error-rate 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if REPO not in sys.path:
+    sys.path.insert(0, REPO)
+
+# pylint: disable=wrong-import-position
+import pychromecast
+from pychromecast.models import CastInfo
+
+from benchmarks.fake_chromecast import FakeCastNetwork, FakeChromecast, ReceiverBehaviour
+from benchmarks.fake_spotify import FakeSpotify
+from custom_components.spotcast import spotify_controller
+from custom_components.spotcast.metrics import LatencyHistogram, StageMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ThreadSampler:
+    """Samples the number of live threads in the background"""
+
+    def __init__(self, interval: float = 0.01) -> None:
+        self.interval = interval
+        self.baseline = threading.active_count()
+        self.peak = self.baseline
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="thread_sampler")
+
+    def __enter__(self) -> ThreadSampler:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, threading.active_count())
+
+
+def handshake(
+    device: FakeChromecast,
+    timeout: float,
+    metrics: StageMetrics,
+    histograms: dict[str, LatencyHistogram],
+) -> None:
+    """Connect to a device and launch the Spotify app on it, like
+    `SpotifyCastDevice.start_spotify_controller`"""
+    cast_info = CastInfo(
+        services=set(),
+        uuid=device.uuid,
+        model_name="Fake Chromecast",
+        friendly_name=device.friendly_name,
+        host="127.0.0.1",
+        port=device.port,
+        cast_type="audio",
+        manufacturer="spotcast",
+    )
+
+    started = time.perf_counter()
+    cast = pychromecast.get_chromecast_from_cast_info(cast_info, zconf=None)
+
+    try:
+        cast.wait(timeout)
+        connected = time.perf_counter()
+        histograms["connect"].record(connected - started)
+
+        controller = spotify_controller.SpotifyController(
+            cast,
+            "fake-access-token",
+            int(time.time()) + 3600,
+            metrics=metrics,
+            labels=("default", device.friendly_name),
+        )
+        cast.register_handler(controller)
+        controller.launch_app(timeout=int(timeout))
+
+        if controller.credential_error:
+            raise RuntimeError("addUserError")
+
+        histograms["launch_app"].record(time.perf_counter() - connected)
+    finally:
+        histograms["handshake"].record(time.perf_counter() - started)
+        cast.disconnect(timeout=1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=10)
+    parser.add_argument("--handshakes", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--launch-delay", type=float, default=0.1)
+    parser.add_argument("--reply-delay", type=float, default=0.02)
+    parser.add_argument("--device-auth-latency", type=float, default=0.05)
+    parser.add_argument("--launch-error-rate", type=float, default=0.0)
+    parser.add_argument("--add-user-error-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--json", action="store_true",
+                        help="print the results as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    behaviour = ReceiverBehaviour(
+        launch_delay=args.launch_delay,
+        reply_delay=args.reply_delay,
+        launch_error_rate=args.launch_error_rate,
+        add_user_error_rate=args.add_user_error_rate,
+        drop_rate=args.drop_rate,
+    )
+    network = FakeCastNetwork()
+    fake_spotify = FakeSpotify(args.device_auth_latency, 0)
+    url = asyncio.run_coroutine_threadsafe(
+        fake_spotify.start(), network.loop
+    ).result()
+    spotify_controller.DEVICE_AUTH_URL = f"{url}/device-auth/v1/refresh"
+
+    devices = [
+        network.add_device(f"Fake Room {index}", behaviour)
+        for index in range(args.devices)
+    ]
+    metrics = StageMetrics(window=args.handshakes)
+    histograms = {
+        name: LatencyHistogram(args.handshakes)
+        for name in ("connect", "launch_app", "handshake")
+    }
+    errors: Counter = Counter()
+
+    def run(index: int) -> None:
+        try:
+            handshake(devices[index % len(devices)], args.timeout, metrics, histograms)
+        except Exception as exc:  # pylint: disable=broad-except
+            errors[f"{type(exc).__name__}: {exc}"] += 1
+
+    started = time.perf_counter()
+
+    try:
+        with ThreadSampler() as sampler, ThreadPoolExecutor(
+            max_workers=args.concurrency
+        ) as executor:
+            list(executor.map(run, range(args.handshakes)))
+    finally:
+        elapsed = time.perf_counter() - started
+        asyncio.run_coroutine_threadsafe(fake_spotify.stop(), network.loop).result()
+        network.stop()
+
+    results = {
+        "handshakes": args.handshakes,
+        "elapsed": round(elapsed, 3),
+        "threads": {"baseline": sampler.baseline, "peak": sampler.peak},
+        "latency": {name: h.summary() for name, h in histograms.items()},
+        "device_auth": metrics.account_summary("default").get("device_auth", {}),
+        "errors": dict(errors),
+        "messages": dict(sum((device.received for device in devices), Counter())),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.handshakes} handshakes in {results['elapsed']}s, "
+          f"threads: {sampler.baseline} -> {sampler.peak} at peak")
+    print(f"{'step':<15}{'count':>8}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for name, summary in (
+        *results["latency"].items(),
+        ("device_auth", results["device_auth"]),
+    ):
+        if summary.get("count"):
+            print(
+                f"{name:<15}{summary['count']:>8}{summary['p50']:>9.3f}"
+                f"{summary['p95']:>9.3f}{summary['p99']:>9.3f}"
+            )
+    for error, count in errors.most_common():
+        print(f"error: {error} ({count})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Microbenchmark of the parsing and routing of Spotify URIs.
+
+Compares the memoized `parse_uri` with the string handling it replaced:
+url conversion, validation, lowercasing and substring routing.
+
+    python -m benchmarks.bench_uri --number 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import timeit
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if REPO not in sys.path:
+    sys.path.insert(0, REPO)
+
+# pylint: disable=wrong-import-position
+from custom_components.spotcast.spotify_uri import parse_uri, url_to_spotify_uri
+
+URIS = [
+    "spotify:playlist:37i9dQZF1DXcBWIGoYBM5M",
+    "https://open.spotify.com/album/4aawyAB9vmqN3uQ7FjRGTy?si=abcdef",
+    "spotify:track:6rqhFgbbKwnb9MLmUQDhG6",
+    "spotify:show:5CfCWKI5pZ28U0uOzXkDHe",
+    "spotify:user:someone:playlist:7pGq8QxHLh5Bcs1ZJrNGAF",
+    "spotify:user:someone:collection",
+]
+
+KINDS = ["show", "episode", "track", "album", "playlist", "collection", "artist"]
+
+
+def legacy_route(uri: str) -> str:
+    """Cleanup, validation and routing of a uri before `parse_uri`"""
+    uri = uri.split("?")[0]
+
+    if uri.startswith("http"):
+        uri = url_to_spotify_uri(uri)
+
+    elems = uri.split(":")
+    if elems[1].lower() == "user":
+        elems = elems[0:1] + elems[3:]
+    if not (len(elems) == 2 and elems[1].lower() == "collection"):
+        if len(elems) != 3 or elems[0].lower() != "spotify":
+            raise ValueError(uri)
+
+    uri = uri.split(":")
+    uri[0] = uri[0].lower()
+    uri[1] = uri[1].lower()
+    uri = ":".join(uri)
+
+    for kind in KINDS:
+        if uri.find(kind) > 0:
+            return kind
+
+    return "context"
+
+
+def parsed_route(uri: str) -> str:
+    return parse_uri(uri).kind
+
+
+def uncached_route(uri: str) -> str:
+    return parse_uri.__wrapped__(uri).kind
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=100000)
+    args = parser.parse_args()
+
+    for name, route in (
+        ("legacy string handling", legacy_route),
+        ("parse_uri, uncached", uncached_route),
+        ("parse_uri, memoized", parsed_route),
+    ):
+        seconds = timeit.timeit(
+            lambda: [route(uri) for uri in URIS], number=args.number
+        )
+        per_uri = seconds / (args.number * len(URIS)) * 1e9
+        print(f"{name:<25}{per_uri:>10.0f} ns/uri")
+
+
+if __name__ == "__main__":
+    main()
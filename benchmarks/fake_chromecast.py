@@ -0,0 +1,316 @@
+"""Fake cast devices speaking the Cast v2 protocol of pychromecast.
+
+Each device listens on a local TLS port with a self-signed certificate,
+and exchanges length-prefixed `CastMessage` protobufs like a real
+device. It implements the connection, heartbeat and receiver namespaces
+needed to connect and launch an app, and the Spotify app namespace
+answering `getInfo` and `addUser`.
+
+Delays and failures are set per device with `ReceiverBehaviour`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import os
+import random
+import ssl
+import struct
+import tempfile
+import threading
+import uuid
+from collections import Counter
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+from pychromecast.generated.cast_channel_pb2 import CastMessage
+
+from custom_components.spotcast.const import APP_SPOTIFY
+from custom_components.spotcast.spotify_controller import (
+    APP_NAMESPACE,
+    TYPE_ADD_USER,
+    TYPE_ADD_USER_ERROR,
+    TYPE_ADD_USER_RESPONSE,
+    TYPE_GET_INFO,
+    TYPE_GET_INFO_RESPONSE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+NS_CONNECTION = "urn:x-cast:com.google.cast.tp.connection"
+NS_HEARTBEAT = "urn:x-cast:com.google.cast.tp.heartbeat"
+NS_RECEIVER = "urn:x-cast:com.google.cast.receiver"
+
+PLATFORM_DESTINATION = "receiver-0"
+TRANSPORT_ID = "spotify-transport"
+
+
+class ReceiverBehaviour:
+    """Delays, in seconds, and failure rates of a fake device"""
+
+    def __init__(
+        self,
+        launch_delay: float = 0.1,
+        reply_delay: float = 0.02,
+        launch_error_rate: float = 0.0,
+        add_user_error_rate: float = 0.0,
+        drop_rate: float = 0.0,
+    ) -> None:
+        self.launch_delay = launch_delay
+        self.reply_delay = reply_delay
+        # LAUNCH answered with LAUNCH_ERROR
+        self.launch_error_rate = launch_error_rate
+        # addUser answered with addUserError
+        self.add_user_error_rate = add_user_error_rate
+        # messages of the Spotify namespace left unanswered
+        self.drop_rate = drop_rate
+
+
+def create_ssl_context(directory: str) -> ssl.SSLContext:
+    """Server context with a throwaway self-signed certificate. Senders
+    do not verify the certificate of cast devices."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "fake-chromecast")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+
+    with open(cert_path, "wb") as file:
+        file.write(cert.public_bytes(serialization.Encoding.PEM))
+
+    with open(key_path, "wb") as file:
+        file.write(
+            key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+        )
+
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    return context
+
+
+class FakeChromecast:
+    """One fake cast device running the Spotify receiver app"""
+
+    def __init__(
+        self,
+        friendly_name: str,
+        behaviour: ReceiverBehaviour | None = None,
+    ) -> None:
+        self.friendly_name = friendly_name
+        self.uuid = uuid.uuid4()
+        self.behaviour = behaviour or ReceiverBehaviour()
+        self.port: int | None = None
+        self.app_running = False
+        self.session_id = uuid.uuid4().hex
+        self.received: Counter = Counter()
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self, context: ssl.SSLContext) -> None:
+        self._server = await asyncio.start_server(
+            self._handle_connection, "127.0.0.1", 0, ssl=context
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle_connection(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        tasks = set()
+
+        try:
+            while True:
+                header = await reader.readexactly(4)
+                (size,) = struct.unpack(">I", header)
+                message = CastMessage()
+                message.ParseFromString(await reader.readexactly(size))
+
+                # delayed answers must not hold the heartbeats back
+                task = asyncio.create_task(self._dispatch(message, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    def _send(
+        self,
+        writer: asyncio.StreamWriter,
+        request: CastMessage,
+        data: dict,
+    ) -> None:
+        message = CastMessage()
+        message.protocol_version = message.CASTV2_1_0
+        message.source_id = request.destination_id
+        message.destination_id = request.source_id
+        message.namespace = request.namespace
+        message.payload_type = message.STRING
+        message.payload_utf8 = json.dumps(data)
+        payload = message.SerializeToString()
+
+        if not writer.is_closing():
+            writer.write(struct.pack(">I", len(payload)) + payload)
+
+    def _receiver_status(self, request_id: int) -> dict:
+        applications = []
+
+        if self.app_running:
+            applications.append(
+                {
+                    "appId": APP_SPOTIFY,
+                    "displayName": "Spotify",
+                    "isIdleScreen": False,
+                    "namespaces": [{"name": APP_NAMESPACE}],
+                    "sessionId": self.session_id,
+                    "statusText": "Spotify",
+                    "transportId": TRANSPORT_ID,
+                }
+            )
+
+        return {
+            "type": "RECEIVER_STATUS",
+            "requestId": request_id,
+            "status": {
+                "applications": applications,
+                "isActiveInput": True,
+                "isStandBy": False,
+                "volume": {
+                    "controlType": "attenuation",
+                    "level": 0.5,
+                    "muted": False,
+                    "stepInterval": 0.05,
+                },
+            },
+        }
+
+    async def _dispatch(
+        self,
+        message: CastMessage,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        data = json.loads(message.payload_utf8) if message.payload_utf8 else {}
+        kind = data.get("type")
+        request_id = data.get("requestId", 0)
+        self.received[kind] += 1
+        behaviour = self.behaviour
+
+        if message.namespace == NS_HEARTBEAT:
+            if kind == "PING":
+                self._send(writer, message, {"type": "PONG"})
+
+        elif message.namespace == NS_RECEIVER:
+            if kind == "LAUNCH":
+                await asyncio.sleep(behaviour.launch_delay)
+
+                if random.random() < behaviour.launch_error_rate:
+                    self._send(
+                        writer,
+                        message,
+                        {
+                            "type": "LAUNCH_ERROR",
+                            "requestId": request_id,
+                            "reason": "NOT_FOUND",
+                        },
+                    )
+                    return
+
+                self.app_running = True
+
+            elif kind == "STOP":
+                self.app_running = False
+
+            self._send(writer, message, self._receiver_status(request_id))
+
+        elif message.namespace == APP_NAMESPACE:
+            await asyncio.sleep(behaviour.reply_delay)
+
+            if random.random() < behaviour.drop_rate:
+                _LOGGER.debug("%s drops %s", self.friendly_name, kind)
+                return
+
+            if kind == TYPE_GET_INFO:
+                response = {
+                    "type": TYPE_GET_INFO_RESPONSE,
+                    "payload": {
+                        "clientID": hashlib.md5(
+                            self.friendly_name.encode()
+                        ).hexdigest()
+                    },
+                }
+            elif kind == TYPE_ADD_USER:
+                if random.random() < behaviour.add_user_error_rate:
+                    response = {"type": TYPE_ADD_USER_ERROR, "payload": {}}
+                else:
+                    response = {"type": TYPE_ADD_USER_RESPONSE, "payload": {}}
+            else:
+                return
+
+            response["requestId"] = request_id
+            self._send(writer, message, response)
+
+        # connection namespace: CONNECT and CLOSE need no answer
+
+
+class FakeCastNetwork:
+    """Runs fake cast devices on an event loop of its own thread, so
+    blocking pychromecast senders can be driven from any thread"""
+
+    def __init__(self) -> None:
+        self.devices: list[FakeChromecast] = []
+        self.loop = asyncio.new_event_loop()
+        self._directory = tempfile.TemporaryDirectory()
+        self._context = create_ssl_context(self._directory.name)
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name="fake_cast_network", daemon=True
+        )
+        self._thread.start()
+
+    def add_device(
+        self,
+        friendly_name: str,
+        behaviour: ReceiverBehaviour | None = None,
+    ) -> FakeChromecast:
+        device = FakeChromecast(friendly_name, behaviour)
+        asyncio.run_coroutine_threadsafe(
+            device.start(self._context), self.loop
+        ).result()
+        self.devices.append(device)
+        return device
+
+    def stop(self) -> None:
+        for device in self.devices:
+            asyncio.run_coroutine_threadsafe(device.stop(), self.loop).result()
+
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+        self._directory.cleanup()
@@ -0,0 +1,119 @@
+"""Local stand-in of the Spotify receiver app of a cast device.
+
+`FakeSocketClient` takes the place of the pychromecast socket client
+of one device: it launches the app and answers the `getInfo` and
+`addUser` messages of `SpotifyController` on its own socket thread,
+like pychromecast delivers them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import queue
+import threading
+import time
+from types import SimpleNamespace
+from typing import Callable
+
+from custom_components.spotcast.spotify_controller import (
+    APP_NAMESPACE,
+    TYPE_ADD_USER,
+    TYPE_ADD_USER_RESPONSE,
+    TYPE_GET_INFO,
+    TYPE_GET_INFO_RESPONSE,
+)
+
+
+class FakeReceiverController:
+    """Launches the app of the device after `launch_delay` seconds"""
+
+    def __init__(self, socket_client: FakeSocketClient) -> None:
+        self._socket_client = socket_client
+
+    def launch_app(
+        self,
+        app_id: str,
+        force_launch: bool = False,
+        callback_function: Callable | None = None,
+        **kwargs,
+    ) -> None:
+        def launched() -> None:
+            time.sleep(self._socket_client.launch_delay)
+            self._socket_client.app_namespaces.append(APP_NAMESPACE)
+
+            if callback_function is not None:
+                callback_function(True, None)
+
+        self._socket_client.post(launched)
+
+
+class FakeSocketClient:
+    """Socket client of one fake cast device"""
+
+    def __init__(
+        self,
+        friendly_name: str,
+        launch_delay: float = 0.05,
+        reply_delay: float = 0.02,
+    ) -> None:
+        self.friendly_name = friendly_name
+        self.launch_delay = launch_delay
+        self.reply_delay = reply_delay
+        self.app_namespaces: list[str] = []
+        self.receiver_controller = FakeReceiverController(self)
+        self.controllers: list = []
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"fake_socket_{friendly_name}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    @property
+    def cast_device(self) -> SimpleNamespace:
+        """Cast device as seen by `SpotifyController`"""
+        return SimpleNamespace(
+            cast_info=SimpleNamespace(friendly_name=self.friendly_name)
+        )
+
+    def register_handler(self, controller) -> None:
+        self.controllers.append(controller)
+        controller.registered(self)
+
+    def post(self, job: Callable[[], None]) -> None:
+        """Run a job on the socket thread"""
+        self._queue.put(job)
+
+    def stop(self) -> None:
+        self._queue.put(None)
+
+    def send_app_message(self, namespace: str, message: dict, **kwargs) -> None:
+        if namespace != APP_NAMESPACE:
+            return
+
+        def reply() -> None:
+            time.sleep(self.reply_delay)
+
+            if message["type"] == TYPE_GET_INFO:
+                response = {
+                    "type": TYPE_GET_INFO_RESPONSE,
+                    "payload": {
+                        "clientID": hashlib.md5(
+                            self.friendly_name.encode()
+                        ).hexdigest()
+                    },
+                }
+            elif message["type"] == TYPE_ADD_USER:
+                response = {"type": TYPE_ADD_USER_RESPONSE, "payload": {}}
+            else:
+                return
+
+            for controller in self.controllers:
+                controller.receive_message(None, response)
+
+        self.post(reply)
+
+    def _run(self) -> None:
+        while (job := self._queue.get()) is not None:
+            job()
@@ -0,0 +1,150 @@
+"""Local stand-in of the Spotify endpoints used by spotcast.
+
+Serves the web player token endpoint, the subset of the Web API used by
+spotcast and the spclient device-auth endpoint, each answer being
+delayed by a configurable latency.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+
+from typing import Callable
+
+from aiohttp import web
+
+PLAYLIST_COUNT = 120
+DEVICE_COUNT = 10
+
+
+class FakeSpotify:
+    """aiohttp application answering like Spotify, after `latency`
+    seconds plus up to `jitter` seconds"""
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.requests: dict[str, int] = {}
+        self.runner: web.AppRunner | None = None
+        self.url: str | None = None
+        # Spotify Connect devices listed after the fixed ones, e.g. the
+        # cast devices whose Spotify app got a user
+        self.extra_devices: Callable[[], list[dict]] = list
+
+        self.app = web.Application(middlewares=[self._delay])
+        self.app.add_routes(
+            [
+                web.get("/get_access_token", self.get_access_token),
+                web.post("/device-auth/v1/refresh", self.device_auth),
+                web.get("/v1/me", self.me),
+                web.get("/v1/me/player", self.player),
+                web.get("/v1/me/player/devices", self.devices),
+                web.put("/v1/me/player", self.no_content),
+                web.put("/v1/me/player/play", self.no_content),
+                web.put("/v1/me/player/volume", self.no_content),
+                web.put("/v1/me/player/shuffle", self.no_content),
+                web.put("/v1/me/player/repeat", self.no_content),
+                web.post("/v1/me/player/queue", self.no_content),
+                web.get("/v1/me/playlists", self.playlists),
+                web.get("/v1/me/following", self.following),
+            ]
+        )
+
+    async def start(self) -> str:
+        """Start serving on a free local port, returns the base url"""
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # pylint: disable=W0212
+        self.url = f"http://127.0.0.1:{port}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    @web.middleware
+    async def _delay(self, request: web.Request, handler):
+        self.requests[request.path] = self.requests.get(request.path, 0) + 1
+        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+        return await handler(request)
+
+    async def get_access_token(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "accessToken": "fake-access-token",
+                "accessTokenExpirationTimestampMs": int(
+                    (time.time() + 3600) * 1000
+                ),
+            }
+        )
+
+    async def device_auth(self, request: web.Request) -> web.Response:
+        return web.json_response({"accessToken": "fake-device-token"})
+
+    async def me(self, request: web.Request) -> web.Response:
+        return web.json_response({"id": "benchmark", "country": "SE"})
+
+    async def player(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "is_playing": True,
+                "progress_ms": int(time.time() * 1000) % 200000,
+                "timestamp": int(time.time() * 1000),
+                "device": {"id": "device-0", "name": "Room 0"},
+                "item": {
+                    "uri": "spotify:track:benchmark",
+                    "name": "Benchmark",
+                    "duration_ms": 200000,
+                },
+            }
+        )
+
+    async def devices(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "devices": [
+                    {"id": f"device-{i}", "name": f"Room {i}", "type": "Speaker"}
+                    for i in range(DEVICE_COUNT)
+                ]
+                + self.extra_devices()
+            }
+        )
+
+    async def no_content(self, request: web.Request) -> web.Response:
+        return web.Response(status=204)
+
+    async def playlists(self, request: web.Request) -> web.Response:
+        limit = int(request.query.get("limit", 20))
+        offset = int(request.query.get("offset", 0))
+        items = [
+            {
+                "uri": f"spotify:playlist:benchmark{i}",
+                "name": f"Playlist {i}",
+                "type": "playlist",
+                "id": f"benchmark{i}",
+            }
+            for i in range(offset, min(offset + limit, PLAYLIST_COUNT))
+        ]
+        following = offset + limit < PLAYLIST_COUNT
+        return web.json_response(
+            {
+                "items": items,
+                "limit": limit,
+                "offset": offset,
+                "total": PLAYLIST_COUNT,
+                "next": (
+                    f"{self.url}/v1/me/playlists?offset={offset + limit}&limit={limit}"
+                    if following
+                    else None
+                ),
+            }
+        )
+
+    async def following(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"artists": {"items": [], "next": None, "cursors": {}, "total": 0}}
+        )
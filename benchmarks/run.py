@@ -0,0 +1,429 @@
+"""End to end benchmark of spotcast against local fakes.
+
+Sets up the integration in a throwaway Home Assistant instance, with
+Spotify replaced by `FakeSpotify` and the cast devices by
+`FakeSocketClient` and `FakeChromecast`, then drives casts, websocket
+commands and sensors under the given latency and concurrency. Prints the
+p50/p95/p99 of each stage.
+
+The `casts` benchmark targets Spotify Connect devices by id, so it only
+covers the token, start_playback and sleep stages. The `launches`
+benchmark targets cast devices by name and covers the connect, launch,
+device_auth and device_register stages as well.
+
+    python -m benchmarks.run --latency 0.05 --concurrency 8 --iterations 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if REPO not in sys.path:
+    sys.path.insert(0, REPO)
+
+# pylint: disable=wrong-import-position
+import aiohttp
+import pychromecast
+import spotipy
+from homeassistant import loader
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from pychromecast.models import CastInfo, HostServiceInfo
+
+from benchmarks.fake_chromecast import FakeCastNetwork, ReceiverBehaviour
+from benchmarks.fake_receiver import FakeSocketClient
+from benchmarks.fake_spotify import DEVICE_COUNT, FakeSpotify
+from custom_components.spotcast import spotcast_controller, spotify_controller
+from custom_components.spotcast.const import DOMAIN, TOKEN_URL
+from custom_components.spotcast.metrics import LatencyHistogram
+from custom_components.spotcast.sensor import (
+    ChromecastDevicesSensor,
+    ChromecastPlaylistSensor,
+)
+from custom_components.spotcast.spotify_controller import TYPE_ADD_USER
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FakeConnection:
+    """Websocket connection collecting the messages sent to it"""
+
+    def __init__(self) -> None:
+        self.messages: asyncio.Queue = asyncio.Queue()
+        self.subscriptions: dict = {}
+
+    def send_message(self, message) -> None:
+        self.messages.put_nowait(message)
+
+    def send_error(self, msg_id, code, message) -> None:
+        self.messages.put_nowait(websocket_api.error_message(msg_id, code, message))
+
+
+class FakeDevicesCoordinator:
+    """Spotify Connect devices coordinator of the spotify integration,
+    getting the devices from the fake"""
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.data: dict | None = None
+
+    async def async_refresh(self) -> None:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{self.url}/v1/me/player/devices") as response:
+                self.data = await response.json()
+
+
+class FakeSpotifyMediaPlayer:
+    """Media player of the spotify integration for the account"""
+
+    unique_id = "benchmark"
+
+    def __init__(self, url: str) -> None:
+        self.devices = FakeDevicesCoordinator(url)
+
+
+def redirect_to(url: str) -> None:
+    """Point the Spotify endpoints used by spotcast to the fake"""
+    spotcast_controller.TOKEN_URL = url + TOKEN_URL[TOKEN_URL.index("/get_access_token"):]
+    spotify_controller.DEVICE_AUTH_URL = f"{url}/device-auth/v1/refresh"
+
+    init = spotipy.Spotify.__init__
+
+    def redirected_init(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        self.prefix = f"{url}/v1/"
+
+    spotipy.Spotify.__init__ = redirected_init
+
+
+async def async_setup_hass(config_dir: str, options: dict) -> HomeAssistant:
+    hass = HomeAssistant(config_dir)
+    hass.config.skip_pip = True
+    loader.async_setup(hass)
+
+    # spotcast only needs these integrations for the media players and
+    # cast devices, which the benchmark does not use
+    hass.config.components.update({"spotify", "cast", "websocket_api"})
+
+    config = {DOMAIN: {"sp_dc": "benchmark", "sp_key": "benchmark", **options}}
+    if not await async_setup_component(hass, DOMAIN, config):
+        raise RuntimeError("Could not set up spotcast")
+
+    return hass
+
+
+async def timed(histogram: LatencyHistogram, job) -> None:
+    started = time.perf_counter()
+    try:
+        await job
+    finally:
+        histogram.record(time.perf_counter() - started)
+
+
+async def bench_casts(hass, args, histograms) -> None:
+    histogram = histograms.setdefault("service:start", LatencyHistogram())
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def cast(index: int) -> None:
+        async with semaphore:
+            await timed(
+                histogram,
+                hass.services.async_call(
+                    DOMAIN,
+                    "start",
+                    {
+                        "spotify_device_id": f"device-{index % DEVICE_COUNT}",
+                        # different content so calls are not coalesced
+                        "uri": f"spotify:playlist:benchmark{index}",
+                    },
+                    blocking=True,
+                ),
+            )
+
+    await asyncio.gather(*(cast(index) for index in range(args.iterations)))
+
+
+async def bench_launches(hass, args, histograms) -> None:
+    """Casts by device name, each launching the Spotify app on a fake cast
+    device of its own and waiting for it to register with Spotify"""
+    histogram = histograms.setdefault("service:start (launch)", LatencyHistogram())
+    semaphore = asyncio.Semaphore(args.concurrency)
+    fake = hass.data["benchmark_spotify"]
+    network = FakeCastNetwork()
+    behaviour = ReceiverBehaviour(args.receiver_delay, args.receiver_delay / 2)
+    devices = [
+        await hass.async_add_executor_job(
+            network.add_device, f"Cast {index}", behaviour
+        )
+        for index in range(args.iterations)
+    ]
+    cast_devices = [
+        SimpleNamespace(
+            friendly_name=device.friendly_name,
+            cast_info=CastInfo(
+                services={HostServiceInfo("127.0.0.1", device.port)},
+                uuid=device.uuid,
+                model_name="Fake Chromecast",
+                friendly_name=device.friendly_name,
+                host="127.0.0.1",
+                port=device.port,
+                cast_type="audio",
+                manufacturer="spotcast",
+            ),
+        )
+        for device in devices
+    ]
+
+    # a cast device shows up in Spotify Connect once its app got a user
+    fake.extra_devices = lambda: [
+        {
+            "id": hashlib.md5(device.friendly_name.encode()).hexdigest(),
+            "name": device.friendly_name,
+            "type": "CastAudio",
+        }
+        for device in devices
+        if device.received[TYPE_ADD_USER]
+    ]
+    media_player = FakeSpotifyMediaPlayer(fake.url)
+    chromecasts = []
+    get_chromecast = pychromecast.get_chromecast_from_cast_info
+
+    # keep hold of the connections so they can be closed afterwards
+    def get_chromecast_from_cast_info(*args, **kwargs):
+        chromecast = get_chromecast(*args, **kwargs)
+        chromecasts.append(chromecast)
+        return chromecast
+
+    pychromecast.get_chromecast_from_cast_info = get_chromecast_from_cast_info
+    get_cast_devices = spotcast_controller.get_cast_devices
+    get_spotify_media_player = spotcast_controller.get_spotify_media_player
+    spotcast_controller.get_cast_devices = lambda hass: cast_devices
+    spotcast_controller.get_spotify_media_player = lambda hass, user_id: media_player
+
+    async def cast(index: int) -> None:
+        async with semaphore:
+            await timed(
+                histogram,
+                hass.services.async_call(
+                    DOMAIN,
+                    "start",
+                    {
+                        "device_name": f"Cast {index}",
+                        "uri": f"spotify:playlist:benchmark{index}",
+                    },
+                    blocking=True,
+                ),
+            )
+
+    try:
+        await asyncio.gather(*(cast(index) for index in range(args.iterations)))
+    finally:
+        pychromecast.get_chromecast_from_cast_info = get_chromecast
+        spotcast_controller.get_cast_devices = get_cast_devices
+        spotcast_controller.get_spotify_media_player = get_spotify_media_player
+        fake.extra_devices = list
+
+        for chromecast in chromecasts:
+            await hass.async_add_executor_job(chromecast.disconnect, 5)
+
+        await hass.async_add_executor_job(network.stop)
+
+
+async def bench_websocket(hass, args, histograms) -> None:
+    handlers = hass.data[websocket_api.DOMAIN]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    requests = [
+        {"type": "spotcast/playlists", "playlist_type": "user", "limit": 20},
+        {"type": "spotcast/player"},
+        {"type": "spotcast/accounts"},
+        {"type": "spotcast/stats"},
+        {
+            "type": "spotcast/batch",
+            "requests": [
+                {"type": "spotcast/player"},
+                {"type": "spotcast/accounts"},
+            ],
+        },
+    ]
+
+    async def call(index: int, request: dict) -> None:
+        handler, schema = handlers[request["type"]]
+        msg = schema({"id": index, **request})
+        connection = FakeConnection()
+
+        async with semaphore:
+            started = time.perf_counter()
+            handler(hass, connection, msg)
+            await connection.messages.get()
+            histograms.setdefault(
+                f"websocket:{request['type']}", LatencyHistogram()
+            ).record(time.perf_counter() - started)
+
+    await asyncio.gather(
+        *(
+            call(index, request)
+            for index in range(args.iterations)
+            for request in requests
+        )
+    )
+
+
+async def bench_sensors(hass, args, histograms) -> None:
+    playlists = ChromecastPlaylistSensor(hass, "SE")
+    devices = ChromecastDevicesSensor(hass)
+
+    for _ in range(args.iterations):
+        await timed(
+            histograms.setdefault("sensor:playlists", LatencyHistogram()),
+            hass.async_add_executor_job(playlists.update),
+        )
+        await timed(
+            histograms.setdefault("sensor:devices", LatencyHistogram()),
+            hass.async_add_executor_job(devices.update),
+        )
+
+
+async def bench_receivers(hass, args, histograms) -> None:
+    """Spotify app handshakes, each on its own fake cast device"""
+    controller = hass.data[DOMAIN]["controller"]
+    access_token, expires = await hass.async_add_executor_job(
+        controller.get_token_instance().get_spotify_token
+    )
+    histogram = histograms.setdefault("receiver:launch_app", LatencyHistogram())
+
+    def handshake(index: int) -> None:
+        socket_client = FakeSocketClient(
+            f"Room {index}", args.receiver_delay, args.receiver_delay / 2
+        )
+        spotify = spotify_controller.SpotifyController(
+            socket_client.cast_device,
+            access_token,
+            expires,
+            metrics=controller.metrics,
+            labels=("default", f"Room {index}"),
+        )
+        socket_client.register_handler(spotify)
+
+        started = time.perf_counter()
+        try:
+            spotify.launch_app()
+        finally:
+            histogram.record(time.perf_counter() - started)
+            socket_client.stop()
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        await asyncio.gather(
+            *(
+                hass.loop.run_in_executor(executor, handshake, index)
+                for index in range(args.iterations)
+            )
+        )
+
+
+def report(histograms: dict, stages: dict) -> dict:
+    return {
+        "harness": {name: h.summary() for name, h in sorted(histograms.items())},
+        "stages": stages["accounts"],
+    }
+
+
+def print_table(results: dict) -> None:
+    rows = [(name, summary) for name, summary in results["harness"].items()]
+    for account, account_stages in results["stages"].items():
+        rows += [
+            (f"stage:{stage} ({account})", summary)
+            for stage, summary in sorted(account_stages.items())
+        ]
+
+    print(f"{'operation':<45}{'count':>8}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for name, summary in rows:
+        if not summary["count"]:
+            continue
+        print(
+            f"{name:<45}{summary['count']:>8}"
+            f"{summary['p50']:>9.3f}{summary['p95']:>9.3f}{summary['p99']:>9.3f}"
+        )
+
+
+async def async_main(args) -> dict:
+    fake = FakeSpotify(args.latency, args.jitter)
+    url = await fake.start()
+    redirect_to(url)
+
+    histograms: dict[str, LatencyHistogram] = {}
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        os.symlink(
+            os.path.join(REPO, "custom_components"),
+            os.path.join(config_dir, "custom_components"),
+        )
+        hass = await async_setup_hass(
+            config_dir, {"account_concurrency": args.concurrency}
+        )
+        hass.data["benchmark_spotify"] = fake
+
+        try:
+            for name, bench in (
+                ("casts", bench_casts),
+                ("launches", bench_launches),
+                ("websocket", bench_websocket),
+                ("sensors", bench_sensors),
+                ("receivers", bench_receivers),
+            ):
+                if args.only and name not in args.only:
+                    continue
+                _LOGGER.info("Running %s", name)
+                await bench(hass, args, histograms)
+
+            stages = hass.data[DOMAIN]["controller"].metrics.summary()
+        finally:
+            await hass.async_stop(force=True)
+            await fake.stop()
+
+    results = report(histograms, stages)
+    results["requests"] = fake.requests
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="latency of the fake Spotify, in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02,
+                        help="random extra latency, in seconds")
+    parser.add_argument("--receiver-delay", type=float, default=0.05,
+                        help="launch delay of the fake cast devices")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--only", nargs="*",
+                        choices=["casts", "launches", "websocket", "sensors", "receivers"])
+    parser.add_argument("--json", action="store_true",
+                        help="print the results as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    logging.getLogger("custom_components.spotcast").setLevel(logging.WARNING)
+
+    results = asyncio.run(async_main(args))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,22 +4,42 @@ from __future__ import annotations
 
 __version__ = "4.0.0"
 
+import asyncio
 import collections
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
 
 import homeassistant.core as ha_core
 from homeassistant.components import websocket_api
-from homeassistant.const import CONF_ENTITY_ID, CONF_OFFSET, CONF_REPEAT
-from homeassistant.core import callback
+from homeassistant.const import (
+    CONF_ENTITY_ID,
+    CONF_OFFSET,
+    CONF_REPEAT,
+    EVENT_HOMEASSISTANT_STOP,
+)
+from homeassistant.core import SupportsResponse, callback
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import (
+    async_track_state_change_event,
+    async_track_time_interval,
+)
+from homeassistant.helpers.start import async_at_started
 
 from .const import (
+    CACHE_WEIGHTS,
+    CONF_ACCOUNT_CONCURRENCY,
     CONF_ACCOUNTS,
+    CONF_CACHE_BUDGET,
+    CONF_COALESCE_WINDOW,
     CONF_DEVICE_NAME,
     CONF_FORCE_PLAYBACK,
     CONF_IGNORE_FULLY_PLAYED,
+    CONF_INTENT,
+    CONF_INTENTS,
     CONF_RANDOM,
+    CONF_REFRESH_INTERVAL,
     CONF_SHUFFLE,
     CONF_SP_DC,
     CONF_SP_KEY,
@@ -38,21 +58,38 @@ from .const import (
     CONF_SPOTIFY_TRACK_NAME,
     CONF_SPOTIFY_URI,
     CONF_START_VOL,
+    CONF_TRACE_FILE,
+    CONF_WARM_UP,
+    DEFAULT_ACCOUNT_CONCURRENCY,
+    DEFAULT_COALESCE_WINDOW_SECS,
     DOMAIN,
+    MAX_FANOUT_WORKERS,
     SCHEMA_PLAYLISTS,
     SCHEMA_WS_ACCOUNTS,
+    SCHEMA_WS_BATCH,
     SCHEMA_WS_CASTDEVICES,
     SCHEMA_WS_DEVICES,
     SCHEMA_WS_PLAYER,
+    SCHEMA_WS_PLAYER_SUBSCRIBE,
+    SCHEMA_WS_STATS,
     CONF_START_POSITION,
+    SERVICE_PLAY_INTENT_SCHEMA,
     SERVICE_START_COMMAND_SCHEMA,
+    SERVICE_START_MULTI_COMMAND_SCHEMA,
     SPOTCAST_CONFIG_SCHEMA,
+    WARM_UP_MAX_WORKERS,
+    WS_CACHE_TTL_SECS,
+    WS_MAX_WORKERS,
     WS_TYPE_SPOTCAST_ACCOUNTS,
+    WS_TYPE_SPOTCAST_BATCH,
     WS_TYPE_SPOTCAST_CASTDEVICES,
     WS_TYPE_SPOTCAST_DEVICES,
     WS_TYPE_SPOTCAST_PLAYER,
+    WS_TYPE_SPOTCAST_PLAYER_SUBSCRIBE,
     WS_TYPE_SPOTCAST_PLAYLISTS,
+    WS_TYPE_SPOTCAST_STATS,
 )
+from .cache import ResponseCache
 from .helpers import (
     add_tracks_to_queue,
     async_wrap,
@@ -62,11 +99,19 @@ from .helpers import (
     get_spotify_devices,
     get_spotify_install_status,
     get_spotify_media_player,
+    get_track_uris,
     is_empty_str,
-    is_valid_uri,
-    url_to_spotify_uri,
 )
-from .spotcast_controller import SpotcastController
+from .intents import Intent, Intents
+from .metrics import STAGE_TOTAL, stage_labels
+from .player import PlayerPoller
+from .scheduler import CallCoalescer, ExecutionLanes
+from .spotcast_controller import SpotcastController, import_cast_modules
+from .spotify_uri import SpotifyURI, parse_uri
+from .tracing import JsonLinesExporter, span, start_trace
+
+if TYPE_CHECKING:
+    import spotipy
 
 CONFIG_SCHEMA = SPOTCAST_CONFIG_SCHEMA
 DEBUG = True
@@ -74,8 +119,12 @@ DEBUG = True
 _LOGGER = logging.getLogger(__name__)
 
 
-def setup(hass: ha_core.HomeAssistant, config: collections.OrderedDict) -> bool:
-    """setup method for integration with Home Assistant
+async def async_setup(
+    hass: ha_core.HomeAssistant, config: collections.OrderedDict
+) -> bool:
+    """setup method for integration with Home Assistant. Services and
+    websocket commands are registered right away, the modules used to
+    cast are imported and the tokens fetched in the background.
 
     Args:
         hass (ha_core.HomeAssistant): the HomeAssistant object of the
@@ -103,97 +152,131 @@ def setup(hass: ha_core.HomeAssistant, config: collections.OrderedDict) -> bool:
     sp_key = conf[CONF_SP_KEY]
     accounts = conf.get(CONF_ACCOUNTS)
 
-    spotcast_controller = SpotcastController(hass, sp_dc, sp_key, accounts)
+    spotcast_controller = SpotcastController(
+        hass, sp_dc, sp_key, accounts, conf[CONF_CACHE_BUDGET] * 1024
+    )
 
     if DOMAIN not in hass.data:
         hass.data[DOMAIN] = {}
     hass.data[DOMAIN]["controller"] = spotcast_controller
+    metrics = spotcast_controller.metrics
+
+    trace_exporter = None
+    if CONF_TRACE_FILE in conf:
+        trace_exporter = JsonLinesExporter(hass.config.path(conf[CONF_TRACE_FILE]))
+
+    lanes = ExecutionLanes(
+        conf.get(CONF_ACCOUNT_CONCURRENCY, DEFAULT_ACCOUNT_CONCURRENCY)
+    )
+    coalescer = CallCoalescer(
+        conf.get(CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW_SECS)
+    )
+    fanout_executor = ThreadPoolExecutor(
+        max_workers=MAX_FANOUT_WORKERS, thread_name_prefix="spotcast_fanout"
+    )
+    ws_executor = ThreadPoolExecutor(
+        max_workers=WS_MAX_WORKERS, thread_name_prefix="spotcast_ws"
+    )
+    # playlist pages are large, they are sized next to their fetch
+    ws_cache = spotcast_controller.caches.register(
+        "responses",
+        ResponseCache(WS_CACHE_TTL_SECS, executor=ws_executor),
+        CACHE_WEIGHTS["responses"],
+    )
+    player_pollers: dict[str | None, PlayerPoller] = {}
+    intents = Intents(
+        (name, Intent(name, data))
+        for name, data in conf.get(CONF_INTENTS, {}).items()
+    )
 
     @callback
-    def websocket_handle_playlists(
-            hass: ha_core.HomeAssistant,
-            connection,
-            msg: str
-    ):
+    def shutdown_executors(_):
+        fanout_executor.shutdown(wait=False)
+        ws_executor.shutdown(wait=False)
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, shutdown_executors)
+
+    async def async_get_playlists(msg: dict):
+        """Get a page of playlist. The page holds a `next_cursor` to
+        request the following page with, None on the last page"""
+        playlist_type = msg.get("playlist_type")
+        country_code = msg.get("country_code")
+        locale = msg.get("locale", "en")
+        limit = msg.get("limit", 10)
+        account = msg.get("account", None)
+        offset = int(msg.get("cursor") or 0)
+
         @async_wrap
         def get_playlist():
-            """Handle to get playlist"""
-            playlist_type = msg.get("playlist_type")
-            country_code = msg.get("country_code")
-            locale = msg.get("locale", "en")
-            limit = msg.get("limit", 10)
-            account = msg.get("account", None)
-
             _LOGGER.debug("websocket_handle_playlists msg: %s", msg)
             resp = spotcast_controller.get_playlists(
-                account, playlist_type, country_code, locale, limit
+                account, playlist_type, country_code, locale, limit, offset
             )
-            connection.send_message(
-                websocket_api.result_message(msg["id"], resp))
 
-        hass.async_add_job(get_playlist())
+            if resp is not None:
+                items = resp.get("items") or []
+                resp["next_cursor"] = (
+                    str(offset + len(items)) if resp.get("next") and items else None
+                )
+
+            return resp
+
+        return await ws_cache.get(
+            (
+                account,
+                WS_TYPE_SPOTCAST_PLAYLISTS,
+                (playlist_type, country_code, locale, limit, offset),
+            ),
+            lambda: get_playlist(executor=ws_executor),
+        )
+
+    async def async_get_devices(msg: dict):
+        """Get devices. Only for default account"""
+        account = msg.get("account", None)
 
-    @callback
-    def websocket_handle_devices(
-            hass: ha_core.HomeAssistant,
-            connection,
-            msg: str,
-    ):
         @async_wrap
         def get_devices():
-            """Handle to get devices. Only for default account"""
-            account = msg.get("account", None)
             client = spotcast_controller.get_spotify_client(account)
-            me_resp = client._get("me")  # pylint: disable=W0212
-            spotify_media_player = get_spotify_media_player(
-                hass, me_resp["id"])
-            resp = get_spotify_devices(spotify_media_player, hass)
-            connection.send_message(
-                websocket_api.result_message(msg["id"], resp))
+            user_id = spotcast_controller.get_profile(account, client)["id"]
+            spotify_media_player = get_spotify_media_player(hass, user_id)
+            return get_spotify_devices(
+                spotify_media_player, hass, spotcast_controller.devices_cache
+            )
+
+        return await ws_cache.get(
+            (account, WS_TYPE_SPOTCAST_DEVICES, ()),
+            lambda: get_devices(executor=ws_executor),
+        )
 
-        hass.async_add_job(get_devices())
+    async def async_get_player(msg: dict):
+        """Get player"""
+        account = msg.get("account", None)
 
-    @callback
-    def websocket_handle_player(
-            hass: ha_core.HomeAssistant,
-            connection,
-            msg: str,
-    ):
         @async_wrap
         def get_player():
-            """Handle to get player"""
-            account = msg.get("account", None)
             _LOGGER.debug("websocket_handle_player msg: %s", msg)
             client = spotcast_controller.get_spotify_client(account)
-            resp = client._get("me/player")  # pylint: disable=W0212
-            connection.send_message(
-                websocket_api.result_message(msg["id"], resp))
+            return client._get("me/player")  # pylint: disable=W0212
 
-        hass.async_add_job(get_player())
+        return await ws_cache.get(
+            (account, WS_TYPE_SPOTCAST_PLAYER, ()),
+            lambda: get_player(executor=ws_executor),
+        )
 
-    @callback
-    def websocket_handle_accounts(
-            hass: ha_core.HomeAssistant,
-            connection,
-            msg: str,
-    ):
-        """Handle to get accounts"""
+    async def async_get_accounts(msg: dict):
+        """Get accounts"""
         _LOGGER.debug("websocket_handle_accounts msg: %s", msg)
         resp = list(accounts.keys()) if accounts is not None else []
         resp.append("default")
-        connection.send_message(websocket_api.result_message(msg["id"], resp))
+        return resp
 
-    @callback
-    def websocket_handle_castdevices(
-            hass: ha_core.HomeAssistant,
-            connection, msg: str
-    ):
-        """Handle to get cast devices for debug purposes"""
+    async def async_get_castdevices(msg: dict):
+        """Get cast devices for debug purposes"""
         _LOGGER.debug("websocket_handle_castdevices msg: %s", msg)
 
         known_devices = get_cast_devices(hass)
         _LOGGER.debug("%s", known_devices)
-        resp = [
+        return [
             {
                 "uuid": str(cast_info.cast_info.uuid),
                 "model_name": cast_info.cast_info.model_name,
@@ -202,176 +285,674 @@ def setup(hass: ha_core.HomeAssistant, config: collections.OrderedDict) -> bool:
             for cast_info in known_devices
         ]
 
-        connection.send_message(websocket_api.result_message(msg["id"], resp))
+    async def async_get_stats(msg: dict):
+        """Get the latency of each stage of a cast"""
+        _LOGGER.debug("websocket_handle_stats msg: %s", msg)
+        return {
+            **metrics.summary(),
+            "registration": spotcast_controller.registration.summary(),
+            "intents": intents.summary(),
+            "caches": spotcast_controller.caches.stats(),
+        }
 
-    def start_casting(call: ha_core.ServiceCall):
-        """service called."""
-        uri = call.data.get(CONF_SPOTIFY_URI)
-        category = call.data.get(CONF_SPOTIFY_CATEGORY)
-        country = call.data.get(CONF_SPOTIFY_COUNTRY)
-        limit = call.data.get(CONF_SPOTIFY_LIMIT)
-        artistName = call.data.get(CONF_SPOTIFY_ARTIST_NAME)
-        albumName = call.data.get(CONF_SPOTIFY_ALBUM_NAME)
-        playlistName = call.data.get(CONF_SPOTIFY_PLAYLIST_NAME)
-        trackName = call.data.get(CONF_SPOTIFY_TRACK_NAME)
-        showName = call.data.get(CONF_SPOTIFY_SHOW_NAME)
-        episodeName = call.data.get(CONF_SPOTIFY_EPISODE_NAME)
-        audiobookName = call.data.get(CONF_SPOTIFY_AUDIOBOOK_NAME)
-        genreName = call.data.get(CONF_SPOTIFY_GENRE_NAME)
-        random_song = call.data.get(CONF_RANDOM, False)
-        repeat = call.data.get(CONF_REPEAT, False)
-        shuffle = call.data.get(CONF_SHUFFLE, False)
-        start_volume = call.data.get(CONF_START_VOL)
-        spotify_device_id = call.data.get(CONF_SPOTIFY_DEVICE_ID)
-        position = call.data.get(CONF_OFFSET)
-        start_position = call.data.get(CONF_START_POSITION)
-        force_playback = call.data.get(CONF_FORCE_PLAYBACK)
-        account = call.data.get(CONF_SPOTIFY_ACCOUNT)
-        ignore_fully_played = call.data.get(CONF_IGNORE_FULLY_PLAYED)
-        device_name = call.data.get(CONF_DEVICE_NAME)
-        entity_id = call.data.get(CONF_ENTITY_ID)
+    # websocket commands that can be part of a spotcast/batch request
+    batch_commands = {
+        WS_TYPE_SPOTCAST_PLAYLISTS: (SCHEMA_PLAYLISTS, async_get_playlists),
+        WS_TYPE_SPOTCAST_DEVICES: (SCHEMA_WS_DEVICES, async_get_devices),
+        WS_TYPE_SPOTCAST_PLAYER: (SCHEMA_WS_PLAYER, async_get_player),
+        WS_TYPE_SPOTCAST_ACCOUNTS: (SCHEMA_WS_ACCOUNTS, async_get_accounts),
+        WS_TYPE_SPOTCAST_CASTDEVICES: (
+            SCHEMA_WS_CASTDEVICES,
+            async_get_castdevices,
+        ),
+        WS_TYPE_SPOTCAST_STATS: (SCHEMA_WS_STATS, async_get_stats),
+    }
 
-        try:  # yes this is ugly, quick fix while working on V4
+    def send_error(connection, msg_id: int, exc: Exception) -> None:
+        """Answer a websocket command with the error it failed with"""
+        _LOGGER.debug("Websocket command %s failed: %s", msg_id, exc)
+        code = (
+            websocket_api.ERR_HOME_ASSISTANT_ERROR
+            if isinstance(exc, HomeAssistantError)
+            else websocket_api.ERR_UNKNOWN_ERROR
+        )
+        connection.send_error(msg_id, code, str(exc) or type(exc).__name__)
+
+    def websocket_handler(fetch):
+        """Build a websocket handler sending the result of `fetch`, or
+        the error it raised"""
 
-            # if no market information try to get global setting
-            if is_empty_str(country):
+        @callback
+        def handler(hass: ha_core.HomeAssistant, connection, msg: dict):
+            async def send_result():
                 try:
-                    country = config[DOMAIN][CONF_SPOTIFY_COUNTRY]
-                except KeyError:
-                    country = None
+                    resp = await fetch(msg)
+                except Exception as exc:  # pylint: disable=broad-except
+                    send_error(connection, msg["id"], exc)
+                    return
 
-            client = spotcast_controller.get_spotify_client(account)
+                connection.send_message(
+                    websocket_api.result_message(msg["id"], resp))
 
-            # verify the uri provided and clean-up if required
-            if not is_empty_str(uri):
+            hass.async_create_task(send_result())
 
-                # remove ? from badly formatted URI
-                uri = uri.split("?")[0]
+        return handler
 
-                if uri.startswith("http"):
-                    try:
-                        u = url_to_spotify_uri(uri)
-                        _LOGGER.debug(
-                            "converted web URL %s to spotify URI %s", uri, u)
-                        uri = u
-                    except ValueError:
-                        _LOGGER.error(
-                            "invalid web URL provided, could not convert to spotify URI: %s", uri)
-
-                if not is_valid_uri(uri):
-                    _LOGGER.error("Invalid URI provided, aborting casting")
+    websocket_handle_playlists_page = websocket_handler(async_get_playlists)
+
+    @callback
+    def websocket_handle_playlists(
+            hass: ha_core.HomeAssistant,
+            connection,
+            msg: dict,
+    ):
+        """Handle to get playlist. In streaming mode, every page is sent
+        as an event as soon as it arrives, while the next one is already
+        being fetched"""
+        if not msg.get("stream"):
+            websocket_handle_playlists_page(hass, connection, msg)
+            return
+
+        async def stream_pages():
+            request = dict(msg)
+            pending = hass.async_create_task(async_get_playlists(request))
+            subscribed = False
+
+            while True:
+                try:
+                    page = await pending
+                except Exception as exc:  # pylint: disable=broad-except
+                    # the subscription fails with the first page, later
+                    # errors end the stream
+                    if not subscribed:
+                        connection.subscriptions.pop(msg["id"], None)
+                        send_error(connection, msg["id"], exc)
+                    else:
+                        connection.send_message(
+                            websocket_api.event_message(
+                                msg["id"], {"error": str(exc), "done": True}))
                     return
 
-                # force first two elements of uri to lowercase
-                uri = uri.split(":")
-                uri[0] = uri[0].lower()
-                uri[1] = uri[1].lower()
-                uri = ":".join(uri)
+                if not subscribed:
+                    connection.send_message(
+                        websocket_api.result_message(msg["id"]))
+                    subscribed = True
 
-            # verify spotify id given in config or get one
-            if not spotify_device_id:
-                spotify_device_id = spotcast_controller.get_spotify_device_id(
-                    account, spotify_device_id, device_name, entity_id
+                next_cursor = page.get("next_cursor") if page else None
+
+                # prefetch the next page while this one is rendered
+                if next_cursor is not None:
+                    request = {**request, "cursor": next_cursor}
+                    pending = hass.async_create_task(
+                        async_get_playlists(request))
+
+                connection.send_message(
+                    websocket_api.event_message(
+                        msg["id"], {"page": page, "done": next_cursor is None}))
+
+                if next_cursor is None:
+                    return
+
+        task = hass.async_create_task(stream_pages())
+        connection.subscriptions[msg["id"]] = task.cancel
+
+    websocket_handle_devices = websocket_handler(async_get_devices)
+    websocket_handle_player = websocket_handler(async_get_player)
+    websocket_handle_accounts = websocket_handler(async_get_accounts)
+    websocket_handle_castdevices = websocket_handler(async_get_castdevices)
+    websocket_handle_stats = websocket_handler(async_get_stats)
+
+    @callback
+    def websocket_handle_batch(
+            hass: ha_core.HomeAssistant,
+            connection,
+            msg: dict,
+    ):
+        """Handle a list of requests at once. Each request is run
+        concurrently and gets its own result or error in the response"""
+        _LOGGER.debug("websocket_handle_batch msg: %s", msg)
+
+        async def run_request(request: dict) -> dict:
+            try:
+                schema, fetch = batch_commands[request["type"]]
+                request = schema({**request, "id": msg["id"]})
+                return {"success": True, "result": await fetch(request)}
+            except Exception as exc:  # pylint: disable=broad-except
+                _LOGGER.debug("Batch request %s failed: %s", request, exc)
+                return {"success": False, "error": str(exc)}
+
+        async def send_results():
+            try:
+                resp = await asyncio.gather(
+                    *(run_request(request) for request in msg["requests"])
                 )
+            except Exception as exc:  # pylint: disable=broad-except
+                send_error(connection, msg["id"], exc)
+                return
 
-            if start_position is not None:
-                start_position *= 1000
-
-            if (
-                is_empty_str(uri)
-                and len(
-                    list(
-                        filter(
-                            lambda x: not is_empty_str(x),
-                            [
-                                artistName,
-                                playlistName,
-                                trackName,
-                                showName,
-                                episodeName,
-                                audiobookName,
-                                genreName,
-                                category,
-                            ],
-                        )
-                    )
+            connection.send_message(
+                websocket_api.result_message(msg["id"], list(resp)))
+
+        hass.async_create_task(send_results())
+
+    @callback
+    def websocket_handle_player_subscribe(
+            hass: ha_core.HomeAssistant,
+            connection,
+            msg: dict,
+    ):
+        """Handle to subscribe to the player state. Updates only hold
+        the fields that changed since the previous one"""
+        account = msg.get("account", None)
+
+        if account not in player_pollers:
+            player_pollers[account] = PlayerPoller(
+                hass,
+                lambda: async_get_player({"account": account}),
+            )
+
+        @callback
+        def send_update(update: dict):
+            connection.send_message(
+                websocket_api.event_message(msg["id"], update))
+
+        connection.subscriptions[msg["id"]] = player_pollers[
+            account
+        ].async_subscribe(send_update)
+        connection.send_message(websocket_api.result_message(msg["id"]))
+
+    def has_content(data: dict) -> bool:
+        """Check if the service call asks for specific content. If not,
+        the current playback is transfered instead."""
+        return not all(
+            is_empty_str(data.get(key))
+            for key in [
+                CONF_SPOTIFY_URI,
+                CONF_SPOTIFY_ARTIST_NAME,
+                CONF_SPOTIFY_PLAYLIST_NAME,
+                CONF_SPOTIFY_TRACK_NAME,
+                CONF_SPOTIFY_SHOW_NAME,
+                CONF_SPOTIFY_EPISODE_NAME,
+                CONF_SPOTIFY_AUDIOBOOK_NAME,
+                CONF_SPOTIFY_GENRE_NAME,
+                CONF_SPOTIFY_CATEGORY,
+            ]
+        )
+
+    def resolve_content(
+        data: dict, client: spotipy.Spotify
+    ) -> tuple[SpotifyURI, list] | None:
+        """Resolve the content of a service call into a uri to play and
+        the search results to queue after it. Returns None if no
+        content could be resolved."""
+        uri = data.get(CONF_SPOTIFY_URI)
+        category = data.get(CONF_SPOTIFY_CATEGORY)
+        country = data.get(CONF_SPOTIFY_COUNTRY)
+        limit = data.get(CONF_SPOTIFY_LIMIT)
+        artistName = data.get(CONF_SPOTIFY_ARTIST_NAME)
+        albumName = data.get(CONF_SPOTIFY_ALBUM_NAME)
+        playlistName = data.get(CONF_SPOTIFY_PLAYLIST_NAME)
+        trackName = data.get(CONF_SPOTIFY_TRACK_NAME)
+        showName = data.get(CONF_SPOTIFY_SHOW_NAME)
+        episodeName = data.get(CONF_SPOTIFY_EPISODE_NAME)
+        audiobookName = data.get(CONF_SPOTIFY_AUDIOBOOK_NAME)
+        genreName = data.get(CONF_SPOTIFY_GENRE_NAME)
+        account = data.get(CONF_SPOTIFY_ACCOUNT)
+
+        # if no market information try to get global setting
+        if is_empty_str(country):
+            try:
+                country = config[DOMAIN][CONF_SPOTIFY_COUNTRY]
+            except KeyError:
+                country = None
+
+        # verify the uri provided and clean-up if required
+        if not is_empty_str(uri):
+            try:
+                uri = parse_uri(uri)
+            except ValueError as exc:
+                _LOGGER.error("Invalid URI provided, aborting casting: %s", exc)
+                return None
+        else:
+            uri = None
+
+        if not is_empty_str(category):
+            playlist_uri = get_random_playlist_from_category(
+                client, category, country, limit)
+
+            if playlist_uri is None:
+                _LOGGER.error("No playlist returned. Stop service call")
+                return None
+
+            return parse_uri(playlist_uri), []
+
+        if uri is not None:
+            return uri, []
+
+        searchResults = []
+        artistUri = None
+        filters = [
+            x
+            for x in [
+                artistName,
+                albumName,
+                playlistName,
+                trackName,
+                showName,
+                episodeName,
+                audiobookName,
+                genreName,
+            ]
+            if not is_empty_str(x)
+        ]
+
+        # resolve a lone playlist or artist name locally first
+        if len(filters) == 1:
+            if not is_empty_str(playlistName):
+                uri = spotcast_controller.resolve_name(
+                    account, "playlist", playlistName
                 )
-                == 0
-            ):
-                _LOGGER.debug("Transfering playback")
-                current_playback = client.current_playback()
-                if current_playback is not None:
-                    _LOGGER.debug("Current_playback from spotify: %s",
-                                  current_playback)
-                    force_playback = True
-                _LOGGER.debug("Force playback: %s", force_playback)
-                client.transfer_playback(
-                    device_id=spotify_device_id, force_play=force_playback
+            elif not is_empty_str(artistName):
+                artistUri = spotcast_controller.resolve_name(
+                    account, "artist", artistName
                 )
-            elif not is_empty_str(category):
-                uri = get_random_playlist_from_category(
-                    client, category, country, limit)
 
-                if uri is None:
-                    _LOGGER.error("No playlist returned. Stop service call")
-                    return None
+        if uri is None:
+            # get uri from search request
+            searchResults = get_search_results(
+                spotify_client=client,
+                limit=limit,
+                artistName=artistName,
+                country=country,
+                albumName=albumName,
+                playlistName=playlistName,
+                trackName=trackName,
+                showName=showName,
+                episodeName=episodeName,
+                audiobookName=audiobookName,
+                genreName=genreName,
+                artistUri=artistUri,
+            )
+            # play the first track
+            if len(searchResults) > 0:
+                uri = parse_uri(searchResults[0].uri)
 
-                spotcast_controller.play(
-                    client,
-                    spotify_device_id,
-                    uri,
-                    random_song,
-                    position,
-                    ignore_fully_played,
-                    start_position,
+        if uri is None:
+            _LOGGER.error("No content found. Stop service call")
+            return None
+
+        return uri, searchResults
+
+    def start_playback(
+        data: dict,
+        client: spotipy.Spotify,
+        spotify_device_id: str,
+        content: tuple[SpotifyURI, list] | None,
+    ) -> None:
+        """Start the resolved content on a Spotify device, or transfer
+        the current playback if no content was requested."""
+        random_song = data.get(CONF_RANDOM, False)
+        repeat = data.get(CONF_REPEAT, False)
+        shuffle = data.get(CONF_SHUFFLE, False)
+        start_volume = data.get(CONF_START_VOL)
+        position = data.get(CONF_OFFSET)
+        start_position = data.get(CONF_START_POSITION)
+        force_playback = data.get(CONF_FORCE_PLAYBACK)
+        ignore_fully_played = data.get(CONF_IGNORE_FULLY_PLAYED)
+
+        if start_position is not None:
+            start_position *= 1000
+
+        if content is None:
+            _LOGGER.debug("Transfering playback")
+            current_playback = client.current_playback()
+            if current_playback is not None:
+                _LOGGER.debug("Current_playback from spotify: %s",
+                              current_playback)
+                force_playback = True
+            _LOGGER.debug("Force playback: %s", force_playback)
+            with metrics.measure("start_playback"):
+                client.transfer_playback(
+                    device_id=spotify_device_id, force_play=force_playback
                 )
+        else:
+            uri, searchResults = content
+            tracks = get_track_uris(searchResults)
+
+            # a list of tracks is started at once, the tracks following
+            # an album or a playlist are queued after it
+            if uri.kind == "track" and len(tracks) > 1:
+                with metrics.measure("start_playback"):
+                    spotcast_controller.play_tracks(
+                        client,
+                        spotify_device_id,
+                        tracks,
+                        random_song,
+                        position,
+                        start_position,
+                    )
             else:
-                searchResults = []
-                if is_empty_str(uri):
-                    # get uri from search request
-                    searchResults = get_search_results(
-                        spotify_client=client,
-                        limit=limit,
-                        artistName=artistName,
-                        country=country,
-                        albumName=albumName,
-                        playlistName=playlistName,
-                        trackName=trackName,
-                        showName=showName,
-                        episodeName=episodeName,
-                        audiobookName=audiobookName,
-                        genreName=genreName,
+                with metrics.measure("start_playback"):
+                    spotcast_controller.play(
+                        client,
+                        spotify_device_id,
+                        uri,
+                        random_song,
+                        position,
+                        ignore_fully_played,
+                        start_position,
                     )
-                    # play the first track
-                    if len(searchResults) > 0:
-                        uri = searchResults[0]["uri"]
-
-                spotcast_controller.play(
-                    client,
-                    spotify_device_id,
-                    uri,
-                    random_song,
-                    position,
-                    ignore_fully_played,
-                    start_position,
-                )
 
                 if len(searchResults) > 1:
-                    add_tracks_to_queue(client, searchResults[1:])
+                    with metrics.measure("queue"):
+                        add_tracks_to_queue(client, searchResults[1:])
 
-            if start_volume <= 100:
-                _LOGGER.debug("Setting volume to %d", start_volume)
+        if start_volume <= 100:
+            _LOGGER.debug("Setting volume to %d", start_volume)
+            with metrics.measure("sleep"):
                 time.sleep(2)
-                client.volume(volume_percent=start_volume,
-                              device_id=spotify_device_id)
-            if shuffle:
-                _LOGGER.debug("Turning shuffle on")
+            client.volume(volume_percent=start_volume,
+                          device_id=spotify_device_id)
+        if shuffle:
+            _LOGGER.debug("Turning shuffle on")
+            with metrics.measure("sleep"):
                 time.sleep(3)
-                client.shuffle(state=shuffle, device_id=spotify_device_id)
-            if repeat:
-                _LOGGER.debug("Turning repeat on")
+            client.shuffle(state=shuffle, device_id=spotify_device_id)
+        if repeat:
+            _LOGGER.debug("Turning repeat on")
+            with metrics.measure("sleep"):
                 time.sleep(3)
-                client.repeat(state=repeat, device_id=spotify_device_id)
+            client.repeat(state=repeat, device_id=spotify_device_id)
+
+    def start_casting(call: ha_core.ServiceCall):
+        """service called."""
+        spotify_device_id = call.data.get(CONF_SPOTIFY_DEVICE_ID)
+        account = call.data.get(CONF_SPOTIFY_ACCOUNT)
+        device_name = call.data.get(CONF_DEVICE_NAME)
+        entity_id = call.data.get(CONF_ENTITY_ID)
+        device = device_name or entity_id or spotify_device_id
+        labels = stage_labels(account, device)
+        trace = start_trace(
+            call.context.id,
+            "spotcast.start",
+            trace_exporter,
+            account=account,
+            device=device,
+        )
+
+        try:  # yes this is ugly, quick fix while working on V4
+
+            with trace, labels, metrics.measure(STAGE_TOTAL):
+                client = spotcast_controller.get_spotify_client(account)
+
+                content = None
+                if has_content(call.data):
+                    with span("resolve_content"):
+                        content = resolve_content(call.data, client)
+                    if content is None:
+                        return
+
+                # verify spotify id given in config or get one
+                if not spotify_device_id:
+                    spotify_device_id = spotcast_controller.get_spotify_device_id(
+                        account, spotify_device_id, device_name, entity_id
+                    )
+
+                start_playback(call.data, client, spotify_device_id, content)
+
+        except Exception as exc:
+            if DEBUG:
+                raise exc
+
+            raise HomeAssistantError(exc) from exc
+
+    def start_target(
+        call: ha_core.ServiceCall,
+        client: spotipy.Spotify,
+        content: tuple[SpotifyURI, list] | None,
+        device_name: str | None,
+        entity_id: str | None,
+    ) -> dict:
+        """Launch, register and start playback on one device of a
+        spotcast.start_multi call. Errors are reported, not raised."""
+        data = call.data
+        account = data.get(CONF_SPOTIFY_ACCOUNT)
+        result = {"target": entity_id or device_name}
+        started = time.monotonic()
+        trace = start_trace(
+            call.context.id,
+            "spotcast.start_multi",
+            trace_exporter,
+            account=account,
+            device=result["target"],
+        )
+
+        with trace, stage_labels(account, result["target"]):
+            try:
+                with metrics.measure(STAGE_TOTAL):
+                    spotify_device_id = spotcast_controller.get_spotify_device_id(
+                        account, None, device_name, entity_id
+                    )
+                    result["spotify_device_id"] = spotify_device_id
+                    start_playback(data, client, spotify_device_id, content)
+            except Exception as exc:  # pylint: disable=broad-except
+                _LOGGER.error("Failed to start %s: %s", result["target"], exc)
+                result["error"] = str(exc)
+
+        result["latency"] = round(time.monotonic() - started, 3)
+        return result
+
+    def prepare_multi(
+        call: ha_core.ServiceCall,
+    ) -> tuple[spotipy.Spotify, tuple | None]:
+        """Get the client and resolve the content once for all the
+        devices of a spotcast.start_multi call."""
+        data = call.data
+        account = data.get(CONF_SPOTIFY_ACCOUNT)
+
+        with start_trace(
+            call.context.id,
+            "spotcast.start_multi.prepare",
+            trace_exporter,
+            account=account,
+        ), stage_labels(account, None):
+            client = spotcast_controller.get_spotify_client(account)
+
+            content = None
+            if has_content(data):
+                with span("resolve_content"):
+                    content = resolve_content(data, client)
+                if content is None:
+                    raise HomeAssistantError("Could not resolve content to play")
+
+        return client, content
+
+    def device_key(
+        device_name: str | None,
+        entity_id: str | None,
+        spotify_device_id: str | None = None,
+    ) -> str | None:
+        """Key of the execution lane of a target device. Entities are
+        keyed by their friendly name so calls made by name or by entity
+        share the same lane."""
+        if entity_id is not None and (state := hass.states.get(entity_id)):
+            device_name = state.attributes.get("friendly_name", device_name)
+
+        if not is_empty_str(device_name):
+            return device_name.strip().lower()
+
+        return spotify_device_id
+
+    def content_key(data: dict) -> tuple:
+        """Normalized content of a service call, used to detect
+        duplicate calls. Names are compared regardless of casing."""
+        content = []
+
+        for key, value in sorted(data.items()):
+            if key in (CONF_DEVICE_NAME, CONF_ENTITY_ID, CONF_SPOTIFY_DEVICE_ID):
+                continue
+
+            if key == CONF_SPOTIFY_URI and isinstance(value, str):
+                # web urls and uris of the same content are the same
+                try:
+                    value = parse_uri(value)
+                except ValueError:
+                    value = value.strip()
+            elif isinstance(value, str):
+                value = value.strip().casefold()
+
+            content.append((key, value))
+
+        return tuple(content)
+
+    async def async_start_casting(call: ha_core.ServiceCall):
+        """service called. Runs in the lane of its target device, unless
+        an identical call is already in flight."""
+        account = call.data.get(CONF_SPOTIFY_ACCOUNT)
+        key = device_key(
+            call.data.get(CONF_DEVICE_NAME),
+            call.data.get(CONF_ENTITY_ID),
+            call.data.get(CONF_SPOTIFY_DEVICE_ID),
+        )
+
+        async def async_run():
+            async with lanes.lane(account, key):
+                await hass.async_add_executor_job(start_casting, call)
+
+        await coalescer.run(
+            (account or "default", key, content_key(call.data)), async_run
+        )
+
+    async def async_start_casting_multi(call: ha_core.ServiceCall) -> dict:
+        """service called. Starts the same content on several devices,
+        each device being launched and registered in parallel."""
+        account = call.data.get(CONF_SPOTIFY_ACCOUNT)
+        targets = [
+            (None, entity_id) for entity_id in call.data.get(CONF_ENTITY_ID, [])
+        ] + [
+            (device_name, None)
+            for device_name in call.data.get(CONF_DEVICE_NAME, [])
+        ]
+
+        try:
+            # content is resolved once for all devices
+            client, content = await hass.async_add_executor_job(
+                prepare_multi, call
+            )
+        except Exception as exc:
+            if DEBUG:
+                raise exc
+
+            raise HomeAssistantError(exc) from exc
+
+        async def async_start_target(device_name, entity_id) -> dict:
+            async with lanes.lane(account, device_key(device_name, entity_id)):
+                return await hass.loop.run_in_executor(
+                    fanout_executor,
+                    start_target,
+                    call,
+                    client,
+                    content,
+                    device_name,
+                    entity_id,
+                )
+
+        results = await asyncio.gather(
+            *(async_start_target(*target) for target in targets)
+        )
+
+        for result in results:
+            _LOGGER.debug(
+                "Started %s in %ss (error: %s)",
+                result["target"],
+                result["latency"],
+                result.get("error"),
+            )
+
+        return {"devices": list(results)}
+
+    def refresh_intent(intent: Intent) -> None:
+        """Resolve the content of an intent and look its device up in the
+        Spotify Connect devices. The app is only launched when the intent
+        is played."""
+        data = intent.data
+        account = data.get(CONF_SPOTIFY_ACCOUNT)
+        device_name = data.get(CONF_DEVICE_NAME)
+        entity_id = data.get(CONF_ENTITY_ID)
+        spotify_device_id = data.get(CONF_SPOTIFY_DEVICE_ID)
+
+        try:
+            client = spotcast_controller.get_spotify_client(account)
+
+            content = None
+            if has_content(data):
+                content = resolve_content(data, client)
+                if content is None:
+                    raise HomeAssistantError("Could not resolve content to play")
+
+            if spotify_device_id is None:
+                if entity_id is not None and (state := hass.states.get(entity_id)):
+                    device_name = state.attributes.get("friendly_name", device_name)
+
+                user_id = spotcast_controller.get_profile(account, client)["id"]
+                spotify_device_id, _ = spotcast_controller.find_spotify_device_id(
+                    user_id, device_name, []
+                )
+        except Exception as exc:  # pylint: disable=broad-except
+            _LOGGER.warning("Could not resolve intent %s: %s", intent.name, exc)
+            intent.last_error = str(exc)
+            return
+
+        intent.update(content, spotify_device_id)
+        _LOGGER.debug("Resolved intent %s: %s", intent.name, intent.as_dict())
+
+    def play_intent(call: ha_core.ServiceCall, intent: Intent):
+        """service called. Starts the content of an intent on its device
+        as last resolved. The device is launched only if Spotify does not
+        know it anymore."""
+        from spotipy import SpotifyException
+
+        data = intent.data
+        account = data.get(CONF_SPOTIFY_ACCOUNT)
+        device_name = data.get(CONF_DEVICE_NAME)
+        entity_id = data.get(CONF_ENTITY_ID)
+        trace = start_trace(
+            call.context.id,
+            "spotcast.play_intent",
+            trace_exporter,
+            account=account,
+            device=intent.name,
+        )
+
+        try:
+            with trace, stage_labels(account, intent.name), metrics.measure(
+                STAGE_TOTAL
+            ):
+                if not intent.resolved:
+                    with span("refresh_intent"):
+                        refresh_intent(intent)
+
+                content, spotify_device_id = intent.resolution
+                client = spotcast_controller.get_spotify_client(account)
+
+                if spotify_device_id is not None:
+                    try:
+                        start_playback(data, client, spotify_device_id, content)
+                        return
+                    except SpotifyException as exc:
+                        # a configured device id is used as is
+                        if exc.http_status != 404 or CONF_SPOTIFY_DEVICE_ID in data:
+                            raise
+                        _LOGGER.debug(
+                            "Device of intent %s is not available, launching it",
+                            intent.name,
+                        )
+
+                spotify_device_id = spotcast_controller.get_spotify_device_id(
+                    account, spotify_device_id, device_name, entity_id
+                )
+                intent.update_device(spotify_device_id)
+                start_playback(data, client, spotify_device_id, content)
 
         except Exception as exc:
             if DEBUG:
@@ -379,6 +960,25 @@ def setup(hass: ha_core.HomeAssistant, config: collections.OrderedDict) -> bool:
 
             raise HomeAssistantError(exc) from exc
 
+    async def async_play_intent(call: ha_core.ServiceCall):
+        """service called. Runs in the lane of the device of the intent,
+        unless the same intent is already being played."""
+        intent = intents.get_intent(call.data[CONF_INTENT])
+        account = intent.data.get(CONF_SPOTIFY_ACCOUNT)
+        key = device_key(
+            intent.data.get(CONF_DEVICE_NAME),
+            intent.data.get(CONF_ENTITY_ID),
+            intent.data.get(CONF_SPOTIFY_DEVICE_ID),
+        )
+
+        async def async_run():
+            async with lanes.lane(account, key):
+                await hass.async_add_executor_job(play_intent, call, intent)
+
+        await coalescer.run(
+            (account or "default", key, (CONF_INTENT, intent.name)), async_run
+        )
+
     # Register websocket and service
     websocket_api.async_register_command(
         hass=hass,
@@ -399,6 +999,27 @@ def setup(hass: ha_core.HomeAssistant, config: collections.OrderedDict) -> bool:
         schema=SCHEMA_WS_PLAYER,
     )
 
+    websocket_api.async_register_command(
+        hass=hass,
+        command_or_handler=WS_TYPE_SPOTCAST_STATS,
+        handler=websocket_handle_stats,
+        schema=SCHEMA_WS_STATS,
+    )
+
+    websocket_api.async_register_command(
+        hass=hass,
+        command_or_handler=WS_TYPE_SPOTCAST_BATCH,
+        handler=websocket_handle_batch,
+        schema=SCHEMA_WS_BATCH,
+    )
+
+    websocket_api.async_register_command(
+        hass=hass,
+        command_or_handler=WS_TYPE_SPOTCAST_PLAYER_SUBSCRIBE,
+        handler=websocket_handle_player_subscribe,
+        schema=SCHEMA_WS_PLAYER_SUBSCRIBE,
+    )
+
     websocket_api.async_register_command(
         hass=hass,
         command_or_handler=WS_TYPE_SPOTCAST_ACCOUNTS,
@@ -413,11 +1034,104 @@ def setup(hass: ha_core.HomeAssistant, config: collections.OrderedDict) -> bool:
         schema=SCHEMA_WS_CASTDEVICES,
     )
 
-    hass.services.register(
+    hass.services.async_register(
         domain=DOMAIN,
         service="start",
-        service_func=start_casting,
+        service_func=async_start_casting,
         schema=SERVICE_START_COMMAND_SCHEMA,
     )
 
+    hass.services.async_register(
+        domain=DOMAIN,
+        service="start_multi",
+        service_func=async_start_casting_multi,
+        schema=SERVICE_START_MULTI_COMMAND_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    hass.services.async_register(
+        domain=DOMAIN,
+        service="play_intent",
+        service_func=async_play_intent,
+        schema=SERVICE_PLAY_INTENT_SCHEMA,
+    )
+
+    async def async_initialize() -> None:
+        await hass.async_add_import_executor_job(import_cast_modules)
+        await hass.async_add_executor_job(spotcast_controller.initialize_tokens)
+
+    hass.async_create_background_task(async_initialize(), "spotcast initialize")
+
+    async def async_warm_up() -> None:
+        """Get every account ready for its first cast, on a few threads
+        of its own to leave the shared executor to Home Assistant"""
+        started = time.monotonic()
+        executor = ThreadPoolExecutor(
+            max_workers=WARM_UP_MAX_WORKERS, thread_name_prefix="spotcast_warm_up"
+        )
+
+        try:
+            await asyncio.gather(
+                *(
+                    hass.loop.run_in_executor(
+                        executor, spotcast_controller.warm_up_account, account
+                    )
+                    for account in spotcast_controller.accounts
+                )
+            )
+        finally:
+            executor.shutdown(wait=False)
+
+        _LOGGER.debug("Warmed up in %.3fs", time.monotonic() - started)
+
+    @callback
+    def start_warm_up(_hass: ha_core.HomeAssistant) -> None:
+        hass.async_create_background_task(async_warm_up(), "spotcast warm up")
+
+    if conf[CONF_WARM_UP]:
+        async_at_started(hass, start_warm_up)
+
+    async def async_refresh_intent(intent: Intent) -> None:
+        await hass.async_add_executor_job(refresh_intent, intent)
+
+    @callback
+    def schedule_refresh(intent: Intent) -> None:
+        hass.async_create_background_task(
+            async_refresh_intent(intent), f"spotcast refresh intent {intent.name}"
+        )
+
+    @callback
+    def start_intents(_hass: ha_core.HomeAssistant) -> None:
+        """Resolve the intents once Home Assistant is started, then on
+        their refresh interval and when the name of their entity changes"""
+        for intent in intents.values():
+            schedule_refresh(intent)
+
+            @callback
+            def refresh_due(_now, intent=intent) -> None:
+                schedule_refresh(intent)
+
+            async_track_time_interval(
+                hass, refresh_due, intent.data[CONF_REFRESH_INTERVAL]
+            )
+
+            if (entity_id := intent.data.get(CONF_ENTITY_ID)) is None:
+                continue
+
+            @callback
+            def entity_changed(event: ha_core.Event, intent=intent) -> None:
+                old_state = event.data["old_state"]
+                new_state = event.data["new_state"]
+                if new_state is None:
+                    return
+                if old_state is None or old_state.attributes.get(
+                    "friendly_name"
+                ) != new_state.attributes.get("friendly_name"):
+                    schedule_refresh(intent)
+
+            async_track_state_change_event(hass, entity_id, entity_changed)
+
+    if intents:
+        async_at_started(hass, start_intents)
+
     return True
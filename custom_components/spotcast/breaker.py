@@ -0,0 +1,238 @@
+"""Circuit breakers of the Spotify endpoints used to start a cast.
+
+When the cookies of an account expire or spclient is degraded, every
+cast would otherwise wait for the failing request. After a few
+consecutive failures the breaker of the endpoint opens and calls fail
+fast until a single probe call is let through on schedule.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, ContextManager, Iterator
+
+from .const import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_MAX_RESET_TIMEOUT_SECS,
+    BREAKER_RESET_TIMEOUT_SECS,
+)
+from .error import CircuitOpenError
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_HALF_OPEN = "half_open"
+STATE_OPEN = "open"
+STATES = [STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN]
+
+ENDPOINT_TOKEN = "token"
+ENDPOINT_DEVICE_AUTH = "device_auth"
+
+
+def guard(breaker: CircuitBreaker | None) -> ContextManager:
+    """Guard a call to an endpoint if it has a breaker"""
+    if breaker is None:
+        return nullcontext()
+
+    return breaker.guard()
+
+
+class CircuitBreaker:
+    """Breaker of one endpoint for one account. Safe to use from any
+    thread."""
+
+    def __init__(
+        self,
+        account: str,
+        endpoint: str,
+        on_change: Callable[[str, str], None] | None = None,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_TIMEOUT_SECS,
+        max_reset_timeout: float = BREAKER_MAX_RESET_TIMEOUT_SECS,
+    ) -> None:
+        self.account = account
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.retry_at: float | None = None
+        self.last_error: str | None = None
+        self._timeout = reset_timeout
+        self._on_change = on_change
+        self._lock = threading.Lock()
+
+    def check(self) -> None:
+        """Raise CircuitOpenError if calls are suspended, without taking
+        the probe call. Used to fail fast before costly preparations."""
+        with self._lock:
+            if self.state == STATE_OPEN and time.time() < self.retry_at:
+                raise self._open_error()
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Run the call if the breaker lets it through and record its
+        outcome. Only one call at a time probes a half open breaker."""
+        self._before_call()
+
+        try:
+            yield
+        except BaseException as exc:
+            self._record_failure(exc)
+            raise
+
+        self._record_success()
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "retry_in": (
+                    max(round(self.retry_at - time.time()), 0)
+                    if self.state == STATE_OPEN
+                    else None
+                ),
+                "last_error": self.last_error,
+            }
+
+    def _before_call(self) -> None:
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return
+
+            if self.state == STATE_OPEN and time.time() >= self.retry_at:
+                self.state = STATE_HALF_OPEN
+            else:
+                raise self._open_error()
+
+        _LOGGER.info(
+            "Probing %s of account %s after %d failures",
+            self.endpoint,
+            self.account,
+            self.failures,
+        )
+        self._changed()
+
+    def _record_success(self) -> None:
+        with self._lock:
+            if self.state == STATE_CLOSED and self.failures == 0:
+                return
+
+            recovered = self.state != STATE_CLOSED
+            self.state = STATE_CLOSED
+            self.failures = 0
+            self.retry_at = None
+            self._timeout = self.reset_timeout
+
+        if recovered:
+            _LOGGER.info("%s of account %s recovered", self.endpoint, self.account)
+
+        self._changed()
+
+    def _record_failure(self, exc: BaseException) -> None:
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(exc) or type(exc).__name__
+
+            if self.state == STATE_HALF_OPEN:
+                self._timeout = min(self._timeout * 2, self.max_reset_timeout)
+                opened = True
+            else:
+                opened = (
+                    self.state == STATE_CLOSED
+                    and self.failures >= self.failure_threshold
+                )
+
+            if opened:
+                self.state = STATE_OPEN
+                self.retry_at = time.time() + self._timeout
+
+        if opened:
+            _LOGGER.warning(
+                "Suspending %s requests of account %s for %ds after %d "
+                "failures: %s",
+                self.endpoint,
+                self.account,
+                self._timeout,
+                self.failures,
+                self.last_error,
+            )
+
+        self._changed()
+
+    def _open_error(self) -> CircuitOpenError:
+        if self.state == STATE_HALF_OPEN:
+            return CircuitOpenError(
+                f"Spotify {self.endpoint} of account {self.account} is being "
+                "probed after repeated failures, try again later"
+            )
+
+        return CircuitOpenError(
+            f"Spotify {self.endpoint} requests of account {self.account} are "
+            f"suspended after {self.failures} failures ({self.last_error}), "
+            f"next attempt in {max(round(self.retry_at - time.time()), 0)}s"
+        )
+
+    def _changed(self) -> None:
+        if self._on_change is not None:
+            self._on_change(self.account, self.endpoint)
+
+
+class CircuitBreakers:
+    """Breakers of every endpoint of every account"""
+
+    def __init__(self) -> None:
+        self._breakers: dict[tuple[str, str], CircuitBreaker] = {}
+        self._listeners: list[Callable[[str, str], None]] = []
+        self._lock = threading.Lock()
+
+    def get(self, account: str | None, endpoint: str) -> CircuitBreaker:
+        key = (account or "default", endpoint)
+
+        with self._lock:
+            if key not in self._breakers:
+                self._breakers[key] = CircuitBreaker(*key, on_change=self._notify)
+
+            return self._breakers[key]
+
+    def add_listener(self, listener: Callable[[str, str], None]) -> Callable:
+        """Call `listener(account, endpoint)` after each change of state.
+        Returns a callable removing the listener"""
+        with self._lock:
+            self._listeners.append(listener)
+
+        def remove() -> None:
+            with self._lock:
+                self._listeners.remove(listener)
+
+        return remove
+
+    def account_summary(self, account: str) -> dict:
+        """State of the breakers of an account, per endpoint"""
+        with self._lock:
+            breakers = [
+                breaker
+                for (key, _), breaker in self._breakers.items()
+                if key == account
+            ]
+
+        return {breaker.endpoint: breaker.as_dict() for breaker in breakers}
+
+    def account_state(self, account: str) -> str:
+        """Worst state among the breakers of an account"""
+        states = [
+            summary["state"] for summary in self.account_summary(account).values()
+        ]
+        return max(states, key=STATES.index, default=STATE_CLOSED)
+
+    def _notify(self, account: str, endpoint: str) -> None:
+        with self._lock:
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            listener(account, endpoint)
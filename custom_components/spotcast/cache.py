@@ -0,0 +1,266 @@
+"""Caches shared by the spotcast handlers"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Any, Awaitable, Callable, Hashable
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate number of bytes held by a value and everything it
+    references. Objects referenced several times are counted once."""
+    seen: set[int] = set()
+    stack = [value]
+    size = 0
+
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+
+        if isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        else:
+            if hasattr(obj, "__dict__"):
+                stack.append(vars(obj))
+            for klass in type(obj).__mro__:
+                for slot in getattr(klass, "__slots__", ()):
+                    if hasattr(obj, slot):
+                        stack.append(getattr(obj, slot))
+
+    return size
+
+
+class BoundedCache:
+    """Cache of values kept up to `ttl` seconds, None to keep them until
+    evicted. Once the entries take more than `limit` bytes, the least
+    recently used ones are evicted. A value larger than the limit is not
+    cached at all. Safe to use from several threads.
+    """
+
+    def __init__(self, ttl: float | None, limit: int | None = None) -> None:
+        self.ttl = ttl
+        self.limit = limit
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(
+        self, key: Hashable, max_age: float | None = None
+    ) -> tuple[bool, Any]:
+        """Return whether a fresh value is cached for the key, and the
+        value. A value older than `max_age` seconds, when shorter than
+        the ttl of the cache, is not fresh."""
+        if self.ttl is not None:
+            max_age = self.ttl if max_age is None else min(max_age, self.ttl)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            stored_at, value, size = entry
+            age = time.monotonic() - stored_at
+
+            if self.ttl is not None and age >= self.ttl:
+                self._remove(key)
+                self.misses += 1
+                return False, None
+
+            if max_age is not None and age >= max_age:
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def store(self, key: Hashable, value: Any, size: int | None = None) -> None:
+        """Cache a value, then evict the least recently used values
+        until the cache fits its limit. The size of the value is
+        estimated unless given."""
+        if size is None:
+            size = estimate_size(value)
+
+        with self._lock:
+            self._remove(key)
+
+            if self.limit is not None and size > self.limit:
+                self.evictions += 1
+                _LOGGER.warning(
+                    "Not caching %s, its %d bytes exceed the %d bytes of its "
+                    "cache, consider raising cache_budget",
+                    key,
+                    size,
+                    self.limit,
+                )
+                return
+
+            self._entries[key] = (time.monotonic(), value, size)
+            self.size += size
+            self._shrink()
+
+    def invalidate(self, key: Hashable | None = None) -> None:
+        """Drop a cached value, or all of them if no key is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self.size = 0
+            else:
+                self._remove(key)
+
+    def set_limit(self, limit: int | None) -> None:
+        with self._lock:
+            self.limit = limit
+            self._shrink()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "size": self.size,
+            "limit": self.limit,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        if (entry := self._entries.pop(key, None)) is not None:
+            self.size -= entry[2]
+
+    def _shrink(self) -> None:
+        now = time.monotonic()
+        # expired values go first, then the least recently used ones
+        if self.ttl is not None:
+            for key in [
+                key
+                for key, (stored_at, _, _) in self._entries.items()
+                if now - stored_at >= self.ttl
+            ]:
+                self._remove(key)
+
+        if self.limit is None:
+            return
+
+        while self.size > self.limit and self._entries:
+            _, (_, _, size) = self._entries.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+
+
+class ResponseCache(BoundedCache):
+    """Short lived cache of upstream responses.
+
+    A response is reused for `ttl` seconds. While a response is being
+    fetched, identical requests wait for the same upstream call instead
+    of starting their own. With an `executor`, the size of the responses
+    is estimated on it rather than on the event loop.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        limit: int | None = None,
+        executor: Executor | None = None,
+    ) -> None:
+        super().__init__(ttl, limit)
+        self.executor = executor
+        self._pending: dict[Hashable, asyncio.Future] = {}
+
+    async def get(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        max_age: float | None = None,
+    ) -> Any:
+        """Return the cached response for the key, or fetch it. A
+        response older than `max_age` seconds, when shorter than the ttl
+        of the cache, is not reused."""
+        found, value = self.lookup(key, max_age)
+
+        if found:
+            _LOGGER.debug("Using cached response for %s", key)
+            return value
+
+        if (future := self._pending.get(key)) is None:
+            future = asyncio.ensure_future(self._fetch(key, fetch))
+            self._pending[key] = future
+        else:
+            _LOGGER.debug("Waiting on in flight request for %s", key)
+
+        return await asyncio.shield(future)
+
+    async def _fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        try:
+            value = await fetch()
+
+            if self.executor is None:
+                size = estimate_size(value)
+            else:
+                size = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, estimate_size, value
+                )
+
+            self.store(key, value, size)
+        finally:
+            del self._pending[key]
+
+        return value
+
+
+class CacheRegistry:
+    """The caches of the integration, sharing a memory budget. Each cache
+    may hold its weight's share of the budget, in bytes."""
+
+    def __init__(self, budget: int) -> None:
+        self.budget = budget
+        self._caches: dict[str, tuple[BoundedCache, float]] = {}
+
+    def register(self, name: str, cache: BoundedCache, weight: float = 1) -> BoundedCache:
+        self._caches[name] = (cache, weight)
+        self._allocate()
+        return cache
+
+    def set_budget(self, budget: int) -> None:
+        self.budget = budget
+        self._allocate()
+
+    def _allocate(self) -> None:
+        total = sum(weight for _, weight in self._caches.values())
+        for cache, weight in self._caches.values():
+            cache.set_limit(int(self.budget * weight / total))
+
+    def stats(self) -> dict:
+        caches = {name: cache.stats() for name, (cache, _) in self._caches.items()}
+        return {
+            "budget": self.budget,
+            "size": sum(stats["size"] for stats in caches.values()),
+            "caches": caches,
+        }
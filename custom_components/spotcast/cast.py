@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import logging
+from typing import TYPE_CHECKING
 
 import homeassistant.core as ha_core
 from homeassistant.components import spotify as ha_spotify
 from homeassistant.components.media_player import BrowseMedia
-from pychromecast import Chromecast
+
+if TYPE_CHECKING:
+    from pychromecast import Chromecast
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from datetime import timedelta
+
 import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
 from homeassistant.components import websocket_api
@@ -7,6 +9,11 @@ from homeassistant.const import CONF_ENTITY_ID, CONF_OFFSET, CONF_REPEAT
 
 APP_SPOTIFY = "CC32E753"
 
+TOKEN_URL = (
+    "https://open.spotify.com/get_access_token?reason=transport&productType=web_player"
+)
+DEVICE_AUTH_URL = "https://spclient.wg.spotify.com/device-auth/v1/refresh"
+
 DOMAIN = "spotcast"
 
 CONF_SPOTIFY_DEVICE_ID = "spotify_device_id"
@@ -33,6 +40,82 @@ CONF_SP_DC = "sp_dc"
 CONF_SP_KEY = "sp_key"
 CONF_START_VOL = "start_volume"
 CONF_IGNORE_FULLY_PLAYED = "ignore_fully_played"
+CONF_ACCOUNT_CONCURRENCY = "account_concurrency"
+CONF_COALESCE_WINDOW = "coalesce_window"
+CONF_COMPACT_ATTRIBUTES = "compact_attributes"
+CONF_TRACE_FILE = "trace_file"
+CONF_WARM_UP = "warm_up"
+CONF_INTENTS = "intents"
+CONF_INTENT = "intent"
+CONF_REFRESH_INTERVAL = "refresh_interval"
+CONF_CACHE_BUDGET = "cache_budget"
+
+# minimum score for a fuzzy match to be used in place of an exact name
+FUZZY_MATCH_THRESHOLD = 0.75
+# maximum number of devices started in parallel by spotcast.start_multi
+MAX_FANOUT_WORKERS = 8
+# maximum number of service calls running at once for a single account
+DEFAULT_ACCOUNT_CONCURRENCY = 8
+# identical spotcast.start calls made within this window share one run
+DEFAULT_COALESCE_WINDOW_SECS = 2.0
+
+# number of latest durations kept per stage for the latency metrics
+METRICS_WINDOW = 200
+
+# lifetime of the cached playlist and artist name indexes
+NAME_INDEX_TTL_SECS = 600
+
+# memory shared by the caches, in kilobytes, and the share of each cache.
+# The name indexes of an account with a thousand playlists and as many
+# followed artists take up to 5MB.
+DEFAULT_CACHE_BUDGET_KB = 8192
+CACHE_WEIGHTS = {
+    "responses": 2,
+    "devices": 1,
+    "profiles": 1,
+    "name_indexes": 8,
+}
+
+# number of parsed Spotify URIs kept in memory
+URI_CACHE_SIZE = 1024
+
+# consecutive failures of an endpoint before requests to it are suspended,
+# and delay before a new attempt, doubled each time the attempt fails
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_RESET_TIMEOUT_SECS = 30
+BREAKER_MAX_RESET_TIMEOUT_SECS = 600
+
+# threads dedicated to the websocket handlers and lifetime of their
+# shared responses
+WS_MAX_WORKERS = 4
+WS_CACHE_TTL_SECS = 2
+
+# a token handed to a cast device is renewed first if it expires sooner
+CAST_TOKEN_MIN_VALIDITY_SECS = 600
+
+# Spotify Connect device lists younger than this are reused, except while
+# waiting for a device to register where they must be younger than the
+# poll max age
+SPOTIFY_DEVICES_MAX_AGE_SECS = 5
+SPOTIFY_DEVICES_POLL_MAX_AGE_SECS = 0.2
+
+# polls of the device list after the app launch, in seconds after the
+# launch, until the registration delays of the device are known
+DEFAULT_REGISTRATION_POLLS = (0, 1.0, 2.65, 5.4, 9.9)
+# registration delays kept per cast device, and how many are needed to
+# schedule the polls from them
+REGISTRATION_WINDOW = 20
+REGISTRATION_MIN_SAMPLES = 3
+REGISTRATION_MIN_POLL_INTERVAL_SECS = 0.25
+# polls go on until twice the slowest registration seen, within bounds
+REGISTRATION_MIN_BUDGET_SECS = 3
+REGISTRATION_MAX_BUDGET_SECS = 15
+
+# default time between two resolutions of an intent
+DEFAULT_INTENT_REFRESH_INTERVAL = timedelta(hours=1)
+
+# threads getting the accounts ready after start when warm_up is enabled
+WARM_UP_MAX_WORKERS = 2
 
 WS_TYPE_SPOTCAST_PLAYLISTS = "spotcast/playlists"
 
@@ -44,6 +127,8 @@ SCHEMA_PLAYLISTS = websocket_api.BASE_COMMAND_MESSAGE_SCHEMA.extend(
         vol.Optional("country_code"): str,
         vol.Optional("locale"): str,
         vol.Optional("account"): str,
+        vol.Optional("cursor"): vol.Any(None, vol.All(str, vol.Match(r"^\d+$"))),
+        vol.Optional("stream", default=False): bool,
     }
 )
 
@@ -63,6 +148,19 @@ SCHEMA_WS_PLAYER = websocket_api.BASE_COMMAND_MESSAGE_SCHEMA.extend(
     }
 )
 
+WS_TYPE_SPOTCAST_PLAYER_SUBSCRIBE = "spotcast/player/subscribe"
+SCHEMA_WS_PLAYER_SUBSCRIBE = websocket_api.BASE_COMMAND_MESSAGE_SCHEMA.extend(
+    {
+        vol.Required("type"): WS_TYPE_SPOTCAST_PLAYER_SUBSCRIBE,
+        vol.Optional("account"): str,
+    }
+)
+
+# polling intervals of the player subscriptions
+PLAYER_ACTIVE_INTERVAL_SECS = 10
+PLAYER_IDLE_INTERVAL_SECS = 30
+PLAYER_MIN_INTERVAL_SECS = 1
+
 WS_TYPE_SPOTCAST_ACCOUNTS = "spotcast/accounts"
 SCHEMA_WS_ACCOUNTS = websocket_api.BASE_COMMAND_MESSAGE_SCHEMA.extend(
     {
@@ -77,6 +175,37 @@ SCHEMA_WS_CASTDEVICES = websocket_api.BASE_COMMAND_MESSAGE_SCHEMA.extend(
     }
 )
 
+WS_TYPE_SPOTCAST_STATS = "spotcast/stats"
+SCHEMA_WS_STATS = websocket_api.BASE_COMMAND_MESSAGE_SCHEMA.extend(
+    {
+        vol.Required("type"): WS_TYPE_SPOTCAST_STATS,
+    }
+)
+
+WS_TYPE_SPOTCAST_BATCH = "spotcast/batch"
+SCHEMA_WS_BATCH = websocket_api.BASE_COMMAND_MESSAGE_SCHEMA.extend(
+    {
+        vol.Required("type"): WS_TYPE_SPOTCAST_BATCH,
+        vol.Required("requests"): [
+            vol.Schema(
+                {
+                    vol.Required("type"): vol.In(
+                        [
+                            WS_TYPE_SPOTCAST_PLAYLISTS,
+                            WS_TYPE_SPOTCAST_DEVICES,
+                            WS_TYPE_SPOTCAST_PLAYER,
+                            WS_TYPE_SPOTCAST_ACCOUNTS,
+                            WS_TYPE_SPOTCAST_CASTDEVICES,
+                            WS_TYPE_SPOTCAST_STATS,
+                        ]
+                    )
+                },
+                extra=vol.ALLOW_EXTRA,
+            )
+        ],
+    }
+)
+
 SERVICE_START_COMMAND_SCHEMA = vol.Schema(
     {
         vol.Optional(CONF_DEVICE_NAME): cv.string,
@@ -106,6 +235,34 @@ SERVICE_START_COMMAND_SCHEMA = vol.Schema(
     }
 )
 
+SERVICE_START_MULTI_COMMAND_SCHEMA = vol.All(
+    SERVICE_START_COMMAND_SCHEMA.extend(
+        {
+            vol.Optional(CONF_DEVICE_NAME): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(CONF_ENTITY_ID): cv.entity_ids,
+            vol.Remove(CONF_SPOTIFY_DEVICE_ID): cv.string,
+        }
+    ),
+    cv.has_at_least_one_key(CONF_DEVICE_NAME, CONF_ENTITY_ID),
+)
+
+SERVICE_PLAY_INTENT_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_INTENT): cv.slug,
+    }
+)
+
+INTENT_SCHEMA = vol.All(
+    SERVICE_START_COMMAND_SCHEMA.extend(
+        {
+            vol.Optional(
+                CONF_REFRESH_INTERVAL, default=DEFAULT_INTENT_REFRESH_INTERVAL
+            ): cv.positive_time_period,
+        }
+    ),
+    cv.has_at_least_one_key(CONF_DEVICE_NAME, CONF_ENTITY_ID, CONF_SPOTIFY_DEVICE_ID),
+)
+
 ACCOUNTS_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_SP_DC): cv.string,
@@ -121,6 +278,18 @@ SPOTCAST_CONFIG_SCHEMA = vol.Schema(
                 vol.Required(CONF_SP_KEY): cv.string,
                 vol.Optional(CONF_ACCOUNTS): cv.schema_with_slug_keys(ACCOUNTS_SCHEMA),
                 vol.Optional(CONF_SPOTIFY_COUNTRY): cv.string,
+                vol.Optional(
+                    CONF_ACCOUNT_CONCURRENCY, default=DEFAULT_ACCOUNT_CONCURRENCY
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                vol.Optional(
+                    CONF_COALESCE_WINDOW, default=DEFAULT_COALESCE_WINDOW_SECS
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(CONF_TRACE_FILE): cv.string,
+                vol.Optional(CONF_WARM_UP, default=False): cv.boolean,
+                vol.Optional(CONF_INTENTS): cv.schema_with_slug_keys(INTENT_SCHEMA),
+                vol.Optional(
+                    CONF_CACHE_BUDGET, default=DEFAULT_CACHE_BUDGET_KB
+                ): cv.positive_int,
             }
         ),
     },
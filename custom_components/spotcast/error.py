@@ -1,5 +1,13 @@
+from homeassistant.exceptions import HomeAssistantError
+
+
 class LaunchError(Exception):
     """When an app fails to launch."""
 
+
 class TokenError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+
+class CircuitOpenError(HomeAssistantError):
+    """When requests to a failing endpoint are suspended."""
@@ -0,0 +1,152 @@
+"""Fuzzy name resolution backed by a precomputed trigram index"""
+
+from __future__ import annotations
+
+import difflib
+import logging
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Any, Iterable, NamedTuple
+
+_LOGGER = logging.getLogger(__name__)
+
+# number of trigram candidates kept for the more expensive difflib
+# ranking, per requested result
+_SHORTLIST_FACTOR = 4
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+class FuzzyMatch(NamedTuple):
+    """A candidate returned by the trigram index with its score"""
+
+    name: str
+    value: Any
+    score: float
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a name for comparison. Strips accents, casing and
+    punctuation so "Café  Del-Mar" and "cafe del mar" compare equal.
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", stripped.lower()).strip()
+
+
+def trigrams(normalized: str) -> frozenset[str]:
+    """Return the set of trigrams of an already normalized string"""
+    padded = f"  {normalized} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class TrigramIndex:
+    """Ranks candidate names against a query.
+
+    The trigram sets and the inverted index are computed once when the
+    index is built, so a lookup only touches candidates sharing at
+    least one trigram with the query. The shortlist is then reranked
+    with difflib to favour candidates with the right character order.
+    """
+
+    def __init__(self, candidates: Iterable[tuple[str, Any]]) -> None:
+        self._entries: list[tuple[str, Any]] = []
+        self._normalized: list[str] = []
+        self._sizes: list[int] = []
+        self._exact: dict[str, int] = {}
+        index: dict[str, list[int]] = defaultdict(list)
+
+        for name, value in candidates:
+            if not name:
+                continue
+
+            normalized = normalize_name(name)
+            grams = trigrams(normalized)
+            position = len(self._entries)
+
+            self._entries.append((name, value))
+            self._normalized.append(normalized)
+            self._sizes.append(len(grams))
+            self._exact.setdefault(normalized, position)
+
+            for gram in grams:
+                index[gram].append(position)
+
+        self._index = {gram: tuple(positions) for gram, positions in index.items()}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 5,
+        min_score: float = 0.0,
+    ) -> list[FuzzyMatch]:
+        """Return up to `limit` candidates ordered by decreasing score.
+
+        Scores are between 0 and 1, 1 being an exact match once
+        normalized.
+        """
+        if not query or not self._entries:
+            return []
+
+        normalized = normalize_name(query)
+
+        if (position := self._exact.get(normalized)) is not None:
+            name, value = self._entries[position]
+            return [FuzzyMatch(name, value, 1.0)]
+
+        grams = trigrams(normalized)
+        shared: dict[int, int] = defaultdict(int)
+
+        for gram in grams:
+            for position in self._index.get(gram, ()):
+                shared[position] += 1
+
+        if not shared:
+            return []
+
+        # Dice coefficient on the trigram sets
+        query_size = len(grams)
+        dice = {
+            position: 2 * count / (query_size + self._sizes[position])
+            for position, count in shared.items()
+        }
+
+        shortlist = sorted(dice, key=dice.get, reverse=True)
+        shortlist = shortlist[:max(limit, 1) * _SHORTLIST_FACTOR]
+
+        matcher = difflib.SequenceMatcher(autojunk=False)
+        matcher.set_seq2(normalized)
+        results = []
+
+        for position in shortlist:
+            matcher.set_seq1(self._normalized[position])
+            score = (dice[position] + matcher.ratio()) / 2
+
+            if score < min_score:
+                continue
+
+            name, value = self._entries[position]
+            results.append(FuzzyMatch(name, value, round(score, 4)))
+
+        results.sort(key=lambda match: match.score, reverse=True)
+        return results[:limit]
+
+    def best(self, query: str, min_score: float) -> FuzzyMatch | None:
+        """Return the best candidate if it scores at least `min_score`"""
+        results = self.search(query, limit=1, min_score=min_score)
+
+        if not results:
+            _LOGGER.debug("No fuzzy match above %s for `%s`", min_score, query)
+            return None
+
+        _LOGGER.debug(
+            "Fuzzy matched `%s` to `%s` (score: %s)",
+            query,
+            results[0].name,
+            results[0].score,
+        )
+        return results[0]
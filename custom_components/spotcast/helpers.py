@@ -2,24 +2,32 @@ from __future__ import annotations
 
 import asyncio
 import logging
-import requests
-import urllib.parse
-import difflib
 import random
 import time
 from functools import partial, wraps
+from typing import TYPE_CHECKING
 
 import homeassistant.core as ha_core
 
-# import for type inference
-import spotipy
-from spotipy import SpotifyException
-from homeassistant.components.cast.media_player import CastDevice
-from homeassistant.components.spotify.media_player import SpotifyMediaPlayer
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import entity_platform
 
+from .cache import ResponseCache
+from .records import (
+    DeviceRecord,
+    ItemRecord,
+    PlaylistRecord,
+    TrackRecord,
+    item_records,
+)
+from .spotify_uri import SpotifyURI, parse_uri
+
+# spotipy and the cast and spotify integrations are imported on first use
+if TYPE_CHECKING:
+    import spotipy
+    from homeassistant.components.spotify.media_player import SpotifyMediaPlayer
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -27,6 +35,8 @@ def get_spotify_media_player(
     hass: ha_core.HomeAssistant, spotify_user_id: str
 ) -> SpotifyMediaPlayer:
     """Get the spotify media player entity from hass."""
+    from homeassistant.components.spotify.media_player import SpotifyMediaPlayer
+
     platforms = entity_platform.async_get_platforms(hass, "spotify")
     spotify_media_player = None
 
@@ -65,20 +75,33 @@ def get_spotify_media_player(
 
 def get_spotify_devices(
         spotify_media_player: SpotifyMediaPlayer,
-        hass: HomeAssistant
+        hass: HomeAssistant,
+        cache: ResponseCache | None = None,
+        max_age: float | None = None,
 ):
+    """Devices known to Spotify Connect. With a cache, a recent enough
+    device list is reused and concurrent refreshes share one request."""
 
     if spotify_media_player:
-        # Need to come from media_player spotify's sp client due to
-        # token issues
-        asyncio.run_coroutine_threadsafe(
-            spotify_media_player.devices.async_refresh(),
-            hass.loop,
-        ).result()
-
-        spotify_devices = spotify_media_player.devices.data
-
-        return spotify_devices
+        coordinator = spotify_media_player.devices
+
+        async def refresh() -> dict[str, list[DeviceRecord]]:
+            # Need to come from media_player spotify's sp client due to
+            # token issues
+            await coordinator.async_refresh()
+            return {
+                "devices": [
+                    DeviceRecord.from_api(device)
+                    for device in (coordinator.data or {}).get("devices") or []
+                ]
+            }
+
+        if cache is None:
+            job = refresh()
+        else:
+            job = cache.get(spotify_media_player.unique_id, refresh, max_age)
+
+        return asyncio.run_coroutine_threadsafe(job, hass.loop).result()
     return []
 
 
@@ -97,6 +120,8 @@ def get_spotify_install_status(hass):
 
 
 def get_cast_devices(hass):
+    from homeassistant.components.cast.media_player import CastDevice
+
     platforms = entity_platform.async_get_platforms(hass, "cast")
     cast_infos = []
     for platform in platforms:
@@ -130,7 +155,16 @@ def get_top_tracks(
     spotify_client: spotipy.Spotify,
     limit: int = 20,
     country: str = None,
-):
+    artistUri: SpotifyURI = None,
+) -> list[TrackRecord]:
+
+    # artist was already resolved from the cached name index
+    if artistUri is not None:
+        _LOGGER.debug("Getting top tracks for the artist: %s", artistUri)
+        return [
+            TrackRecord.from_api(track)
+            for track in spotify_client.artist_top_tracks(str(artistUri))["tracks"]
+        ]
 
     _LOGGER.debug("Searching for top tracks for the artist: %s", artistName)
     searchType = "artist"
@@ -155,11 +189,14 @@ def get_top_tracks(
     except IndexError:
         pass
 
-    results = spotify_client.artist_top_tracks(artistUri)
-    for track in results["tracks"][:10]:
-        _LOGGER.debug("track    : " + track["name"])
+    results = [
+        TrackRecord.from_api(track)
+        for track in spotify_client.artist_top_tracks(artistUri)["tracks"]
+    ]
+    for track in results[:10]:
+        _LOGGER.debug("track    : " + track.name)
 
-    return results["tracks"]
+    return results
 
 
 def get_search_string(
@@ -235,7 +272,8 @@ def get_search_results(
     episodeName: str = None,
     audiobookName: str = None,
     genreName: str = None,
-):
+    artistUri: SpotifyURI = None,
+) -> list[ItemRecord]:
     _LOGGER.debug("using search query to find uri")
     searchResults = []
 
@@ -259,9 +297,11 @@ def get_search_results(
         )
         == 0
     ):
-        searchResults = get_top_tracks(artistName, spotify_client)
+        searchResults = get_top_tracks(
+            artistName, spotify_client, artistUri=artistUri
+        )
         _LOGGER.debug("Playing top tracks for artist: %s",
-                      searchResults[0]["name"])
+                      searchResults[0].name)
         return searchResults
     else:
         searchString = get_search_string(
@@ -293,30 +333,15 @@ def get_search_results(
         )
 
         compiledResults = []
-        if "tracks" in searchResults:
-            for item in searchResults["tracks"]["items"]:
-                compiledResults.append(item)
-        if "albums" in searchResults:
-            for item in searchResults["albums"]["items"]:
-                compiledResults.append(item)
-        if "playlists" in searchResults:
-            for item in searchResults["playlists"]["items"]:
-                compiledResults.append(item)
-        if "shows" in searchResults:
-            for item in searchResults["shows"]["items"]:
-                compiledResults.append(item)
-        if "audiobooks" in searchResults:
-            for item in searchResults["audiobooks"]["items"]:
-                compiledResults.append(item)
-        if "episodes" in searchResults:
-            for item in searchResults["episodes"]["items"]:
-                compiledResults.append(item)
+        for key in ["tracks", "albums", "playlists", "shows", "audiobooks", "episodes"]:
+            if key in searchResults:
+                compiledResults.extend(item_records(searchResults[key]["items"]))
 
         _LOGGER.debug(
             "Found %d results for %s. First Track name: %s",
             len(compiledResults),
             searchString,
-            compiledResults[0]["name"],
+            compiledResults[0].name if compiledResults else None,
         )
 
         return compiledResults
@@ -346,19 +371,27 @@ def search_tracks(
     return results
 
 
+def get_track_uris(results: list[ItemRecord]) -> list[SpotifyURI]:
+    """Uris of the tracks among search results, in order"""
+    return [parse_uri(item.uri) for item in results if item.type == "track"]
+
+
 def add_tracks_to_queue(
-    spotify_client: spotipy.Spotify, tracks: list = [], limit: int = 20
+    spotify_client: spotipy.Spotify, tracks: list[ItemRecord] = [], limit: int = 20
 ):
-    filtered = list(filter(lambda x: isinstance(x, dict) and x.get("type") == "track", tracks))
+    from spotipy import SpotifyException
+
+    filtered = [
+        (track, parse_uri(track.uri)) for track in tracks if track.type == "track"
+    ]
 
     if len(filtered) == 0:
         _LOGGER.debug("Cannot add ZERO tracks to the queue!")
         return
 
-    for track in filtered[:limit]:
+    for track, uri in filtered[:limit]:
         _LOGGER.debug(
-            "Adding " + track["name"] +
-            " to the playback queue | " + track["uri"]
+            "Adding %s to the playback queue | %s", track.name, uri
         )
 
         max_attemps = 5
@@ -368,7 +401,7 @@ def add_tracks_to_queue(
 
         while True:
             try:
-                spotify_client.add_to_queue(track["uri"])
+                spotify_client.add_to_queue(str(uri))
             except SpotifyException as exc:
 
                 if current_attempt >= max_attemps:
@@ -395,6 +428,7 @@ def get_random_playlist_from_category(
     country: str = None,
     limit: int = 20,
 ) -> str:
+    from spotipy import SpotifyException
 
     if country is None:
 
@@ -417,98 +451,30 @@ def get_random_playlist_from_category(
 
     # get list of playlist from category and localisation provided
     try:
-        playlists = spotify_client.category_playlists(
-            category_id=category, country=country, limit=limit
-        )["playlists"]["items"]
-    except spotipy.exceptions.SpotifyException as e:
+        playlists = [
+            PlaylistRecord.from_api(item)
+            for item in spotify_client.category_playlists(
+                category_id=category, country=country, limit=limit
+            )["playlists"]["items"]
+            if item is not None
+        ]
+    except SpotifyException as e:
         _LOGGER.error(e.msg)
         return None
 
+    if not playlists:
+        _LOGGER.error(f"No playlist in category {category}")
+        return None
+
     # choose one at random
     chosen = random.choice(playlists)
 
     _LOGGER.debug(
-        f"Chose playlist {chosen['name']}({chosen['uri']}) from category "
+        f"Chose playlist {chosen.name}({chosen.uri}) from category "
         f"{category}."
     )
 
-    return chosen["uri"]
-
-
-def url_to_spotify_uri(url: str) -> str:
-    """
-    Convert a spotify web url (e.g. https://open.spotify.com/track/XXXX) to
-    a spotify-style URI (spotify:track:XXXX). Returns None on error.
-    """
-
-    o: urllib.parse.ParseResult
-    # will raise ValueError if URL is invalid
-    o = urllib.parse.urlparse(url)
-
-    if o.hostname != "open.spotify.com":
-        raise ValueError(
-            'Spotify URLs must have a hostname of "open.spotify.com"')
-
-    path = o.path.split("/")
-    if len(path) != 3:
-        raise ValueError(
-            'Spotify URLs must be of the form "https://open.spotify.com/<kind>/<target>"')
-
-    return f'spotify:{path[1]}:{path[2]}'
-
-
-def is_valid_uri(uri: str) -> bool:
-
-    # list of possible types
-    types = ["artist", "album", "track", "playlist", "show", "episode"]
-
-    # split the string
-    elems = uri.split(":")
-
-    # validate number of sub elements
-    if elems[1].lower() == "user":
-        elems = elems[0:1] + elems[3:]
-        types = ["playlist"]
-        _LOGGER.debug(
-            "Excluding user information from the Spotify URI validation. Only"
-            " supported for playlists"
-        )
-
-    # support playing a user's liked songs list
-    # (spotify:user:username:collection)
-    if len(elems) == 2 and elems[1].lower() == "collection":
-        return True
-
-    if len(elems) != 3:
-        _LOGGER.error(
-            f"[{uri}] is not a valid URI. The format should be "
-            "[spotify:<type>:<unique_id>]"
-        )
-        return False
-
-    # check correct format of the sub elements
-    if elems[0].lower() != "spotify":
-        _LOGGER.error(
-            f"This is not a valid Spotify URI. This should start with "
-            f"[spotify], but instead starts with [{elems[0]}]"
-        )
-        return False
-
-    if elems[1].lower() not in types:
-        _LOGGER.error(
-            f"{elems[1]} is not a valid type for Spotify request. Please "
-            f"make sure to use the following list {str(types)}"
-        )
-        return False
-
-    if "?" in elems[2]:
-        _LOGGER.warning(
-            f"{elems[2]} contains query character. This should work, but you"
-            " should probably remove it and anything after."
-        )
-
-    # return True if all test passes
-    return True
+    return chosen.uri
 
 
 def is_empty_str(string: str) -> bool:
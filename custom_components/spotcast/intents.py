@@ -0,0 +1,82 @@
+"""Named playbacks of the configuration, resolved ahead of their calls"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from homeassistant.exceptions import HomeAssistantError
+
+from .spotify_uri import SpotifyURI
+
+
+class Intent:
+    """An intent of the configuration, with the content it plays and the
+    Spotify device it plays on as last resolved"""
+
+    def __init__(self, name: str, data: dict) -> None:
+        self.name = name
+        self.data = data
+        self._lock = threading.Lock()
+        self._resolved: tuple[tuple[SpotifyURI, list] | None, str | None] | None = None
+        self._resolved_at: float | None = None
+        self.last_error: str | None = None
+
+    @property
+    def resolved(self) -> bool:
+        return self._resolved is not None
+
+    @property
+    def resolution(self) -> tuple[tuple[SpotifyURI, list] | None, str | None]:
+        """Content and Spotify device id, read together"""
+        if self._resolved is None:
+            raise HomeAssistantError(
+                f"Intent {self.name} is not resolved: {self.last_error}"
+            )
+        return self._resolved
+
+    def update(
+        self,
+        content: tuple[SpotifyURI, list] | None,
+        spotify_device_id: str | None,
+    ) -> None:
+        """Swap in a new resolution. A device that is not registered
+        right now keeps the id it was last seen with."""
+        with self._lock:
+            if spotify_device_id is None and self._resolved is not None:
+                spotify_device_id = self._resolved[1]
+            self._resolved = (content, spotify_device_id)
+            self._resolved_at = time.monotonic()
+            self.last_error = None
+
+    def update_device(self, spotify_device_id: str) -> None:
+        with self._lock:
+            content = self._resolved[0] if self._resolved is not None else None
+            self._resolved = (content, spotify_device_id)
+
+    def as_dict(self) -> dict:
+        content, spotify_device_id = self._resolved or (None, None)
+        return {
+            "uri": str(content[0]) if content is not None else None,
+            "tracks": len(content[1]) if content is not None else 0,
+            "spotify_device_id": spotify_device_id,
+            "age": (
+                round(time.monotonic() - self._resolved_at, 1)
+                if self._resolved_at is not None
+                else None
+            ),
+            "last_error": self.last_error,
+        }
+
+
+class Intents(dict):
+    """Intents of the configuration, by name"""
+
+    def get_intent(self, name: str) -> Intent:
+        try:
+            return self[name]
+        except KeyError:
+            raise HomeAssistantError(f"Unknown intent {name}") from None
+
+    def summary(self) -> dict:
+        return {name: intent.as_dict() for name, intent in self.items()}
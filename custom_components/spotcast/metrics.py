@@ -0,0 +1,195 @@
+"""Latency metrics of the stages of a cast"""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Callable, ContextManager, Iterator
+
+from .const import METRICS_WINDOW
+from .tracing import span
+
+_LOGGER = logging.getLogger(__name__)
+
+# account and device of the service call running in the current thread
+_current_labels: ContextVar[tuple[str | None, str | None]] = ContextVar(
+    "spotcast_stage_labels", default=(None, None)
+)
+
+STAGE_TOTAL = "total"
+
+
+@contextmanager
+def stage_labels(account: str | None, device: str | None) -> Iterator[None]:
+    """Label the stages measured in the current thread with the account
+    and the device of the service call"""
+    token = _current_labels.set((account or "default", device))
+    try:
+        yield
+    finally:
+        _current_labels.reset(token)
+
+
+def current_labels() -> tuple[str | None, str | None]:
+    """Labels of the service call running in the current thread. Used to
+    hand them over to other threads"""
+    return _current_labels.get()
+
+
+def measure(
+    metrics: StageMetrics | None,
+    stage: str,
+    labels: tuple[str | None, str | None] | None = None,
+) -> ContextManager:
+    """Measure a stage if metrics are collected"""
+    if metrics is None:
+        return nullcontext()
+
+    return metrics.measure(stage, labels)
+
+
+class LatencyHistogram:
+    """Rolling window of the latest durations of a stage"""
+
+    def __init__(self, window: int = METRICS_WINDOW) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self.count += 1
+
+    def summary(self) -> dict:
+        """Percentiles of the rolling window, in seconds"""
+        samples = sorted(self._samples)
+
+        if not samples:
+            return {"count": 0}
+
+        def percentile(rank: float) -> float:
+            index = max(math.ceil(rank * len(samples)) - 1, 0)
+            return round(samples[index], 3)
+
+        return {
+            "count": self.count,
+            "mean": round(sum(samples) / len(samples), 3),
+            "p50": percentile(0.50),
+            "p95": percentile(0.95),
+            "p99": percentile(0.99),
+            "max": round(samples[-1], 3),
+        }
+
+
+class StageMetrics:
+    """Rolling latency histograms of each stage of a cast, per account
+    and per device. Safe to record from any thread."""
+
+    def __init__(self, window: int = METRICS_WINDOW) -> None:
+        self.window = window
+        self._accounts: dict[str, dict[str, LatencyHistogram]] = {}
+        self._devices: dict[str, dict[str, LatencyHistogram]] = {}
+        self._listeners: list[Callable[[str, str], None]] = []
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        stage: str,
+        seconds: float,
+        labels: tuple[str | None, str | None] | None = None,
+    ) -> None:
+        """Record the duration of a stage. Labels default to the ones of
+        the service call running in the current thread. Outside of a
+        service call, e.g. for the websocket handlers or the warm-up,
+        nothing is recorded."""
+        account, device = labels or current_labels()
+        if account is None:
+            return
+
+        with self._lock:
+            self._histogram(self._accounts, account, stage).record(seconds)
+
+            if device is not None:
+                self._histogram(self._devices, device, stage).record(seconds)
+
+            listeners = list(self._listeners)
+
+        _LOGGER.debug(
+            "Stage %s took %.3fs (account: %s, device: %s)",
+            stage,
+            seconds,
+            account,
+            device,
+        )
+
+        for listener in listeners:
+            listener(account, stage)
+
+    @contextmanager
+    def measure(
+        self,
+        stage: str,
+        labels: tuple[str | None, str | None] | None = None,
+    ) -> Iterator[None]:
+        """Record the time spent in the block, even if it raises. The
+        block is also a span of the current trace"""
+        started = time.perf_counter()
+        try:
+            with span(stage):
+                yield
+        finally:
+            self.record(stage, time.perf_counter() - started, labels)
+
+    def add_listener(self, listener: Callable[[str, str], None]) -> Callable:
+        """Call `listener(account, stage)` after each record. Returns a
+        callable removing the listener"""
+        with self._lock:
+            self._listeners.append(listener)
+
+        def remove() -> None:
+            with self._lock:
+                self._listeners.remove(listener)
+
+        return remove
+
+    def account_summary(self, account: str) -> dict:
+        """Summary of every stage of an account"""
+        with self._lock:
+            return {
+                stage: histogram.summary()
+                for stage, histogram in self._accounts.get(account, {}).items()
+            }
+
+    def summary(self) -> dict:
+        """Summary of every stage, per account and per device"""
+        with self._lock:
+            return {
+                scope: {
+                    key: {
+                        stage: histogram.summary()
+                        for stage, histogram in stages.items()
+                    }
+                    for key, stages in histograms.items()
+                }
+                for scope, histograms in (
+                    ("accounts", self._accounts),
+                    ("devices", self._devices),
+                )
+            }
+
+    def _histogram(
+        self,
+        histograms: dict[str, dict[str, LatencyHistogram]],
+        key: str,
+        stage: str,
+    ) -> LatencyHistogram:
+        stages = histograms.setdefault(key, {})
+
+        if stage not in stages:
+            stages[stage] = LatencyHistogram(self.window)
+
+        return stages[stage]
@@ -0,0 +1,131 @@
+"""Shared polling of the Spotify player state for websocket subscribers"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Awaitable, Callable
+
+import homeassistant.core as ha_core
+from homeassistant.core import CALLBACK_TYPE, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    PLAYER_ACTIVE_INTERVAL_SECS,
+    PLAYER_IDLE_INTERVAL_SECS,
+    PLAYER_MIN_INTERVAL_SECS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def diff_player_state(old: dict, new: dict) -> dict | None:
+    """Return the top level fields that changed between two player
+    states, or None if nothing changed."""
+    changed = {key: value for key, value in new.items() if old.get(key) != value}
+    removed = [key for key in old if key not in new]
+
+    if not changed and not removed:
+        return None
+
+    return {"changed": changed, "removed": removed}
+
+
+def next_poll_interval(state: dict) -> float:
+    """Seconds until the next poll. Polls slowly when nothing plays and
+    right after the end of the current track when it is about to end.
+    """
+    if not state.get("is_playing"):
+        return PLAYER_IDLE_INTERVAL_SECS
+
+    try:
+        remaining = (state["item"]["duration_ms"] - state["progress_ms"]) / 1000
+    except (KeyError, TypeError):
+        return PLAYER_ACTIVE_INTERVAL_SECS
+
+    if remaining < PLAYER_ACTIVE_INTERVAL_SECS:
+        return max(remaining + PLAYER_MIN_INTERVAL_SECS, PLAYER_MIN_INTERVAL_SECS)
+
+    return PLAYER_ACTIVE_INTERVAL_SECS
+
+
+class PlayerPoller:
+    """Polls the player state of an account on behalf of all its
+    subscribers and pushes them the fields that changed.
+
+    Polling only runs while there is at least one subscriber, so the
+    number of upstream calls depends on the number of accounts watched,
+    not on the number of open dashboards.
+    """
+
+    def __init__(
+        self,
+        hass: ha_core.HomeAssistant,
+        fetch: Callable[[], Awaitable[dict | None]],
+    ) -> None:
+        self.hass = hass
+        self._fetch = fetch
+        self._state: dict | None = None
+        self._subscribers: dict[object, Callable[[dict], None]] = {}
+        self._unsub_timer: CALLBACK_TYPE | None = None
+        self._running = False
+
+    @callback
+    def async_subscribe(self, send: Callable[[dict], None]) -> CALLBACK_TYPE:
+        """Subscribe to the player updates. The subscriber first
+        receives the whole state, then only what changed."""
+        token = object()
+        self._subscribers[token] = send
+
+        if self._state is not None:
+            send({"changed": self._state, "removed": []})
+
+        if not self._running:
+            self._running = True
+            self.hass.async_create_task(self._async_poll())
+
+        @callback
+        def unsubscribe() -> None:
+            self._subscribers.pop(token, None)
+
+            # a poll in flight stops by itself once it completes
+            if not self._subscribers and self._unsub_timer is not None:
+                self._unsub_timer()
+                self._unsub_timer = None
+                self._stop()
+
+        return unsubscribe
+
+    @callback
+    def _stop(self) -> None:
+        self._running = False
+
+        # a later subscriber must not receive a stale state
+        self._state = None
+
+    async def _async_poll(self, _now: Any = None) -> None:
+        self._unsub_timer = None
+
+        try:
+            state = await self._fetch() or {}
+        except Exception as exc:  # pylint: disable=broad-except
+            _LOGGER.warning("Could not get the player state: %s", exc)
+            state = self._state or {}
+
+        if not self._subscribers:
+            self._stop()
+            return
+
+        if self._state is None:
+            update = {"changed": state, "removed": []}
+        else:
+            update = diff_player_state(self._state, state)
+
+        self._state = state
+
+        if update is not None:
+            for send in list(self._subscribers.values()):
+                send(update)
+
+        interval = next_poll_interval(state)
+        _LOGGER.debug("Next player poll in %.1f seconds", interval)
+        self._unsub_timer = async_call_later(self.hass, interval, self._async_poll)
@@ -0,0 +1,179 @@
+"""Compact records of the Spotify objects kept by spotcast.
+
+The Web API returns large nested objects (markets, images, full artists)
+of which spotcast only uses a few fields. Objects are turned into these
+records as soon as they are received, before being cached or passed
+around.
+"""
+
+from __future__ import annotations
+
+
+class ItemRecord:
+    """A playable item: album, show, audiobook or artist"""
+
+    __slots__ = ("uri", "id", "name", "type")
+
+    def __init__(self, uri: str, id: str, name: str, type: str) -> None:
+        self.uri = uri
+        self.id = id
+        self.name = name
+        self.type = type
+
+    @classmethod
+    def from_api(cls, item: dict) -> ItemRecord:
+        return cls(item["uri"], item.get("id"), item.get("name"), item["type"])
+
+    def as_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self._fields()}
+
+    @classmethod
+    def _fields(cls) -> tuple[str, ...]:
+        return tuple(
+            slot for klass in reversed(cls.__mro__)
+            for slot in getattr(klass, "__slots__", ())
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.as_dict() == other.as_dict()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.name!r}, {self.uri!r})"
+
+
+class TrackRecord(ItemRecord):
+    """A track, with the names of its artists"""
+
+    __slots__ = ("artists",)
+
+    def __init__(
+        self, uri: str, id: str, name: str, artists: tuple[str, ...] = ()
+    ) -> None:
+        super().__init__(uri, id, name, "track")
+        self.artists = artists
+
+    @classmethod
+    def from_api(cls, item: dict) -> TrackRecord:
+        return cls(
+            item["uri"],
+            item.get("id"),
+            item.get("name"),
+            tuple(artist["name"] for artist in item.get("artists") or ()),
+        )
+
+
+class PlaylistRecord(ItemRecord):
+    """A playlist, with the id of its owner"""
+
+    __slots__ = ("owner",)
+
+    def __init__(self, uri: str, id: str, name: str, owner: str | None = None) -> None:
+        super().__init__(uri, id, name, "playlist")
+        self.owner = owner
+
+    @classmethod
+    def from_api(cls, item: dict) -> PlaylistRecord:
+        return cls(
+            item["uri"],
+            item.get("id"),
+            item.get("name"),
+            (item.get("owner") or {}).get("id"),
+        )
+
+
+class EpisodeRecord(ItemRecord):
+    """An episode, and whether the account played it to the end"""
+
+    __slots__ = ("fully_played",)
+
+    def __init__(self, uri: str, id: str, name: str, fully_played: bool = False) -> None:
+        super().__init__(uri, id, name, "episode")
+        self.fully_played = fully_played
+
+    @classmethod
+    def from_api(cls, item: dict) -> EpisodeRecord:
+        return cls(
+            item["uri"],
+            item.get("id"),
+            item.get("name"),
+            bool((item.get("resume_point") or {}).get("fully_played")),
+        )
+
+
+class DeviceRecord:
+    """A Spotify Connect device"""
+
+    __slots__ = (
+        "id",
+        "name",
+        "type",
+        "is_active",
+        "is_private_session",
+        "is_restricted",
+        "supports_volume",
+        "volume_percent",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        name: str,
+        type: str | None = None,
+        is_active: bool = False,
+        volume_percent: int | None = None,
+        is_private_session: bool = False,
+        is_restricted: bool = False,
+        supports_volume: bool = True,
+    ) -> None:
+        self.id = id
+        self.name = name
+        self.type = type
+        self.is_active = is_active
+        self.is_private_session = is_private_session
+        self.is_restricted = is_restricted
+        self.supports_volume = supports_volume
+        self.volume_percent = volume_percent
+
+    @classmethod
+    def from_api(cls, device: dict) -> DeviceRecord:
+        return cls(
+            device["id"],
+            device["name"],
+            device.get("type"),
+            bool(device.get("is_active")),
+            device.get("volume_percent"),
+            bool(device.get("is_private_session")),
+            bool(device.get("is_restricted")),
+            bool(device.get("supports_volume", True)),
+        )
+
+    def as_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.as_dict() == other.as_dict()
+
+    def __repr__(self) -> str:
+        return f"DeviceRecord({self.name!r}, {self.id!r})"
+
+
+RECORD_TYPES = {
+    "track": TrackRecord,
+    "playlist": PlaylistRecord,
+    "episode": EpisodeRecord,
+}
+
+
+def item_record(item: dict) -> ItemRecord:
+    """Record of a Web API object, by its type"""
+    return RECORD_TYPES.get(item["type"], ItemRecord).from_api(item)
+
+
+def item_records(items: list[dict | None]) -> list[ItemRecord]:
+    """Records of a page of items. Spotify leaves holes in some pages,
+    they are skipped."""
+    return [item_record(item) for item in items if item is not None]
@@ -0,0 +1,98 @@
+"""Scheduling of the polls waiting for a cast device to register with
+Spotify Connect after the launch of the Spotify app"""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+from collections import deque
+
+from .const import (
+    DEFAULT_REGISTRATION_POLLS,
+    REGISTRATION_MAX_BUDGET_SECS,
+    REGISTRATION_MIN_BUDGET_SECS,
+    REGISTRATION_MIN_POLL_INTERVAL_SECS,
+    REGISTRATION_MIN_SAMPLES,
+    REGISTRATION_WINDOW,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RegistrationSchedule:
+    """Learns how long each cast device takes to show up in the Spotify
+    Connect devices once the app is launched, and polls around it.
+
+    Polls are first made a bit before the fastest delay seen and at the
+    quartiles of the delays, so a device registering in 400ms is found
+    in about that time, and are then spaced out more and more until
+    twice the slowest delay seen. Safe to use from any thread.
+    """
+
+    def __init__(self, window: int = REGISTRATION_WINDOW) -> None:
+        self.window = window
+        self._delays: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, device: str, seconds: float) -> None:
+        """Record the time, after the launch, the poll that found a device
+        was started at. The time the request took is left out, as the
+        delays would otherwise grow with each cast."""
+        with self._lock:
+            if device not in self._delays:
+                self._delays[device] = deque(maxlen=self.window)
+
+            self._delays[device].append(seconds)
+
+    def polls(self, device: str) -> list[float]:
+        """Times of the polls, in seconds after the app launch"""
+        with self._lock:
+            delays = sorted(self._delays.get(device, ()))
+
+        if len(delays) < REGISTRATION_MIN_SAMPLES:
+            return list(DEFAULT_REGISTRATION_POLLS)
+
+        def percentile(rank: float) -> float:
+            return delays[max(math.ceil(rank * len(delays)) - 1, 0)]
+
+        # one poll ahead of the fastest delay, so the schedule follows a
+        # device registering faster than it used to
+        early = max(
+            delays[0] - max(delays[0] / 2, REGISTRATION_MIN_POLL_INTERVAL_SECS), 0
+        )
+        times = [early] + [
+            percentile(rank) for rank in (0.25, 0.5, 0.75, 0.9, 1.0)
+        ]
+
+        # tail of the distribution, spaced out more and more
+        budget = min(
+            max(2 * delays[-1], REGISTRATION_MIN_BUDGET_SECS),
+            REGISTRATION_MAX_BUDGET_SECS,
+        )
+        interval = max(
+            delays[-1] - percentile(0.5), REGISTRATION_MIN_POLL_INTERVAL_SECS
+        )
+
+        while times[-1] + interval <= budget:
+            times.append(times[-1] + interval)
+            interval *= 2
+
+        if times[-1] < budget:
+            times.append(budget)
+
+        polls = []
+        for time in times:
+            if not polls or time - polls[-1] >= REGISTRATION_MIN_POLL_INTERVAL_SECS:
+                polls.append(round(time, 3))
+
+        _LOGGER.debug("Polling %s for its registration at %s", device, polls)
+        return polls
+
+    def summary(self) -> dict:
+        """Registration delays seen of each device"""
+        with self._lock:
+            return {
+                device: sorted(round(delay, 3) for delay in delays)
+                for device, delays in self._delays.items()
+            }
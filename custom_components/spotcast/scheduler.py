@@ -0,0 +1,116 @@
+"""Scheduling of service calls: execution lanes to order calls per device
+and bound them per account, and coalescing of duplicate calls"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Hashable, TypeVar
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+class ExecutionLanes:
+    """Schedules service calls on one serialized lane per target device
+    and a bounded number of concurrent calls per account.
+
+    Waiting is done on the event loop, so a call queued behind another
+    one does not hold an executor thread. Calls for unrelated devices
+    and accounts never wait on each other.
+    """
+
+    def __init__(self, account_concurrency: int) -> None:
+        self.account_concurrency = account_concurrency
+        self._devices: dict[str, asyncio.Lock] = {}
+        self._accounts: dict[str, asyncio.Semaphore] = {}
+        self._waiting: dict[str, int] = {}
+
+    @asynccontextmanager
+    async def lane(
+        self,
+        account: str | None,
+        device: str | None,
+    ) -> AsyncIterator[None]:
+        """Hold the lane of the device, then a slot of the account. A
+        call without a device is only bound by its account.
+        """
+        account = account or "default"
+
+        if device is None:
+            async with self._account_slot(account):
+                yield
+            return
+
+        lock = self._devices.setdefault(device, asyncio.Lock())
+        self._waiting[device] = self._waiting.get(device, 0) + 1
+
+        if lock.locked():
+            _LOGGER.debug("Waiting for the lane of device `%s`", device)
+
+        try:
+            async with lock:
+                async with self._account_slot(account):
+                    yield
+        finally:
+            self._waiting[device] -= 1
+
+            # forget idle lanes so renamed devices don't accumulate
+            if self._waiting[device] == 0:
+                del self._waiting[device]
+                del self._devices[device]
+
+    def _account_slot(self, account: str) -> asyncio.Semaphore:
+        if account not in self._accounts:
+            self._accounts[account] = asyncio.Semaphore(self.account_concurrency)
+
+        return self._accounts[account]
+
+
+class CallCoalescer:
+    """Attaches duplicate calls made within a time window to the call
+    already in flight, so they share its result instead of running
+    again.
+    """
+
+    def __init__(self, window: float) -> None:
+        self.window = window
+        self._calls: dict[Hashable, tuple[float, asyncio.Future]] = {}
+
+    async def run(
+        self,
+        key: Hashable,
+        job: Callable[[], Awaitable[_T]],
+    ) -> _T:
+        """Run the job, unless a call with the same key started less
+        than `window` seconds ago, in which case its result is shared.
+        """
+        if self.window <= 0:
+            return await job()
+
+        now = time.monotonic()
+        self._purge(now)
+
+        started, future = self._calls.get(key, (0.0, None))
+
+        if future is not None and now - started < self.window:
+            _LOGGER.debug("Coalescing duplicate call %s", key)
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(job())
+        self._calls[key] = (now, future)
+
+        return await asyncio.shield(future)
+
+    def _purge(self, now: float) -> None:
+        expired = [
+            key
+            for key, (started, _) in self._calls.items()
+            if now - started >= self.window
+        ]
+
+        for key in expired:
+            del self._calls[key]
@@ -7,12 +7,28 @@ import logging
 from datetime import timedelta
 
 import homeassistant.core as ha_core
-from homeassistant.components.sensor import SensorEntity
-from homeassistant.const import STATE_OK, STATE_UNKNOWN
+from homeassistant.components.media_player import DOMAIN as MEDIA_PLAYER_DOMAIN
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.const import (
+    EVENT_STATE_CHANGED,
+    STATE_OK,
+    STATE_UNAVAILABLE,
+    STATE_UNKNOWN,
+    EntityCategory,
+    UnitOfTime,
+)
+from homeassistant.core import callback
+from homeassistant.helpers import entity_registry as er
 from homeassistant.util import dt
 
-from .const import CONF_SPOTIFY_COUNTRY, DOMAIN
+from .breaker import STATES, CircuitBreakers
+from .const import CONF_COMPACT_ATTRIBUTES, CONF_SPOTIFY_COUNTRY, DOMAIN
 from .helpers import get_cast_devices
+from .metrics import STAGE_TOTAL, StageMetrics
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -32,16 +48,52 @@ def setup_platform(
     except KeyError:
         country = None
 
-    add_devices([ChromecastDevicesSensor(hass)])
-    add_devices([ChromecastPlaylistSensor(hass, country)])
+    compact = config.get(CONF_COMPACT_ATTRIBUTES, False)
+
+    if compact:
+        add_devices([CompactChromecastDevicesSensor(hass)])
+        add_devices([CompactChromecastPlaylistSensor(hass, country)])
+    else:
+        add_devices([ChromecastDevicesSensor(hass)])
+        add_devices([ChromecastPlaylistSensor(hass, country)])
+
+    controller = hass.data[DOMAIN]["controller"]
+    add_devices(
+        [
+            SpotcastLatencySensor(hass, controller.metrics, account)
+            for account in controller.accounts
+        ]
+    )
+    add_devices(
+        [
+            SpotcastBreakerSensor(hass, controller.breakers, account)
+            for account in controller.accounts
+        ]
+    )
 
 
 class ChromecastDevicesSensor(SensorEntity):
-    def __init__(self, hass):
+    """Lists the cast devices. Recomputed when a cast entity is added,
+    removed or renamed instead of being polled."""
+
+    _attr_should_poll = False
+
+    def __init__(self, hass, compact: bool = False):
         self.hass = hass
         self._state = STATE_UNKNOWN
         self._chromecast_devices = []
-        self._attributes = {"devices_json": [], "devices": [], "last_update": None}
+        self.compact = compact
+
+        # compact mode keeps a single representation of the devices
+        if compact:
+            self._attributes = {"devices": []}
+        else:
+            self._attributes = {
+                "devices_json": [],
+                "devices": [],
+                "last_update": None,
+            }
+
         _LOGGER.debug("initiating sensor")
 
     @property
@@ -57,7 +109,60 @@ class ChromecastDevicesSensor(SensorEntity):
         """Return the state attributes."""
         return self._attributes
 
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to the cast entities changes"""
+        self.async_on_remove(
+            self.hass.bus.async_listen(
+                er.EVENT_ENTITY_REGISTRY_UPDATED,
+                self._async_devices_changed,
+                event_filter=self._is_cast_registry_event,
+            )
+        )
+        self.async_on_remove(
+            self.hass.bus.async_listen(
+                EVENT_STATE_CHANGED,
+                self._async_devices_changed,
+                event_filter=self._is_cast_state_event,
+            )
+        )
+        self.update()
+
+    @callback
+    def _is_cast_registry_event(self, event_data) -> bool:
+        return event_data["entity_id"].startswith(f"{MEDIA_PLAYER_DOMAIN}.")
+
+    @callback
+    def _is_cast_state_event(self, event_data) -> bool:
+        if not event_data["entity_id"].startswith(f"{MEDIA_PLAYER_DOMAIN}."):
+            return False
+
+        old_state = event_data["old_state"]
+        new_state = event_data["new_state"]
+
+        # entity added or removed
+        if old_state is None or new_state is None:
+            return True
+
+        # device (dis)connected, its cast info may have been updated
+        if (old_state.state == STATE_UNAVAILABLE) != (
+            new_state.state == STATE_UNAVAILABLE
+        ):
+            return True
+
+        return old_state.attributes.get("friendly_name") != (
+            new_state.attributes.get("friendly_name")
+        )
+
+    @callback
+    def _async_devices_changed(self, _event) -> None:
+        if self._refresh_devices():
+            self.async_write_ha_state()
+
     def update(self):
+        self._refresh_devices()
+
+    def _refresh_devices(self) -> bool:
+        """Rebuild the device list. Returns True if it changed"""
         _LOGGER.debug("Getting chromecast devices")
 
         known_devices = get_cast_devices(self.hass)
@@ -74,18 +179,46 @@ class ChromecastDevicesSensor(SensorEntity):
             for cast_info in known_devices
         ]
 
-        self._attributes["devices_json"] = json.dumps(chromecasts, ensure_ascii=False)
+        if chromecasts == self._chromecast_devices and self._state == STATE_OK:
+            return False
+
+        self._chromecast_devices = chromecasts
         self._attributes["devices"] = chromecasts
-        self._attributes["last_update"] = dt.now().isoformat("T")
         self._state = STATE_OK
 
+        if not self.compact:
+            self._attributes["devices_json"] = json.dumps(
+                chromecasts, ensure_ascii=False
+            )
+            self._attributes["last_update"] = dt.now().isoformat("T")
+
+        return True
+
+
+class CompactChromecastDevicesSensor(ChromecastDevicesSensor):
+    """Cast devices sensor of compact_attributes, whose device list is
+    left out of the recorder history"""
+
+    _unrecorded_attributes = frozenset({"devices"})
+
+    def __init__(self, hass):
+        super().__init__(hass, compact=True)
+
 
 class ChromecastPlaylistSensor(SensorEntity):
-    def __init__(self, hass: ha_core, country=None):
+    def __init__(self, hass: ha_core, country=None, compact: bool = False):
         self.hass = hass
         self._state = STATE_UNKNOWN
         self.country = country
-        self._attributes = {"playlists": [], "last_update": None}
+        self.compact = compact
+
+        # without last_update, the state is only written when the
+        # playlists change
+        if compact:
+            self._attributes = {"playlists": []}
+        else:
+            self._attributes = {"playlists": [], "last_update": None}
+
         _LOGGER.debug("initiating playlist sensor")
 
     @property
@@ -122,5 +255,96 @@ class ChromecastPlaylistSensor(SensorEntity):
             {"uri": x["uri"], "name": x["name"]} for x in resp["items"]
         ]
 
-        self._attributes["last_update"] = dt.now().isoformat("T")
+        if not self.compact:
+            self._attributes["last_update"] = dt.now().isoformat("T")
+
         self._state = STATE_OK
+
+
+class CompactChromecastPlaylistSensor(ChromecastPlaylistSensor):
+    """Playlists sensor of compact_attributes, whose playlist list is
+    left out of the recorder history"""
+
+    _unrecorded_attributes = frozenset({"playlists"})
+
+    def __init__(self, hass: ha_core, country=None):
+        super().__init__(hass, country, compact=True)
+
+
+class SpotcastLatencySensor(SensorEntity):
+    """p95 duration of the casts of an account. The percentiles of each
+    stage of a cast are in the attributes."""
+
+    _attr_should_poll = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _unrecorded_attributes = frozenset({"stages"})
+
+    def __init__(self, hass, metrics: StageMetrics, account: str):
+        self.hass = hass
+        self.metrics = metrics
+        self.account = account
+        _LOGGER.debug("initiating latency sensor for %s", account)
+
+    @property
+    def name(self):
+        return f"Spotcast {self.account} cast latency"
+
+    @property
+    def native_value(self):
+        return self.metrics.account_summary(self.account).get(STAGE_TOTAL, {}).get("p95")
+
+    @property
+    def extra_state_attributes(self):
+        """Return the state attributes."""
+        return {"stages": self.metrics.account_summary(self.account)}
+
+    async def async_added_to_hass(self) -> None:
+        """Update the sensor after each cast of the account"""
+        self.async_on_remove(self.metrics.add_listener(self._stage_recorded))
+
+    def _stage_recorded(self, account: str, stage: str) -> None:
+        # called from the thread of the cast
+        if account == self.account and stage == STAGE_TOTAL:
+            self.schedule_update_ha_state()
+
+
+class SpotcastBreakerSensor(SensorEntity):
+    """Worst state of the circuit breakers of the Spotify endpoints of an
+    account. The state of each endpoint is in the attributes."""
+
+    _attr_should_poll = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_device_class = SensorDeviceClass.ENUM
+    _attr_options = STATES
+    _unrecorded_attributes = frozenset({"endpoints"})
+
+    def __init__(self, hass, breakers: CircuitBreakers, account: str):
+        self.hass = hass
+        self.breakers = breakers
+        self.account = account
+        _LOGGER.debug("initiating circuit breaker sensor for %s", account)
+
+    @property
+    def name(self):
+        return f"Spotcast {self.account} circuit breaker"
+
+    @property
+    def native_value(self):
+        return self.breakers.account_state(self.account)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the state attributes."""
+        return {"endpoints": self.breakers.account_summary(self.account)}
+
+    async def async_added_to_hass(self) -> None:
+        """Update the sensor when a breaker of the account changes"""
+        self.async_on_remove(self.breakers.add_listener(self._breaker_changed))
+
+    def _breaker_changed(self, account: str, endpoint: str) -> None:
+        # called from the thread of the failing call
+        if account == self.account:
+            self.schedule_update_ha_state()
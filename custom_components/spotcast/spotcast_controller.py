@@ -1,39 +1,86 @@
 from __future__ import annotations
 
 import collections
+import functools
 import json
 import logging
 import random
+import threading
 import time
 from asyncio import run_coroutine_threadsafe
 from collections import OrderedDict
 from datetime import datetime
+from typing import TYPE_CHECKING, Callable
 
-import aiohttp
-import pychromecast
-import spotipy
-from homeassistant.components.cast.helpers import ChromeCastZeroconf
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
-from requests import TooManyRedirects
 from .error import TokenError
-from .const import CONF_SP_DC, CONF_SP_KEY
+from .const import (
+    CACHE_WEIGHTS,
+    CAST_TOKEN_MIN_VALIDITY_SECS,
+    CONF_SP_DC,
+    CONF_SP_KEY,
+    DEFAULT_CACHE_BUDGET_KB,
+    FUZZY_MATCH_THRESHOLD,
+    NAME_INDEX_TTL_SECS,
+    SPOTIFY_DEVICES_MAX_AGE_SECS,
+    SPOTIFY_DEVICES_POLL_MAX_AGE_SECS,
+    TOKEN_URL,
+)
+from .breaker import (
+    ENDPOINT_DEVICE_AUTH,
+    ENDPOINT_TOKEN,
+    CircuitBreaker,
+    CircuitBreakers,
+    guard,
+)
+from .cache import BoundedCache, CacheRegistry, ResponseCache
+from .fuzzy import TrigramIndex
+from .metrics import StageMetrics, current_labels, measure
+from .records import EpisodeRecord
+from .registration import RegistrationSchedule
+from .tracing import current_trace, span
 from .helpers import get_cast_devices, get_spotify_devices, get_spotify_media_player
-from .spotify_controller import SpotifyController
+from .spotify_uri import KIND_COLLECTION, SpotifyURI, parse_uri
+
+if TYPE_CHECKING:
+    import pychromecast
+    import spotipy
+
+    from .spotify_controller import SpotifyController
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def import_cast_modules() -> None:
+    """Import the modules only needed to cast. They are imported on
+    first use, this gets them ready in the background after setup."""
+    # pylint: disable=import-outside-toplevel,unused-import
+    import aiohttp  # noqa: F401
+    import pychromecast  # noqa: F401
+    import spotipy  # noqa: F401
+    from homeassistant.components.cast import helpers  # noqa: F401
+
+    from . import spotify_controller  # noqa: F401
+
+
 class SpotifyCastDevice:
     """Represents a spotify device."""
 
     spotify_controller: SpotifyController | None = None
 
     def __init__(
-        self, hass: HomeAssistant, device_name: str | None, entity_id: str | None
+        self,
+        hass: HomeAssistant,
+        device_name: str | None,
+        entity_id: str | None,
+        metrics: StageMetrics | None = None,
+        breaker: CircuitBreaker | None = None,
     ) -> None:
         """Initialize a spotify cast device."""
         self.hass = hass
+        self.metrics = metrics
+        self.breaker = breaker
 
         # Get device name from entity_id
         if device_name is None:
@@ -53,6 +100,9 @@ class SpotifyCastDevice:
         self.device_name = device_name
 
     def get_chromecast_device(self) -> pychromecast.Chromecast:
+        import pychromecast
+        from homeassistant.components.cast.helpers import ChromeCastZeroconf
+
         # Get cast from discovered devices of cast platform
         known_devices = get_cast_devices(self.hass)
 
@@ -65,6 +115,17 @@ class SpotifyCastDevice:
             ),
             None,
         )
+
+        # tolerate small misspellings of the device name
+        if cast_info is None:
+            match = TrigramIndex(
+                (castinfo.friendly_name, castinfo) for castinfo in known_devices
+            ).best(self.device_name, FUZZY_MATCH_THRESHOLD)
+
+            if match is not None:
+                cast_info = match.value
+                self.device_name = match.name
+
         _LOGGER.debug("Cast info: %s", cast_info)
         if cast_info:
             return pychromecast.get_chromecast_from_cast_info(
@@ -79,13 +140,30 @@ class SpotifyCastDevice:
         )
 
     def start_spotify_controller(self, access_token: str, expires: int) -> None:
-        cast_device = self.get_chromecast_device()
-        _LOGGER.debug("Found cast device: %s", cast_device)
-        cast_device.wait()
-
-        sp = SpotifyController(cast_device, access_token, expires)
+        from .spotify_controller import SpotifyController
+
+        # no need to launch the app if device auth would not be attempted
+        if self.breaker is not None:
+            self.breaker.check()
+
+        with measure(self.metrics, "connect"):
+            cast_device = self.get_chromecast_device()
+            _LOGGER.debug("Found cast device: %s", cast_device)
+            cast_device.wait()
+
+        sp = SpotifyController(
+            cast_device,
+            access_token,
+            expires,
+            metrics=self.metrics,
+            labels=current_labels(),
+            trace=current_trace(),
+            breaker=self.breaker,
+        )
         cast_device.register_handler(sp)
-        sp.launch_app()
+
+        with measure(self.metrics, "launch"):
+            sp.launch_app()
 
         if not sp.is_launched and not sp.credential_error:
             raise HomeAssistantError(
@@ -105,50 +183,78 @@ class SpotifyCastDevice:
 
 
 class SpotifyToken:
-    """Represents a spotify token for an account."""
+    """Represents a spotify token for an account. The token and its
+    expiration are swapped together, and threads needing a new token
+    wait for a single request."""
 
-    hass = None
-    sp_dc = None
-    sp_key = None
-    _access_token = None
-    _token_expires = 0
-
-    def __init__(self, hass: HomeAssistant, sp_dc: str, sp_key: str) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        sp_dc: str,
+        sp_key: str,
+        breaker: CircuitBreaker | None = None,
+    ) -> None:
         self.hass = hass
         self.sp_dc = sp_dc
         self.sp_key = sp_key
-
-    def ensure_token_valid(self) -> None:
-        if float(self._token_expires) > time.time():
-            return
-        self.get_spotify_token()
+        self.breaker = breaker
+        self._token: tuple[str | None, int] = (None, 0)
+        self._lock = threading.Lock()
+
+    def ensure_token_valid(self, min_validity: float = 0) -> tuple[str, int]:
+        """Current token and seconds until it expires, requested only
+        if it expires within `min_validity` seconds"""
+        if (token := self._valid_token(min_validity)) is not None:
+            return token
+
+        with self._lock:
+            # the token may have been renewed while waiting for the lock
+            if (token := self._valid_token(min_validity)) is not None:
+                return token
+            return self.get_spotify_token()
+
+    def _valid_token(self, min_validity: float = 0) -> tuple[str, int] | None:
+        access_token, expires = self._token
+        if expires > time.time() + min_validity:
+            return access_token, expires - int(time.time())
+        return None
 
     @property
     def access_token(self) -> str:
-        self.ensure_token_valid()
-        _LOGGER.debug("expires: %s time: %s", self._token_expires, time.time())
-        return self._access_token
+        access_token, expires = self.ensure_token_valid()
+        _LOGGER.debug("expires in: %s", expires)
+        return access_token
 
     def get_spotify_token(self) -> tuple[str, int]:
-        try:
-            self._access_token, self._token_expires = run_coroutine_threadsafe(
-                self.start_session(), self.hass.loop
-            ).result()
-            expires = self._token_expires - int(time.time())
-            return self._access_token, expires
-        except TooManyRedirects:
-            _LOGGER.error(
-                "Could not get spotify token. sp_dc and sp_key could be "
-                "expired. Please update in config."
-            )
-            raise HomeAssistantError("Expired sp_dc, sp_key")
-        except (TokenError, Exception):  # noqa: E722
-            raise HomeAssistantError("Could not get spotify token.")
+        """Request a new token"""
+        from requests import TooManyRedirects
+
+        with guard(self.breaker):
+            try:
+                self._token = access_token, expires_at = run_coroutine_threadsafe(
+                    self.start_session(), self.hass.loop
+                ).result()
+                return access_token, expires_at - int(time.time())
+            except TooManyRedirects:
+                _LOGGER.error(
+                    "Could not get spotify token. sp_dc and sp_key could be "
+                    "expired. Please update in config."
+                )
+                raise HomeAssistantError("Expired sp_dc, sp_key")
+            except (TokenError, Exception):  # noqa: E722
+                raise HomeAssistantError("Could not get spotify token.")
 
     async def start_session(self) -> tuple[str, int]:
         """ Starts session to get access token. """
         cookies = {"sp_dc": self.sp_dc, "sp_key": self.sp_key}
 
+        # runs on the event loop, the trace follows through the context
+        with span("token_request"):
+            return await self._request_token(cookies)
+
+    async def _request_token(self, cookies: dict) -> tuple[str, int]:
+        import aiohttp
+
         async with aiohttp.ClientSession(cookies=cookies) as session:
 
             headers = {
@@ -160,10 +266,7 @@ class SpotifyToken:
             }
 
             async with session.get(
-                (
-                    "https://open.spotify.com/get_access_token?reason="
-                    "transport&productType=web_player"
-                ),
+                TOKEN_URL,
                 allow_redirects=False,
                 headers=headers,
             ) as response:
@@ -196,70 +299,240 @@ class SpotifyToken:
 
 
 class SpotcastController:
-
-    spotifyTokenInstances = {}
-    accounts: dict = {}
-
     def __init__(
         self,
         hass: HomeAssistant,
         sp_dc: str,
         sp_key: str,
         accs: collections.OrderedDict,
+        cache_budget: int = DEFAULT_CACHE_BUDGET_KB * 1024,
     ) -> None:
-        if accs:
-            self.accounts = accs
-        self.accounts["default"] = OrderedDict([("sp_dc", sp_dc), ("sp_key", sp_key)])
+        self.accounts = {
+            **(accs or {}),
+            "default": OrderedDict([("sp_dc", sp_dc), ("sp_key", sp_key)]),
+        }
         self.hass = hass
+        self.metrics = StageMetrics()
+        self.breakers = CircuitBreakers()
+        # the tokens are all created here and the mapping never changes,
+        # each token guards its own renewal
+        self.tokens = {
+            account: SpotifyToken(
+                hass,
+                conf[CONF_SP_DC],
+                conf[CONF_SP_KEY],
+                self.breakers.get(account, ENDPOINT_TOKEN),
+            )
+            for account, conf in self.accounts.items()
+        }
+        self.caches = CacheRegistry(cache_budget)
+        self.profiles = self.caches.register(
+            "profiles", BoundedCache(None), CACHE_WEIGHTS["profiles"]
+        )
+        # indexes outlive their ttl, a stale one is used while refreshed
+        self.name_indexes = self.caches.register(
+            "name_indexes", BoundedCache(None), CACHE_WEIGHTS["name_indexes"]
+        )
+        self._refreshing: set[tuple[str, str]] = set()
+        self._refreshing_lock = threading.Lock()
+        self.devices_cache = self.caches.register(
+            "devices",
+            ResponseCache(SPOTIFY_DEVICES_MAX_AGE_SECS),
+            CACHE_WEIGHTS["devices"],
+        )
+        self.registration = RegistrationSchedule()
+
+    def initialize_tokens(self) -> None:
+        """Get the token of every account ahead of the first cast.
+        Failures are only logged, the next cast tries again."""
+        for account in self.accounts:
+            try:
+                self.get_token_instance(account).ensure_token_valid()
+            except HomeAssistantError as exc:
+                _LOGGER.warning(
+                    "Could not get the token of account %s: %s", account, exc
+                )
+
+    def warm_up_account(self, account: str) -> None:
+        """Get the token, profile and name indexes of an account ahead
+        of its first cast"""
+        try:
+            client = self.get_spotify_client(account)
+            self.get_profile(account, client)
+            for kind in ("playlist", "artist"):
+                self.refresh_name_index(account, kind)
+        except Exception as exc:  # pylint: disable=broad-except
+            _LOGGER.warning("Could not warm up account %s: %s", account, exc)
+
+    def get_profile(
+        self,
+        account: str | None,
+        client: spotipy.Spotify | None = None,
+    ) -> dict:
+        """Profile of the account, fetched once"""
+        if account is None:
+            account = "default"
+
+        found, profile = self.profiles.lookup(account)
+        if not found:
+            client = client or self.get_spotify_client(account)
+            profile = client._get("me")  # pylint: disable=W0212
+            self.profiles.store(account, profile)
+
+        return profile
 
     def get_token_instance(self, account: str | None = None) -> SpotifyToken:
         """Get token instance for account"""
         if account is None:
             account = "default"
 
-        # TODO: add error logging when user provide invalid account
-        # name
-        dc = self.accounts.get(account).get(CONF_SP_DC)
-        key = self.accounts.get(account).get(CONF_SP_KEY)
-
-        _LOGGER.debug("Setting up with account %s", account)
-        if account not in self.spotifyTokenInstances:
-            self.spotifyTokenInstances[account] = SpotifyToken(self.hass, dc, key)
-        return self.spotifyTokenInstances[account]
+        try:
+            return self.tokens[account]
+        except KeyError:
+            raise HomeAssistantError(f"Unknown account {account}") from None
 
     def get_spotify_client(self, account: str | None) -> spotipy.Spotify:
-        return spotipy.Spotify(auth=self.get_token_instance(account).access_token)
+        import spotipy
+
+        with self.metrics.measure("token"):
+            access_token = self.get_token_instance(account).access_token
+
+        return spotipy.Spotify(auth=access_token)
+
+    def get_name_index(
+        self, account: str | None, kind: str
+    ) -> TrigramIndex | None:
+        """Get the cached name index of the account's playlists or
+        followed artists, without waiting on Spotify. A missing index,
+        or one older than NAME_INDEX_TTL_SECS, is refreshed in the
+        background while None or the stale index is returned.
+        """
+        if account is None:
+            account = "default"
+
+        found, entry = self.name_indexes.lookup((account, kind))
+        built_at, index = entry if found else (None, None)
+
+        if not found or time.monotonic() - built_at >= NAME_INDEX_TTL_SECS:
+            self.hass.add_job(self.refresh_name_index, account, kind)
+
+        return index
+
+    def refresh_name_index(self, account: str, kind: str) -> TrigramIndex | None:
+        """Build the name index of the account's playlists or followed
+        artists, paging through all of them. Returns None if the index is
+        already being built or could not be."""
+        from spotipy import SpotifyException
+
+        key = (account, kind)
+
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return None
+            self._refreshing.add(key)
+
+        try:
+            client = self.get_spotify_client(account)
+
+            if kind == "playlist":
+                page = client.current_user_playlists(limit=50)
+                items = page["items"]
+                while page["next"]:
+                    page = client.next(page)
+                    items.extend(page["items"])
+
+            elif kind == "artist":
+                page = client.current_user_followed_artists(limit=50)["artists"]
+                items = page["items"]
+                while page["next"]:
+                    page = client.next(page)["artists"]
+                    items.extend(page["items"])
+
+            else:
+                raise ValueError(f"No name index for kind `{kind}`")
+
+            index = TrigramIndex(
+                (item["name"], item["uri"]) for item in items if item is not None
+            )
+            _LOGGER.debug("Built %s name index of %d entries", kind, len(index))
+            self.name_indexes.store(key, (time.monotonic(), index))
+            return index
+
+        except (SpotifyException, HomeAssistantError) as exc:
+            _LOGGER.warning(
+                "Could not build %s name index of account %s: %s", kind, account, exc
+            )
+            return None
+
+        finally:
+            with self._refreshing_lock:
+                self._refreshing.discard(key)
+
+    def resolve_name(
+        self,
+        account: str | None,
+        kind: str,
+        name: str,
+    ) -> SpotifyURI | None:
+        """Resolve a playlist or artist name to its uri from the cached
+        name index. Returns None if no candidate scores high enough, or
+        the index is not built yet.
+        """
+        if (index := self.get_name_index(account, kind)) is None:
+            return None
+
+        match = index.best(name, FUZZY_MATCH_THRESHOLD)
+        return parse_uri(match.value) if match is not None else None
 
     def query_spotify_device_id(
         self,
         user_id: str,
         device_name: str | None,
         spotify_device_ids: list[str],
-        max_retries: int = 1,
+        polls: list[float] | None = None,
         error: bool = False,
+        max_age: float | None = None,
+        started: float | None = None,
+        on_found: Callable[[float], None] | None = None,
     ) -> str | None:
+        """Look for the device in the Spotify Connect devices. With
+        `polls`, the devices are polled at those times, in seconds after
+        `started` (the call by default), until the device is found.
+        `on_found` is then called with the time the successful poll was
+        started at."""
         _LOGGER.debug(
             'Searching for a Spotify device with the name "%s" or IDs in %s',
             device_name,
             spotify_device_ids,
         )
         media_player = get_spotify_media_player(self.hass, user_id)
-        attempt = 0
+        if started is None:
+            started = time.monotonic()
         devices = None
-        while attempt < max_retries:
-            devices_available = get_spotify_devices(media_player)
+        for attempt, poll in enumerate(polls or [0]):
+            if (delay := started + poll - time.monotonic()) > 0:
+                time.sleep(delay)
+            polled = time.monotonic() - started
+
+            # the first poll may reuse a recent list, the next ones wait
+            # for the device to register and need an up to date one
+            devices_available = get_spotify_devices(
+                media_player,
+                self.hass,
+                self.devices_cache,
+                max_age if attempt == 0 else SPOTIFY_DEVICES_POLL_MAX_AGE_SECS,
+            )
             if devices := devices_available["devices"]:
                 for device in devices:
                     if (
                         device_name is not None
-                        and device["name"] == device_name
-                        or device["id"] in spotify_device_ids
+                        and device.name == device_name
+                        or device.id in spotify_device_ids
                     ):
                         _LOGGER.debug("Found matching Spotify device: %s", device)
-                        return device["id"]
-            sleep_secs = random.uniform(1.5, 1.8) ** attempt
-            time.sleep(sleep_secs)
-            attempt += 1
+                        if on_found is not None:
+                            on_found(polled)
+                        return device.id
         if error:
             _LOGGER.error(
                 'No device with the name "%s" or ID "%s" is known to Spotify. Known devices: %s',
@@ -270,6 +543,47 @@ class SpotcastController:
         return None
 
 
+    def correct_device_name(self, device_name: str) -> str:
+        """Name of the cast device closest to `device_name`, to tolerate
+        small misspellings. Returned unchanged when no cast device is
+        close enough. Spotify Connect devices are only matched exactly,
+        as a speaker not registered yet would otherwise resolve to
+        another one with a similar name."""
+        names = [cast_info.friendly_name for cast_info in get_cast_devices(self.hass)]
+        if device_name in names:
+            return device_name
+
+        match = TrigramIndex((name, name) for name in names).best(
+            device_name, FUZZY_MATCH_THRESHOLD
+        )
+        if match is None:
+            return device_name
+
+        _LOGGER.debug('Using cast device "%s" for "%s"', match.name, device_name)
+        return match.name
+
+    def find_spotify_device_id(
+        self,
+        user_id: str,
+        device_name: str | None,
+        spotify_device_ids: list[str],
+    ) -> tuple[str | None, str | None]:
+        """Look for a registered device by its exact name or id, then by
+        the name of the cast device closest to `device_name`. Returns the
+        device id, None if not registered, and the name to use from then
+        on."""
+        found = self.query_spotify_device_id(user_id, device_name, spotify_device_ids)
+
+        if found is None and device_name is not None:
+            corrected = self.correct_device_name(device_name)
+            if corrected != device_name:
+                device_name = corrected
+                found = self.query_spotify_device_id(
+                    user_id, device_name, spotify_device_ids
+                )
+
+        return found, device_name
+
     def get_spotify_device_id(
         self,
         account: str | None,
@@ -277,33 +591,53 @@ class SpotcastController:
         device_name: str | None,
         entity_id: str | None,
     ) -> str:
+        import spotipy
+
         search_device_ids: list[str] = []
         if spotify_device_id is not None:
             search_device_ids.append(spotify_device_id)
-        # login as real browser to get powerful token
-        access_token, expires = self.get_token_instance(account).get_spotify_token()
+        # the token is handed to the cast device, it must not expire soon
+        with self.metrics.measure("token"):
+            access_token, expires = self.get_token_instance(
+                account
+            ).ensure_token_valid(CAST_TOKEN_MIN_VALIDITY_SECS)
         # get the spotify web api client
         client = spotipy.Spotify(auth=access_token)
-        user_id = client._get("me")["id"]
+        with self.metrics.measure("me"):
+            user_id = self.get_profile(account, client)["id"]
         # first, check if spotify id is already available
-        found_spotify_device_id = self.query_spotify_device_id(
-            user_id, device_name, search_device_ids
-        )
+        with self.metrics.measure("device_resolve"):
+            found_spotify_device_id, device_name = self.find_spotify_device_id(
+                user_id, device_name, search_device_ids
+            )
         if found_spotify_device_id is None:
             # if device id is still not available, launch the app on chromecast
             spotify_cast_device = SpotifyCastDevice(
                 self.hass,
                 device_name,
                 entity_id,
+                metrics=self.metrics,
+                breaker=self.breakers.get(account, ENDPOINT_DEVICE_AUTH),
             )
             spotify_cast_device.start_spotify_controller(access_token, expires)
+            launched = time.monotonic()
             # get spotify device id from SpotifyController
             controller_device_id = spotify_cast_device.get_device_id()
             if controller_device_id not in search_device_ids:
                 search_device_ids.append(controller_device_id)
-            found_spotify_device_id = self.query_spotify_device_id(
-                user_id, device_name, search_device_ids, max_retries=5, error=True
-            )
+            # the cast device may have been found under a corrected name
+            cast_name = spotify_cast_device.device_name
+            with self.metrics.measure("device_register"):
+                found_spotify_device_id = self.query_spotify_device_id(
+                    user_id,
+                    cast_name,
+                    search_device_ids,
+                    polls=self.registration.polls(cast_name),
+                    error=True,
+                    max_age=SPOTIFY_DEVICES_POLL_MAX_AGE_SECS,
+                    started=launched,
+                    on_found=functools.partial(self.registration.record, cast_name),
+                )
         if found_spotify_device_id is None:
             raise HomeAssistantError("Failed to get device ID from Spotify")
         return found_spotify_device_id
@@ -313,7 +647,7 @@ class SpotcastController:
         self,
         client: spotipy.Spotify,
         spotify_device_id: str,
-        uri: str,
+        uri: SpotifyURI,
         random_song: bool,
         position: str,
         ignore_fully_played: str,
@@ -326,18 +660,21 @@ class SpotcastController:
             spotify_device_id,
         )
 
-        if uri.find("show") > 0:
-            show_episodes_info = client.show_episodes(uri, market=country_code)
-            if show_episodes_info and len(show_episodes_info["items"]) > 0:
+        if uri.kind == "show":
+            show_episodes_info = client.show_episodes(str(uri), market=country_code)
+            episodes = [
+                EpisodeRecord.from_api(episode)
+                for episode in (show_episodes_info or {}).get("items") or []
+                if episode is not None
+            ]
+            if len(episodes) > 0:
                 if ignore_fully_played:
-                    for episode in show_episodes_info["items"]:
-                        if not episode["resume_point"]["fully_played"]:
-                            episode_uri = episode["external_urls"]["spotify"]
+                    for episode in episodes:
+                        if not episode.fully_played:
+                            episode_uri = episode.uri
                             break
                 else:
-                    episode_uri = show_episodes_info["items"][0]["external_urls"][
-                        "spotify"
-                    ]
+                    episode_uri = episodes[0].uri
                 _LOGGER.debug(
                     (
                         "Playing episode using uris (latest podcast playlist)="
@@ -346,36 +683,25 @@ class SpotcastController:
                     episode_uri,
                 )
                 client.start_playback(device_id=spotify_device_id, uris=[episode_uri], position_ms=position_ms)
-        elif uri.find("episode") > 0:
-            _LOGGER.debug("Playing episode using uris= for uri: %s", uri)
-            client.start_playback(device_id=spotify_device_id, uris=[uri], position_ms=position_ms)
-
-        elif uri.find("track") > 0:
-            _LOGGER.debug("Playing track using uris= for uri: %s", uri)
-            client.start_playback(device_id=spotify_device_id, uris=[uri], position_ms=position_ms)
+        elif uri.kind in ("episode", "track"):
+            _LOGGER.debug("Playing %s using uris= for uri: %s", uri.kind, uri)
+            client.start_playback(device_id=spotify_device_id, uris=[str(uri)], position_ms=position_ms)
         else:
-            if uri == "random":
-                _LOGGER.debug(
-                    "Cool, you found the easter egg with playing a random" " playlist"
-                )
-                playlists = client.user_playlists("me", 50)
-                no_playlists = len(playlists["items"])
-                uri = playlists["items"][random.randint(0, no_playlists - 1)]["uri"]
-            kwargs = {"device_id": spotify_device_id, "context_uri": uri, "position_ms": position_ms}
+            kwargs = {"device_id": spotify_device_id, "context_uri": str(uri), "position_ms": position_ms}
 
             if random_song:
-                if uri.find("album") > 0:
-                    results = client.album_tracks(uri, market=country_code)
+                if uri.kind == "album":
+                    results = client.album_tracks(str(uri), market=country_code)
                     position = random.randint(0, int(results["total"]) - 1)
-                elif uri.find("playlist") > 0:
-                    results = client.playlist_tracks(uri)
+                elif uri.kind == "playlist":
+                    results = client.playlist_tracks(str(uri))
                     position = random.randint(0, int(results["total"]) - 1)
-                elif uri.find("collection") > 0:
+                elif uri.kind == KIND_COLLECTION:
                     results = client.current_user_saved_tracks()
                     position = random.randint(0, int(results["total"]) - 1)
                 _LOGGER.debug(
                     "Start playback at random position: %s", position)
-            if uri.find("artist") < 1:
+            if uri.kind != "artist":
                 kwargs["offset"] = {"position": position}
             _LOGGER.debug(
                 (
@@ -387,6 +713,35 @@ class SpotcastController:
             )
             client.start_playback(**kwargs)
 
+    def play_tracks(
+        self,
+        client: spotipy.Spotify,
+        spotify_device_id: str,
+        uris: list[SpotifyURI],
+        random_song: bool,
+        position: str,
+        position_ms: str,
+    ) -> None:
+        """Start a list of tracks in a single request, from the track
+        at `position` or from a random one"""
+        if random_song:
+            position = random.randint(0, len(uris) - 1)
+        else:
+            position = min(int(position or 0), len(uris) - 1)
+
+        _LOGGER.debug(
+            "Playing %d tracks from position %d on device-id: %s",
+            len(uris),
+            position,
+            spotify_device_id,
+        )
+        client.start_playback(
+            device_id=spotify_device_id,
+            uris=[str(uri) for uri in uris],
+            offset={"position": position},
+            position_ms=position_ms,
+        )
+
     def get_playlists(
         self,
         account: str,
@@ -394,6 +749,7 @@ class SpotcastController:
         country_code: str,
         locale: str,
         limit: int,
+        offset: int = 0,
     ) -> dict:
         client = self.get_spotify_client(account)
         resp = {}
@@ -402,7 +758,7 @@ class SpotcastController:
             playlist_type = "made-for-x"
 
         if playlist_type == "user" or playlist_type == "default" or playlist_type == "":
-            resp = client.current_user_playlists(limit=limit)
+            resp = client.current_user_playlists(limit=limit, offset=offset)
 
         elif playlist_type == "featured":
             resp = client.featured_playlists(
@@ -410,7 +766,7 @@ class SpotcastController:
                 country=country_code,
                 timestamp=datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
                 limit=limit,
-                offset=0,
+                offset=offset,
             )
             resp = resp.get("playlists")
         else:
@@ -421,7 +777,7 @@ class SpotcastController:
                 platform="web",
                 types="album,playlist,artist,show,station",
                 limit=limit,
-                offset=0,
+                offset=offset,
             )
             resp = resp.get("content")
 
@@ -11,8 +11,11 @@ import requests
 import json
 import hashlib
 
-from .const import APP_SPOTIFY
-from .error import LaunchError
+from .breaker import guard
+from .const import APP_SPOTIFY, DEVICE_AUTH_URL
+from .error import CircuitOpenError, LaunchError
+from .metrics import measure
+from .tracing import span
 
 import requests
 from pychromecast.controllers import BaseController
@@ -31,7 +34,16 @@ TYPE_ADD_USER_ERROR = "addUserError"
 class SpotifyController(BaseController):
     """Controller to interact with Spotify namespace."""
 
-    def __init__(self, castDevice, access_token=None, expires=None):
+    def __init__(
+        self,
+        castDevice,
+        access_token=None,
+        expires=None,
+        metrics=None,
+        labels=None,
+        trace=None,
+        breaker=None,
+    ):
         super(SpotifyController, self).__init__(APP_NAMESPACE, APP_SPOTIFY)
 
         self.logger = logging.getLogger(__name__)
@@ -41,8 +53,16 @@ class SpotifyController(BaseController):
         self.is_launched = False
         self.device = None
         self.credential_error = False
+        self.launch_error = None
         self.waiting = threading.Event()
         self.castDevice = castDevice
+        # messages are received on the socket thread of pychromecast, the
+        # labels and trace of the service call are kept to measure the
+        # device auth
+        self.metrics = metrics
+        self.labels = labels
+        self.trace = trace
+        self.breaker = breaker
 
     def receive_message(self, _message, data: dict):
         """
@@ -50,6 +70,10 @@ class SpotifyController(BaseController):
 
         Called when a message is received.
         """
+        with span(data["type"], trace=self.trace):
+            return self._handle_message(data)
+
+    def _handle_message(self, data: dict):
         if data["type"] == TYPE_GET_INFO_RESPONSE:
             self.device = self.getSpotifyDeviceID()
             self.client = data["payload"]["clientID"]
@@ -63,17 +87,35 @@ class SpotifyController(BaseController):
                 {"clientId": self.client, "deviceId": self.device}
             )
 
-            response = requests.post(
-                "https://spclient.wg.spotify.com/device-auth/v1/refresh",
-                headers=headers,
-                data=request_body,
-            )
-            json_resp = response.json()
+            try:
+                with guard(self.breaker):
+                    with span("device_auth", trace=self.trace), measure(
+                        self.metrics, "device_auth", self.labels
+                    ):
+                        response = requests.post(
+                            DEVICE_AUTH_URL,
+                            headers=headers,
+                            data=request_body,
+                        )
+                    response.raise_for_status()
+                    blob = response.json()["accessToken"]
+            except CircuitOpenError as exc:
+                self.launch_error = exc
+                self.waiting.set()
+                return True
+            except Exception as exc:  # pylint: disable=broad-except
+                self.logger.error("Spotify device auth failed: %s", exc)
+                self.launch_error = LaunchError(
+                    f"Spotify device auth failed: {exc}"
+                )
+                self.waiting.set()
+                return True
+
             self.send_message(
                 {
                     "type": TYPE_ADD_USER,
                     "payload": {
-                        "blob": json_resp["accessToken"],
+                        "blob": blob,
                         "tokenType": "accesstoken",
                     },
                 }
@@ -114,6 +156,7 @@ class SpotifyController(BaseController):
 
         self.device = None
         self.credential_error = False
+        self.launch_error = None
         self.waiting.clear()
         self.launch(callback_function=callback)
 
@@ -121,6 +164,8 @@ class SpotifyController(BaseController):
         while counter < (timeout + 1):
             if self.is_launched:
                 return
+            if self.launch_error is not None:
+                raise self.launch_error
             self.waiting.wait(1)
             counter += 1
 
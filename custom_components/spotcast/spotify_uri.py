@@ -0,0 +1,100 @@
+"""Parsing of Spotify URIs and open.spotify.com URLs"""
+
+from __future__ import annotations
+
+import urllib.parse
+from functools import lru_cache
+from typing import NamedTuple
+
+from .const import URI_CACHE_SIZE
+
+# kinds of content that can be played from their uri
+PLAYABLE_KINDS = frozenset(
+    {"artist", "album", "track", "playlist", "show", "episode", "audiobook"}
+)
+KIND_COLLECTION = "collection"
+
+
+class SpotifyURI(NamedTuple):
+    """A parsed Spotify URI. `id` is None for the liked songs of a user
+    and `user` is only set for the legacy user playlist URIs"""
+
+    kind: str
+    id: str | None
+    user: str | None = None
+
+    def __str__(self) -> str:
+        prefix = "spotify" if self.user is None else f"spotify:user:{self.user}"
+
+        if self.id is None:
+            return f"{prefix}:{self.kind}"
+
+        return f"{prefix}:{self.kind}:{self.id}"
+
+
+def url_to_spotify_uri(url: str) -> str:
+    """
+    Convert a spotify web url (e.g. https://open.spotify.com/track/XXXX) to
+    a spotify-style URI (spotify:track:XXXX). Raises ValueError on error.
+    """
+
+    o: urllib.parse.ParseResult
+    # will raise ValueError if URL is invalid
+    o = urllib.parse.urlparse(url)
+
+    if o.hostname != "open.spotify.com":
+        raise ValueError(
+            'Spotify URLs must have a hostname of "open.spotify.com"')
+
+    path = o.path.split("/")
+    if len(path) != 3:
+        raise ValueError(
+            'Spotify URLs must be of the form "https://open.spotify.com/<kind>/<target>"')
+
+    return f'spotify:{path[1]}:{path[2]}'
+
+
+@lru_cache(maxsize=URI_CACHE_SIZE)
+def parse_uri(uri: str) -> SpotifyURI:
+    """Parse a Spotify URI or web URL, ignoring its query string.
+    Raises ValueError if it is not a valid uri."""
+    cleaned = uri.split("?")[0].strip()
+
+    if cleaned.startswith("http"):
+        cleaned = url_to_spotify_uri(cleaned)
+
+    elems = cleaned.split(":")
+    kinds = PLAYABLE_KINDS
+    user = None
+
+    if elems[0].lower() != "spotify":
+        raise ValueError(
+            f"[{uri}] is not a valid Spotify URI. It should start with "
+            f"[spotify], but instead starts with [{elems[0]}]"
+        )
+
+    # legacy uris of user playlists (spotify:user:<user>:playlist:<id>)
+    # and of the liked songs of a user (spotify:user:<user>:collection)
+    if len(elems) > 2 and elems[1].lower() == "user":
+        user = elems[2]
+        elems = elems[0:1] + elems[3:]
+        kinds = frozenset({"playlist"})
+
+    if len(elems) == 2 and elems[1].lower() == KIND_COLLECTION:
+        return SpotifyURI(KIND_COLLECTION, None, user)
+
+    if len(elems) != 3 or not elems[2]:
+        raise ValueError(
+            f"[{uri}] is not a valid URI. The format should be "
+            "[spotify:<type>:<unique_id>]"
+        )
+
+    kind = elems[1].lower()
+
+    if kind not in kinds:
+        raise ValueError(
+            f"{elems[1]} is not a valid type for Spotify request. Please "
+            f"make sure to use the following list {sorted(kinds)}"
+        )
+
+    return SpotifyURI(kind, elems[2], user)
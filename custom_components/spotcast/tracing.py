@@ -0,0 +1,158 @@
+"""Trace spans of a cast, tied together by a correlation id.
+
+A cast runs in the service thread, on the event loop through
+`run_coroutine_threadsafe` and in the socket thread of pychromecast.
+Context variables follow the first two on their own. The socket thread
+is handed the trace explicitly, see `SpotifyController`.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+_LOGGER = logging.getLogger(__name__)
+
+_current_trace: ContextVar[Trace | None] = ContextVar("spotcast_trace", default=None)
+_current_span: ContextVar[str | None] = ContextVar("spotcast_span", default=None)
+
+
+class Trace:
+    """Spans recorded for one service call"""
+
+    def __init__(
+        self,
+        correlation_id: str,
+        exporter: JsonLinesExporter | None = None,
+    ) -> None:
+        self.correlation_id = correlation_id
+        self.exporter = exporter
+        self.root_id: str | None = None
+        self.finished = False
+        self._spans: list[dict] = []
+        self._lock = threading.Lock()
+
+    def add_span(self, span: dict) -> None:
+        _LOGGER.debug(
+            "[%s] %s took %.3fs in %s%s",
+            self.correlation_id,
+            span["name"],
+            span["duration"],
+            span["thread"],
+            f" ({span['error']})" if span["error"] else "",
+        )
+
+        with self._lock:
+            # spans ending after the trace are exported on their own
+            if not self.finished:
+                self._spans.append(span)
+                return
+
+        if self.exporter is not None:
+            self.exporter.export([span])
+
+    def finish(self) -> None:
+        with self._lock:
+            self.finished = True
+            spans, self._spans = self._spans, []
+
+        if self.exporter is not None:
+            self.exporter.export(spans)
+
+
+class JsonLinesExporter:
+    """Appends spans to a local file, one JSON object per line"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: list[dict]) -> None:
+        lines = "".join(json.dumps(span, default=str) + "\n" for span in spans)
+
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as file:
+                file.write(lines)
+        except OSError as exc:
+            _LOGGER.warning("Could not export trace to %s: %s", self.path, exc)
+
+
+def current_trace() -> Trace | None:
+    """Trace of the service call running in the current context. Used to
+    hand it over to other threads"""
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace(
+    correlation_id: str,
+    name: str,
+    exporter: JsonLinesExporter | None = None,
+    **attributes: Any,
+) -> Iterator[Trace]:
+    """Start the trace of a service call, within a root span"""
+    trace = Trace(correlation_id, exporter)
+    token = _current_trace.set(trace)
+
+    try:
+        with span(name, **attributes):
+            yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.finish()
+
+
+@contextmanager
+def span(
+    name: str,
+    trace: Trace | None = None,
+    **attributes: Any,
+) -> Iterator[None]:
+    """Time the block as a span of the current trace, or of the trace
+    given when called from another thread. No-op outside of a trace."""
+    if trace is None:
+        trace = _current_trace.get()
+        parent_id = _current_span.get()
+    else:
+        parent_id = _current_span.get() or trace.root_id
+
+    if trace is None:
+        yield
+        return
+
+    span_id = uuid.uuid4().hex[:16]
+    token = _current_span.set(span_id)
+
+    if trace.root_id is None:
+        trace.root_id = span_id
+
+    started_at = time.time()
+    started = time.perf_counter()
+    error = None
+
+    try:
+        yield
+    except BaseException as exc:
+        error = repr(exc)
+        raise
+    finally:
+        _current_span.reset(token)
+        trace.add_span(
+            {
+                "correlation_id": trace.correlation_id,
+                "span_id": span_id,
+                "parent_id": parent_id,
+                "name": name,
+                "start": started_at,
+                "duration": round(time.perf_counter() - started, 6),
+                "thread": threading.current_thread().name,
+                "error": error,
+                "attributes": attributes,
+            }
+        )
@@ -0,0 +1,160 @@
+"""Tests of the circuit breakers of the Spotify endpoints"""
+
+import unittest
+from unittest.mock import patch
+
+from custom_components.spotcast.breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    CircuitBreakers,
+    guard,
+)
+from custom_components.spotcast.error import CircuitOpenError
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = patch(
+            "custom_components.spotcast.breaker.time.time", lambda: self.now
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(
+            "account", "token", failure_threshold=3, reset_timeout=30,
+            max_reset_timeout=100,
+        )
+
+    def fail(self, breaker=None):
+        with self.assertRaises(ValueError):
+            with (breaker or self.breaker).guard():
+                raise ValueError("boom")
+
+    def succeed(self):
+        with self.breaker.guard():
+            pass
+
+    def test_opens_after_threshold(self):
+        self.fail()
+        self.fail()
+        self.assertEqual(self.breaker.state, STATE_CLOSED)
+
+        self.fail()
+        self.assertEqual(self.breaker.state, STATE_OPEN)
+        self.assertEqual(self.breaker.as_dict()["retry_in"], 30)
+        self.assertEqual(self.breaker.as_dict()["last_error"], "boom")
+
+    def test_success_resets_failures(self):
+        self.fail()
+        self.fail()
+        self.succeed()
+        self.fail()
+        self.assertEqual(self.breaker.state, STATE_CLOSED)
+        self.assertEqual(self.breaker.failures, 1)
+
+    def test_open_fails_fast(self):
+        for _ in range(3):
+            self.fail()
+
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.check()
+
+        calls = []
+        with self.assertRaises(CircuitOpenError):
+            with self.breaker.guard():
+                calls.append(1)
+        self.assertEqual(calls, [])
+
+    def test_single_probe_when_half_open(self):
+        for _ in range(3):
+            self.fail()
+        self.now += 30
+
+        # check does not take the probe call
+        self.breaker.check()
+        self.assertEqual(self.breaker.state, STATE_OPEN)
+
+        with self.breaker.guard():
+            self.assertEqual(self.breaker.state, STATE_HALF_OPEN)
+            with self.assertRaises(CircuitOpenError):
+                with self.breaker.guard():
+                    pass
+
+        self.assertEqual(self.breaker.state, STATE_CLOSED)
+        self.assertEqual(self.breaker.failures, 0)
+
+    def test_failed_probe_doubles_timeout_up_to_max(self):
+        for _ in range(3):
+            self.fail()
+
+        for expected in (60, 100, 100):
+            self.now += 1000
+            self.fail()
+            self.assertEqual(self.breaker.state, STATE_OPEN)
+            self.assertEqual(self.breaker.as_dict()["retry_in"], expected)
+
+    def test_recovery_resets_timeout(self):
+        for _ in range(3):
+            self.fail()
+        self.now += 30
+        self.fail()
+        self.now += 60
+        self.succeed()
+
+        for _ in range(3):
+            self.fail()
+        self.assertEqual(self.breaker.as_dict()["retry_in"], 30)
+
+    def test_guard_without_breaker(self):
+        with guard(None):
+            pass
+
+
+class TestCircuitBreakers(unittest.TestCase):
+    def setUp(self):
+        self.breakers = CircuitBreakers()
+
+    def open(self, breaker):
+        for _ in range(breaker.failure_threshold):
+            with self.assertRaises(ValueError):
+                with breaker.guard():
+                    raise ValueError("boom")
+
+    def test_one_breaker_per_account_and_endpoint(self):
+        breaker = self.breakers.get("account", "token")
+        self.assertIs(self.breakers.get("account", "token"), breaker)
+        self.assertIsNot(self.breakers.get("account", "device_auth"), breaker)
+        self.assertIs(
+            self.breakers.get(None, "token"), self.breakers.get("default", "token")
+        )
+
+    def test_listeners(self):
+        changes = []
+        remove = self.breakers.add_listener(
+            lambda account, endpoint: changes.append((account, endpoint))
+        )
+        self.open(self.breakers.get("account", "token"))
+        self.assertEqual(changes[-1], ("account", "token"))
+
+        remove()
+        count = len(changes)
+        self.open(self.breakers.get("other", "token"))
+        self.assertEqual(len(changes), count)
+
+    def test_account_state_is_worst(self):
+        self.assertEqual(self.breakers.account_state("account"), STATE_CLOSED)
+
+        self.breakers.get("account", "token")
+        self.open(self.breakers.get("account", "device_auth"))
+        self.open(self.breakers.get("other", "token"))
+
+        self.assertEqual(self.breakers.account_state("account"), STATE_OPEN)
+        self.assertEqual(
+            set(self.breakers.account_summary("account")), {"token", "device_auth"}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
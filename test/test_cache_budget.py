@@ -0,0 +1,104 @@
+"""Tests of the memory budget shared by the caches"""
+
+import random
+import string
+import unittest
+
+from custom_components.spotcast.cache import (
+    BoundedCache,
+    CacheRegistry,
+    estimate_size,
+)
+from custom_components.spotcast.const import CACHE_WEIGHTS, DEFAULT_CACHE_BUDGET_KB
+from custom_components.spotcast.fuzzy import TrigramIndex
+
+
+class TestBoundedCache(unittest.TestCase):
+    def test_least_recently_used_is_evicted(self):
+        value_size = estimate_size("x" * 100)
+        cache = BoundedCache(None, limit=2 * value_size)
+
+        cache.store("a", "a" * 100)
+        cache.store("b", "b" * 100)
+        cache.lookup("a")
+        cache.store("c", "c" * 100)
+
+        self.assertEqual(cache.lookup("a"), (True, "a" * 100))
+        self.assertEqual(cache.lookup("b"), (False, None))
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.size, 2 * value_size)
+
+    def test_value_larger_than_limit_is_refused(self):
+        cache = BoundedCache(None, limit=estimate_size("x" * 100))
+        cache.store("small", "x" * 100)
+
+        with self.assertLogs("custom_components.spotcast.cache", "WARNING"):
+            cache.store("large", "x" * 1000)
+
+        # the cached values are kept
+        self.assertEqual(cache.lookup("large"), (False, None))
+        self.assertEqual(cache.lookup("small"), (True, "x" * 100))
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.stats()["entries"], 1)
+
+    def test_refused_value_drops_previous_one(self):
+        cache = BoundedCache(None, limit=estimate_size("x" * 100))
+        cache.store("key", "x" * 100)
+
+        with self.assertLogs("custom_components.spotcast.cache", "WARNING"):
+            cache.store("key", "x" * 1000)
+
+        self.assertEqual(cache.lookup("key"), (False, None))
+        self.assertEqual(cache.size, 0)
+
+    def test_lower_limit_shrinks(self):
+        cache = BoundedCache(None)
+        for key in "abc":
+            cache.store(key, key * 100)
+
+        cache.set_limit(estimate_size("x" * 100))
+
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.lookup("c"), (True, "c" * 100))
+
+
+class TestCacheRegistry(unittest.TestCase):
+    def test_budget_split_by_weight(self):
+        registry = CacheRegistry(1200)
+        small = registry.register("small", BoundedCache(None), 1)
+        large = registry.register("large", BoundedCache(None), 2)
+
+        self.assertEqual((small.limit, large.limit), (400, 800))
+
+        registry.set_budget(600)
+        self.assertEqual((small.limit, large.limit), (200, 400))
+
+    def test_default_budget_fits_name_indexes(self):
+        """The playlist and artist indexes of an account with a thousand
+        of each fit the default share of the name indexes"""
+        rng = random.Random(0)
+
+        def index():
+            return TrigramIndex(
+                (
+                    "".join(rng.choices(string.ascii_letters + "  ", k=30)),
+                    "spotify:playlist:" + "".join(rng.choices(string.ascii_letters, k=22)),
+                )
+                for _ in range(1000)
+            )
+
+        registry = CacheRegistry(DEFAULT_CACHE_BUDGET_KB * 1024)
+        for name, weight in CACHE_WEIGHTS.items():
+            registry.register(name, BoundedCache(None), weight)
+        name_indexes = registry.stats()["caches"]["name_indexes"]
+
+        cache = BoundedCache(None, name_indexes["limit"])
+        cache.store(("default", "playlist"), index())
+        cache.store(("default", "artist"), index())
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
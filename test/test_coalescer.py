@@ -0,0 +1,88 @@
+"""Tests of the coalescing of duplicate service calls"""
+
+import asyncio
+import unittest
+
+from custom_components.spotcast.scheduler import CallCoalescer
+
+
+class TestCallCoalescer(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.runs = 0
+
+    async def job(self):
+        self.runs += 1
+        await asyncio.sleep(0.01)
+        return self.runs
+
+    async def test_duplicates_within_the_window_share_the_call(self):
+        coalescer = CallCoalescer(10)
+
+        results = await asyncio.gather(
+            *(coalescer.run("key", self.job) for _ in range(3))
+        )
+
+        self.assertEqual(results, [1, 1, 1])
+        self.assertEqual(self.runs, 1)
+
+    async def test_finished_call_is_shared_within_the_window(self):
+        coalescer = CallCoalescer(10)
+
+        await coalescer.run("key", self.job)
+        self.assertEqual(await coalescer.run("key", self.job), 1)
+        self.assertEqual(self.runs, 1)
+
+    async def test_call_after_the_window_runs_again(self):
+        coalescer = CallCoalescer(0.05)
+
+        await coalescer.run("key", self.job)
+        await asyncio.sleep(0.06)
+        self.assertEqual(await coalescer.run("key", self.job), 2)
+        self.assertEqual(coalescer._calls.keys(), {"key"})
+
+    async def test_different_keys_run_separately(self):
+        coalescer = CallCoalescer(10)
+
+        await asyncio.gather(
+            coalescer.run("kitchen", self.job), coalescer.run("bedroom", self.job)
+        )
+        self.assertEqual(self.runs, 2)
+
+    async def test_no_window_disables_coalescing(self):
+        coalescer = CallCoalescer(0)
+
+        await asyncio.gather(*(coalescer.run("key", self.job) for _ in range(2)))
+        self.assertEqual(self.runs, 2)
+
+    async def test_error_reaches_every_coalesced_caller(self):
+        coalescer = CallCoalescer(10)
+
+        async def failing():
+            self.runs += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("cast failed")
+
+        results = await asyncio.gather(
+            *(coalescer.run("key", failing) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+        self.assertEqual(self.runs, 1)
+        self.assertEqual(len(results), 3)
+        for result in results:
+            self.assertIsInstance(result, RuntimeError)
+
+    async def test_cancelled_caller_does_not_cancel_the_call(self):
+        coalescer = CallCoalescer(10)
+
+        first = asyncio.ensure_future(coalescer.run("key", self.job))
+        second = asyncio.ensure_future(coalescer.run("key", self.job))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        self.assertEqual(await second, 1)
+        self.assertEqual(self.runs, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+"""Tests of the trigram name matching and its use to find devices"""
+
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from custom_components.spotcast.const import (
+    FUZZY_MATCH_THRESHOLD,
+    NAME_INDEX_TTL_SECS,
+)
+from custom_components.spotcast.fuzzy import TrigramIndex, normalize_name
+from custom_components.spotcast.records import DeviceRecord
+from custom_components.spotcast.spotcast_controller import SpotcastController
+
+CONTROLLER = "custom_components.spotcast.spotcast_controller"
+
+
+class TestNormalizeName(unittest.TestCase):
+    def test_accents_case_and_punctuation(self):
+        self.assertEqual(normalize_name("Café  Del-Mar!"), "cafe del mar")
+
+    def test_empty(self):
+        self.assertEqual(normalize_name("  "), "")
+
+
+class TestTrigramIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = TrigramIndex(
+            [
+                ("Kitchen", "kitchen"),
+                ("Living Room", "living"),
+                ("Bedroom TV", "bedroom"),
+                ("", "nameless"),
+            ]
+        )
+
+    def test_skips_empty_names(self):
+        self.assertEqual(len(self.index), 3)
+
+    def test_normalized_exact_match_scores_one(self):
+        match = self.index.best("living-room", FUZZY_MATCH_THRESHOLD)
+        self.assertEqual(match.value, "living")
+        self.assertEqual(match.score, 1.0)
+
+    def test_misspelling(self):
+        match = self.index.best("Livng room", FUZZY_MATCH_THRESHOLD)
+        self.assertEqual(match.name, "Living Room")
+
+    def test_nothing_close_enough(self):
+        self.assertIsNone(self.index.best("Garage", FUZZY_MATCH_THRESHOLD))
+        self.assertEqual(self.index.search("zzz"), [])
+
+    def test_search_is_ordered_and_limited(self):
+        results = self.index.search("Bedroom", limit=2)
+        self.assertLessEqual(len(results), 2)
+        self.assertEqual(results[0].name, "Bedroom TV")
+        self.assertEqual(
+            [match.score for match in results],
+            sorted((match.score for match in results), reverse=True),
+        )
+
+    def test_empty_index(self):
+        self.assertEqual(TrigramIndex([]).search("Kitchen"), [])
+
+
+class TestFindSpotifyDeviceId(unittest.TestCase):
+    """Spotify Connect devices are matched exactly, misspellings are
+    corrected against the cast devices only"""
+
+    def setUp(self):
+        self.controller = SpotcastController(MagicMock(), "dc", "key", None)
+        devices = {
+            "devices": [
+                DeviceRecord("id-kitchen-2", "Kitchen 2"),
+                DeviceRecord("id-living", "Living Room"),
+            ]
+        }
+        casts = [
+            SimpleNamespace(friendly_name=name)
+            for name in ("Kitchen", "Kitchen 2", "Living Room")
+        ]
+        for target, value in (
+            ("get_spotify_media_player", MagicMock()),
+            ("get_spotify_devices", MagicMock(return_value=devices)),
+            ("get_cast_devices", MagicMock(return_value=casts)),
+        ):
+            patcher = patch(f"{CONTROLLER}.{target}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_unregistered_speaker_is_not_a_similar_device(self):
+        self.assertIsNone(
+            self.controller.query_spotify_device_id("user", "Kitchen", [])
+        )
+        self.assertEqual(
+            self.controller.find_spotify_device_id("user", "Kitchen", []),
+            (None, "Kitchen"),
+        )
+
+    def test_misspelling_is_corrected_against_cast_names(self):
+        self.assertEqual(
+            self.controller.find_spotify_device_id("user", "Livng Room", []),
+            ("id-living", "Living Room"),
+        )
+
+    def test_match_by_id(self):
+        self.assertEqual(
+            self.controller.query_spotify_device_id("user", None, ["id-living"]),
+            "id-living",
+        )
+
+
+class TestNameIndex(unittest.TestCase):
+    """Name indexes are built off the cast path, a stale one is used
+    while it is refreshed"""
+
+    def setUp(self):
+        self.hass = MagicMock()
+        self.controller = SpotcastController(self.hass, "dc", "key", None)
+        self.client = MagicMock()
+        self.client.current_user_playlists.return_value = {
+            "items": [{"name": "Morning Jazz", "uri": "spotify:playlist:jazz"}],
+            "next": "page-2",
+        }
+        self.client.next.return_value = {
+            "items": [None, {"name": "Road Trip", "uri": "spotify:playlist:road"}],
+            "next": None,
+        }
+        patcher = patch.object(
+            self.controller, "get_spotify_client", return_value=self.client
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_missing_index_is_built_in_background(self):
+        self.assertIsNone(
+            self.controller.resolve_name(None, "playlist", "Morning Jaz")
+        )
+        self.hass.add_job.assert_called_once_with(
+            self.controller.refresh_name_index, "default", "playlist"
+        )
+        self.client.current_user_playlists.assert_not_called()
+
+    def test_built_index_is_used(self):
+        index = self.controller.refresh_name_index("default", "playlist")
+        self.assertEqual(len(index), 2)
+
+        self.assertEqual(
+            str(self.controller.resolve_name(None, "playlist", "Road trip")),
+            "spotify:playlist:road",
+        )
+        self.hass.add_job.assert_not_called()
+
+    def test_stale_index_is_used_while_refreshed(self):
+        stale = TrigramIndex([("Old Mix", "spotify:playlist:old")])
+        self.controller.name_indexes.store(
+            ("default", "playlist"), (time.monotonic() - NAME_INDEX_TTL_SECS, stale)
+        )
+
+        self.assertIs(self.controller.get_name_index(None, "playlist"), stale)
+        self.hass.add_job.assert_called_once()
+
+    def test_failed_refresh_keeps_nothing(self):
+        from spotipy import SpotifyException
+
+        self.client.current_user_playlists.side_effect = SpotifyException(
+            429, -1, "rate limited"
+        )
+        with self.assertLogs("custom_components.spotcast", "WARNING"):
+            self.assertIsNone(
+                self.controller.refresh_name_index("default", "playlist")
+            )
+
+        # a later refresh is not blocked
+        self.client.current_user_playlists.side_effect = None
+        self.assertIsNotNone(
+            self.controller.refresh_name_index("default", "playlist")
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+"""Tests of the execution lanes of the service calls"""
+
+import asyncio
+import unittest
+
+import voluptuous as vol
+
+from custom_components.spotcast.const import (
+    CONF_ACCOUNT_CONCURRENCY,
+    DOMAIN,
+    SPOTCAST_CONFIG_SCHEMA,
+)
+from custom_components.spotcast.scheduler import ExecutionLanes
+
+
+class TestExecutionLanes(unittest.IsolatedAsyncioTestCase):
+    async def test_calls_of_a_device_run_in_order(self):
+        lanes = ExecutionLanes(8)
+        order = []
+
+        async def call(index):
+            async with lanes.lane("default", "kitchen"):
+                order.append(("start", index))
+                await asyncio.sleep(0.01)
+                order.append(("end", index))
+
+        await asyncio.gather(*(call(index) for index in range(3)))
+
+        self.assertEqual(
+            order,
+            [("start", 0), ("end", 0), ("start", 1), ("end", 1), ("start", 2), ("end", 2)],
+        )
+
+    async def test_devices_run_in_parallel(self):
+        lanes = ExecutionLanes(8)
+        both_running = asyncio.Event()
+        running = set()
+
+        async def call(device):
+            async with lanes.lane("default", device):
+                running.add(device)
+                if len(running) == 2:
+                    both_running.set()
+                await asyncio.wait_for(both_running.wait(), 1)
+
+        await asyncio.gather(call("kitchen"), call("bedroom"))
+
+    async def test_concurrency_is_bounded_per_account(self):
+        lanes = ExecutionLanes(2)
+        running = {"a": 0, "b": 0}
+        peak = {"a": 0, "b": 0}
+
+        async def call(account, device):
+            async with lanes.lane(account, device):
+                running[account] += 1
+                peak[account] = max(peak[account], running[account])
+                await asyncio.sleep(0.01)
+                running[account] -= 1
+
+        await asyncio.gather(
+            *(call("a", f"device-{index}") for index in range(5)),
+            *(call("b", f"device-{index}") for index in range(5)),
+        )
+
+        self.assertEqual(peak, {"a": 2, "b": 2})
+
+    async def test_call_without_device_is_only_bound_by_account(self):
+        lanes = ExecutionLanes(1)
+
+        async with lanes.lane(None, None):
+            with self.assertRaises(asyncio.TimeoutError):
+                async with asyncio.timeout(0.05):
+                    async with lanes.lane("default", None):
+                        pass
+
+    async def test_idle_lanes_are_forgotten(self):
+        lanes = ExecutionLanes(8)
+
+        async with lanes.lane("default", "kitchen"):
+            self.assertIn("kitchen", lanes._devices)
+
+        self.assertEqual(lanes._devices, {})
+        self.assertEqual(lanes._waiting, {})
+
+    async def test_lane_is_released_on_error(self):
+        lanes = ExecutionLanes(1)
+
+        with self.assertRaises(RuntimeError):
+            async with lanes.lane("default", "kitchen"):
+                raise RuntimeError("failed")
+
+        async with asyncio.timeout(1):
+            async with lanes.lane("default", "kitchen"):
+                pass
+
+
+class TestAccountConcurrencySchema(unittest.TestCase):
+    def config(self, concurrency):
+        return SPOTCAST_CONFIG_SCHEMA(
+            {
+                DOMAIN: {
+                    "sp_dc": "dc",
+                    "sp_key": "key",
+                    CONF_ACCOUNT_CONCURRENCY: concurrency,
+                }
+            }
+        )[DOMAIN][CONF_ACCOUNT_CONCURRENCY]
+
+    def test_zero_is_rejected(self):
+        # a semaphore of 0 would block every call forever
+        with self.assertRaises(vol.Invalid):
+            self.config(0)
+
+    def test_positive(self):
+        self.assertEqual(self.config("2"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""Tests of the latency metrics of the casts"""
+
+import threading
+import unittest
+
+from custom_components.spotcast.metrics import (
+    LatencyHistogram,
+    StageMetrics,
+    current_labels,
+    stage_labels,
+)
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_empty(self):
+        self.assertEqual(LatencyHistogram().summary(), {"count": 0})
+
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for seconds in range(1, 101):
+            histogram.record(seconds / 100)
+
+        summary = histogram.summary()
+        self.assertEqual(summary["count"], 100)
+        self.assertEqual(summary["p50"], 0.5)
+        self.assertEqual(summary["p95"], 0.95)
+        self.assertEqual(summary["max"], 1.0)
+
+    def test_rolling_window(self):
+        histogram = LatencyHistogram(window=2)
+        for seconds in (10, 1, 2):
+            histogram.record(seconds)
+
+        self.assertEqual(histogram.summary()["max"], 2)
+        self.assertEqual(histogram.summary()["count"], 3)
+
+
+class TestStageMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = StageMetrics()
+
+    def test_records_under_the_labels_of_the_service_call(self):
+        with stage_labels("ming", "Kitchen"):
+            self.metrics.record("token", 0.2)
+
+        summary = self.metrics.summary()
+        self.assertEqual(summary["accounts"]["ming"]["token"]["count"], 1)
+        self.assertEqual(summary["devices"]["Kitchen"]["token"]["count"], 1)
+
+    def test_default_account(self):
+        with stage_labels(None, None):
+            self.metrics.record("token", 0.2)
+
+        self.assertIn("token", self.metrics.account_summary("default"))
+        self.assertEqual(self.metrics.summary()["devices"], {})
+
+    def test_nothing_recorded_outside_a_service_call(self):
+        self.metrics.record("token", 0.2)
+        with self.metrics.measure("token"):
+            pass
+
+        self.assertEqual(self.metrics.summary(), {"accounts": {}, "devices": {}})
+
+    def test_explicit_labels(self):
+        self.metrics.record("launch", 1.0, ("ming", "Kitchen"))
+
+        self.assertIn("launch", self.metrics.account_summary("ming"))
+
+    def test_labels_are_per_thread(self):
+        seen = []
+        with stage_labels("ming", "Kitchen"):
+            thread = threading.Thread(target=lambda: seen.append(current_labels()))
+            thread.start()
+            thread.join()
+
+        self.assertEqual(seen, [(None, None)])
+
+    def test_measure_records_when_the_block_raises(self):
+        with stage_labels("ming", None), self.assertRaises(RuntimeError):
+            with self.metrics.measure("launch"):
+                raise RuntimeError("failed")
+
+        self.assertEqual(self.metrics.account_summary("ming")["launch"]["count"], 1)
+
+    def test_listeners(self):
+        calls = []
+        remove = self.metrics.add_listener(lambda *args: calls.append(args))
+
+        with stage_labels("ming", None):
+            self.metrics.record("token", 0.1)
+            remove()
+            self.metrics.record("token", 0.1)
+
+        self.assertEqual(calls, [("ming", "token")])
+
+
+if __name__ == "__main__":
+    unittest.main()
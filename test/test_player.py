@@ -0,0 +1,119 @@
+"""Tests of the shared polling of the player state"""
+
+import tempfile
+import unittest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.spotcast.const import (
+    PLAYER_ACTIVE_INTERVAL_SECS,
+    PLAYER_IDLE_INTERVAL_SECS,
+    PLAYER_MIN_INTERVAL_SECS,
+)
+from custom_components.spotcast.player import (
+    PlayerPoller,
+    diff_player_state,
+    next_poll_interval,
+)
+
+
+class TestDiffPlayerState(unittest.TestCase):
+    def test_no_change(self):
+        self.assertIsNone(diff_player_state({"a": 1}, {"a": 1}))
+
+    def test_changed_and_removed_fields(self):
+        self.assertEqual(
+            diff_player_state({"a": 1, "b": 2, "c": 3}, {"a": 1, "b": 5, "d": 4}),
+            {"changed": {"b": 5, "d": 4}, "removed": ["c"]},
+        )
+
+
+class TestNextPollInterval(unittest.TestCase):
+    def test_idle(self):
+        self.assertEqual(next_poll_interval({}), PLAYER_IDLE_INTERVAL_SECS)
+        self.assertEqual(
+            next_poll_interval({"is_playing": False}), PLAYER_IDLE_INTERVAL_SECS
+        )
+
+    def test_playing_without_progress(self):
+        self.assertEqual(
+            next_poll_interval({"is_playing": True, "item": None}),
+            PLAYER_ACTIVE_INTERVAL_SECS,
+        )
+
+    def test_playing_far_from_the_end(self):
+        state = {"is_playing": True, "progress_ms": 0, "item": {"duration_ms": 600000}}
+        self.assertEqual(next_poll_interval(state), PLAYER_ACTIVE_INTERVAL_SECS)
+
+    def test_polls_right_after_the_end_of_the_track(self):
+        state = {"is_playing": True, "progress_ms": 7000, "item": {"duration_ms": 10000}}
+        self.assertEqual(next_poll_interval(state), 3 + PLAYER_MIN_INTERVAL_SECS)
+
+
+class TestPlayerPoller(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        config_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(config_dir.cleanup)
+        self.hass = HomeAssistant(config_dir.name)
+        self.fetches = 0
+        self.state = {"is_playing": False, "volume": 10}
+
+    async def asyncTearDown(self):
+        await self.hass.async_stop(force=True)
+
+    async def fetch(self):
+        self.fetches += 1
+        return dict(self.state)
+
+    async def test_subscribers_share_the_polls(self):
+        poller = PlayerPoller(self.hass, self.fetch)
+        first, second = [], []
+
+        unsub_first = poller.async_subscribe(first.append)
+        await self.hass.async_block_till_done()
+        unsub_second = poller.async_subscribe(second.append)
+
+        self.assertEqual(self.fetches, 1)
+        self.assertEqual(first, [{"changed": self.state, "removed": []}])
+        # a late subscriber first receives the whole state
+        self.assertEqual(second, first)
+
+        unsub_first()
+        unsub_second()
+        self.assertFalse(poller._running)
+        self.assertIsNone(poller._state)
+
+    async def test_only_changes_are_pushed(self):
+        poller = PlayerPoller(self.hass, self.fetch)
+        updates = []
+
+        unsub = poller.async_subscribe(updates.append)
+        await self.hass.async_block_till_done()
+        self.state["volume"] = 20
+        await poller._async_poll()
+        await poller._async_poll()
+
+        self.assertEqual(
+            updates[1:], [{"changed": {"volume": 20}, "removed": []}]
+        )
+        unsub()
+
+    async def test_failed_poll_keeps_the_last_state(self):
+        poller = PlayerPoller(self.hass, self.fetch)
+        updates = []
+
+        unsub = poller.async_subscribe(updates.append)
+        await self.hass.async_block_till_done()
+
+        async def failing():
+            raise RuntimeError("upstream error")
+
+        poller._fetch = failing
+        await poller._async_poll()
+
+        self.assertEqual(len(updates), 1)
+        unsub()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Tests of the compact records of the Spotify objects"""
+
+import unittest
+
+from custom_components.spotcast.records import (
+    DeviceRecord,
+    EpisodeRecord,
+    ItemRecord,
+    PlaylistRecord,
+    TrackRecord,
+    item_records,
+)
+
+
+class TestDeviceRecord(unittest.TestCase):
+    def test_keeps_every_field_of_the_api(self):
+        device = {
+            "id": "id-kitchen",
+            "name": "Kitchen",
+            "type": "Speaker",
+            "is_active": False,
+            "is_private_session": True,
+            "is_restricted": True,
+            "supports_volume": False,
+            "volume_percent": 40,
+        }
+        self.assertEqual(DeviceRecord.from_api(device).as_dict(), device)
+
+    def test_defaults(self):
+        record = DeviceRecord.from_api({"id": "id-kitchen", "name": "Kitchen"})
+        self.assertFalse(record.is_private_session)
+        self.assertFalse(record.is_restricted)
+        self.assertTrue(record.supports_volume)
+        self.assertIsNone(record.volume_percent)
+
+
+class TestItemRecords(unittest.TestCase):
+    def test_record_by_type(self):
+        records = item_records(
+            [
+                {
+                    "uri": "spotify:track:1",
+                    "id": "1",
+                    "name": "Song",
+                    "type": "track",
+                    "artists": [{"name": "A"}, {"name": "B"}],
+                },
+                None,
+                {
+                    "uri": "spotify:playlist:2",
+                    "id": "2",
+                    "name": "Mix",
+                    "type": "playlist",
+                    "owner": {"id": "me"},
+                },
+                {
+                    "uri": "spotify:episode:3",
+                    "id": "3",
+                    "name": "Episode",
+                    "type": "episode",
+                    "resume_point": {"fully_played": True},
+                },
+                {"uri": "spotify:album:4", "id": "4", "name": "Album", "type": "album"},
+            ]
+        )
+
+        self.assertEqual(
+            records,
+            [
+                TrackRecord("spotify:track:1", "1", "Song", ("A", "B")),
+                PlaylistRecord("spotify:playlist:2", "2", "Mix", "me"),
+                EpisodeRecord("spotify:episode:3", "3", "Episode", True),
+                ItemRecord("spotify:album:4", "4", "Album", "album"),
+            ],
+        )
+        self.assertEqual(records[1].as_dict()["owner"], "me")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+"""Tests of the learned polls waiting for a device registration"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+from custom_components.spotcast.const import (
+    DEFAULT_REGISTRATION_POLLS,
+    REGISTRATION_MIN_POLL_INTERVAL_SECS,
+)
+from custom_components.spotcast.records import DeviceRecord
+from custom_components.spotcast.registration import RegistrationSchedule
+from custom_components.spotcast.spotcast_controller import SpotcastController
+
+CONTROLLER = "custom_components.spotcast.spotcast_controller"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestRegistrationSchedule(unittest.TestCase):
+    def setUp(self):
+        self.schedule = RegistrationSchedule()
+
+    def test_default_polls_until_enough_samples(self):
+        self.schedule.record("Kitchen", 1.0)
+        self.assertEqual(self.schedule.polls("Kitchen"), list(DEFAULT_REGISTRATION_POLLS))
+
+    def test_early_poll_below_fastest_delay(self):
+        for delay in (1.0, 1.2, 1.4):
+            self.schedule.record("Kitchen", delay)
+
+        polls = self.schedule.polls("Kitchen")
+        self.assertLess(polls[0], 1.0)
+        self.assertIn(1.0, polls)
+        self.assertTrue(
+            all(
+                later - earlier >= REGISTRATION_MIN_POLL_INTERVAL_SECS
+                for earlier, later in zip(polls, polls[1:])
+            )
+        )
+
+
+class TestRegistrationLoop(unittest.TestCase):
+    """Casts a device registering 400ms after the launch, with requests
+    taking 150ms, through the polls of the controller"""
+
+    DELAY = 0.4
+    LATENCY = 0.15
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.controller = SpotcastController(MagicMock(), "dc", "key", None)
+        self.launched = 0.0
+
+        for target, value in (
+            ("time", self.clock),
+            ("get_spotify_media_player", MagicMock()),
+            ("get_spotify_devices", self.get_spotify_devices),
+        ):
+            patcher = patch(f"{CONTROLLER}.{target}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get_spotify_devices(self, *args):
+        registered = self.clock.now - self.launched >= self.DELAY
+        self.clock.now += self.LATENCY
+        return {
+            "devices": [DeviceRecord("id-kitchen", "Kitchen")] if registered else []
+        }
+
+    def cast(self):
+        self.clock.now += 10
+        self.launched = self.clock.now
+        found = self.controller.query_spotify_device_id(
+            "user",
+            "Kitchen",
+            [],
+            polls=self.controller.registration.polls("Kitchen"),
+            started=self.launched,
+            on_found=lambda seconds: self.controller.registration.record(
+                "Kitchen", seconds
+            ),
+        )
+        self.assertEqual(found, "id-kitchen")
+        return self.clock.now - self.launched
+
+    def test_schedule_does_not_drift(self):
+        first_polls = []
+        for _ in range(60):
+            self.cast()
+            first_polls.append(self.controller.registration.polls("Kitchen")[0])
+
+        # the first poll stays ahead of the registration
+        self.assertLessEqual(max(first_polls[5:]), self.DELAY)
+        self.assertEqual(first_polls[-1], first_polls[5])
+
+        # and the device is found soon after it registers
+        for _ in range(5):
+            self.assertLessEqual(
+                self.cast(),
+                self.DELAY + REGISTRATION_MIN_POLL_INTERVAL_SECS + self.LATENCY,
+            )
+
+        # the delays recorded leave out the time the requests took
+        delays = self.controller.registration.summary()["Kitchen"]
+        self.assertLessEqual(max(delays), 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
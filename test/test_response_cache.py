@@ -0,0 +1,95 @@
+"""Tests of the cache shared by the websocket handlers"""
+
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from custom_components.spotcast.cache import ResponseCache, estimate_size
+
+
+class TestResponseCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.fetches = 0
+
+    async def fetch(self):
+        self.fetches += 1
+        await asyncio.sleep(0.01)
+        return {"fetch": self.fetches}
+
+    async def test_response_is_reused_within_ttl(self):
+        cache = ResponseCache(10)
+
+        first = await cache.get("key", self.fetch)
+        second = await cache.get("key", self.fetch)
+
+        self.assertIs(first, second)
+        self.assertEqual(self.fetches, 1)
+
+    async def test_response_is_fetched_again_after_ttl(self):
+        cache = ResponseCache(0.02)
+
+        await cache.get("key", self.fetch)
+        await asyncio.sleep(0.03)
+        self.assertEqual(await cache.get("key", self.fetch), {"fetch": 2})
+
+    async def test_max_age_shorter_than_ttl(self):
+        cache = ResponseCache(10)
+
+        await cache.get("key", self.fetch)
+        await asyncio.sleep(0.02)
+        self.assertEqual(await cache.get("key", self.fetch, 0.01), {"fetch": 2})
+
+    async def test_concurrent_requests_share_one_fetch(self):
+        cache = ResponseCache(10)
+
+        results = await asyncio.gather(*(cache.get("key", self.fetch) for _ in range(4)))
+
+        self.assertEqual(self.fetches, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    async def test_failed_fetch_is_not_cached(self):
+        cache = ResponseCache(10)
+
+        async def failing():
+            raise RuntimeError("upstream error")
+
+        with self.assertRaises(RuntimeError):
+            await cache.get("key", failing)
+
+        self.assertEqual(await cache.get("key", self.fetch), {"fetch": 1})
+
+    async def test_invalidate(self):
+        cache = ResponseCache(10)
+
+        await cache.get("a", self.fetch)
+        await cache.get("b", self.fetch)
+        cache.invalidate("a")
+        await cache.get("a", self.fetch)
+        self.assertEqual(self.fetches, 3)
+
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
+
+    async def test_size_estimated_on_executor(self):
+        threads = []
+
+        def sized(value):
+            threads.append(threading.current_thread())
+            return estimate_size(value)
+
+        with ThreadPoolExecutor(1) as executor:
+            cache = ResponseCache(10, executor=executor)
+            with patch("custom_components.spotcast.cache.estimate_size", sized):
+                value = await cache.get("key", self.fetch)
+
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+        self.assertEqual(cache.size, estimate_size(value))
+        self.assertEqual(await cache.get("key", self.fetch), {"fetch": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+"""Tests of the cast devices and playlists sensors"""
+
+import unittest
+from unittest.mock import MagicMock
+
+from custom_components.spotcast.const import DOMAIN
+from custom_components.spotcast.sensor import (
+    ChromecastDevicesSensor,
+    ChromecastPlaylistSensor,
+    CompactChromecastDevicesSensor,
+    CompactChromecastPlaylistSensor,
+    setup_platform,
+)
+
+
+class TestSensorPlatform(unittest.TestCase):
+    def setUp(self):
+        self.hass = MagicMock()
+        self.hass.data = {DOMAIN: {"controller": MagicMock(accounts={})}}
+        self.entities = []
+
+    def setup(self, config):
+        setup_platform(self.hass, config, self.entities.extend)
+        return [type(entity) for entity in self.entities]
+
+    def test_default_attributes_are_recorded(self):
+        self.assertEqual(
+            self.setup({}), [ChromecastDevicesSensor, ChromecastPlaylistSensor]
+        )
+        self.assertEqual(ChromecastDevicesSensor._unrecorded_attributes, frozenset())
+        self.assertEqual(ChromecastPlaylistSensor._unrecorded_attributes, frozenset())
+        self.assertIn("devices_json", self.entities[0].extra_state_attributes)
+
+    def test_compact_attributes_are_not_recorded(self):
+        self.assertEqual(
+            self.setup({"compact_attributes": True}),
+            [CompactChromecastDevicesSensor, CompactChromecastPlaylistSensor],
+        )
+        self.assertIn("devices", CompactChromecastDevicesSensor._unrecorded_attributes)
+        self.assertIn(
+            "playlists", CompactChromecastPlaylistSensor._unrecorded_attributes
+        )
+        self.assertEqual(
+            list(self.entities[0].extra_state_attributes), ["devices"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
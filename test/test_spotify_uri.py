@@ -0,0 +1,73 @@
+"""Tests of the parsing of Spotify URIs"""
+
+import unittest
+
+from custom_components.spotcast.spotify_uri import (
+    SpotifyURI,
+    parse_uri,
+    url_to_spotify_uri,
+)
+
+
+class TestParseUri(unittest.TestCase):
+    def test_kinds(self):
+        for kind in ("artist", "album", "track", "playlist", "show", "episode", "audiobook"):
+            self.assertEqual(parse_uri(f"spotify:{kind}:abc"), SpotifyURI(kind, "abc"))
+
+    def test_query_string_and_spaces_are_ignored(self):
+        self.assertEqual(
+            parse_uri(" spotify:track:abc?si=123 "), SpotifyURI("track", "abc")
+        )
+
+    def test_web_url(self):
+        self.assertEqual(
+            parse_uri("https://open.spotify.com/playlist/abc?si=123"),
+            SpotifyURI("playlist", "abc"),
+        )
+
+    def test_user_playlist(self):
+        uri = parse_uri("spotify:user:bob:playlist:abc")
+        self.assertEqual(uri, SpotifyURI("playlist", "abc", "bob"))
+        self.assertEqual(str(uri), "spotify:user:bob:playlist:abc")
+
+    def test_collection(self):
+        self.assertEqual(str(parse_uri("spotify:collection")), "spotify:collection")
+        self.assertEqual(
+            parse_uri("spotify:user:bob:collection"),
+            SpotifyURI("collection", None, "bob"),
+        )
+
+    def test_round_trip(self):
+        for uri in ("spotify:track:abc", "spotify:show:xyz"):
+            self.assertEqual(str(parse_uri(uri)), uri)
+
+    def test_invalid(self):
+        for uri in (
+            "spotofy:track:abc",
+            "spotify:track",
+            "spotify:track:",
+            "spotify:podcast:abc",
+            "spotify:user:bob:track:abc",
+            "https://example.com/track/abc",
+            "https://open.spotify.com/track",
+        ):
+            with self.subTest(uri=uri), self.assertRaises(ValueError):
+                parse_uri(uri)
+
+    def test_parsed_once(self):
+        parse_uri.cache_clear()
+        parse_uri("spotify:album:abc")
+        parse_uri("spotify:album:abc")
+        self.assertEqual(parse_uri.cache_info().hits, 1)
+
+
+class TestUrlToSpotifyUri(unittest.TestCase):
+    def test_url(self):
+        self.assertEqual(
+            url_to_spotify_uri("https://open.spotify.com/episode/abc"),
+            "spotify:episode:abc",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""Tests of the spotcast.start_multi service"""
+
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+import voluptuous as vol
+from homeassistant.core import HomeAssistant
+
+from custom_components.spotcast import DOMAIN, async_setup
+from custom_components.spotcast.const import (
+    SERVICE_START_MULTI_COMMAND_SCHEMA,
+    SPOTCAST_CONFIG_SCHEMA,
+)
+
+CONTROLLER = "custom_components.spotcast.spotcast_controller.SpotcastController"
+
+
+class TestStartMulti(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        config_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(config_dir.cleanup)
+        self.hass = HomeAssistant(config_dir.name)
+
+        self.started = []
+        self.barrier = threading.Barrier(2, timeout=5)
+
+        def get_spotify_device_id(controller, account, spotify_id, name, entity):
+            if name == "Broken":
+                raise RuntimeError("could not launch")
+            # both devices must be launching at the same time to pass
+            self.barrier.wait()
+            return f"id-{name}"
+
+        def play(controller, client, spotify_device_id, *args, **kwargs):
+            self.started.append(spotify_device_id)
+
+        patchers = [
+            patch(f"{CONTROLLER}.get_spotify_device_id", get_spotify_device_id),
+            patch(f"{CONTROLLER}.play", play),
+            patch(f"{CONTROLLER}.initialize_tokens"),
+            patch("custom_components.spotcast.import_cast_modules"),
+            patch("custom_components.spotcast.time.sleep"),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        patcher = patch(f"{CONTROLLER}.get_spotify_client")
+        self.get_spotify_client = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        config = SPOTCAST_CONFIG_SCHEMA({DOMAIN: {"sp_dc": "dc", "sp_key": "key"}})
+        self.assertTrue(await async_setup(self.hass, config))
+
+    async def asyncTearDown(self):
+        await self.hass.async_stop(force=True)
+
+    async def start_multi(self, device_names):
+        return await self.hass.services.async_call(
+            DOMAIN,
+            "start_multi",
+            {"device_name": device_names, "uri": "spotify:playlist:abc"},
+            blocking=True,
+            return_response=True,
+        )
+
+    async def test_devices_start_in_parallel(self):
+        response = await self.start_multi(["Kitchen", "Bedroom"])
+
+        self.assertEqual(
+            [(device["target"], device.get("spotify_device_id"))
+             for device in response["devices"]],
+            [("Kitchen", "id-Kitchen"), ("Bedroom", "id-Bedroom")],
+        )
+        self.assertCountEqual(self.started, ["id-Kitchen", "id-Bedroom"])
+
+    async def test_content_is_resolved_once(self):
+        await self.start_multi(["Kitchen", "Bedroom"])
+
+        self.assertEqual(self.get_spotify_client.call_count, 1)
+
+    async def test_failing_device_is_reported(self):
+        self.barrier = threading.Barrier(1)
+        response = await self.start_multi(["Broken", "Kitchen"])
+
+        broken, kitchen = response["devices"]
+        self.assertEqual(broken["error"], "could not launch")
+        self.assertNotIn("error", kitchen)
+        self.assertEqual(self.started, ["id-Kitchen"])
+
+
+class TestStartMultiSchema(unittest.TestCase):
+    def test_requires_a_target(self):
+        with self.assertRaises(vol.Invalid):
+            SERVICE_START_MULTI_COMMAND_SCHEMA({"uri": "spotify:playlist:abc"})
+
+    def test_single_device_name_becomes_a_list(self):
+        data = SERVICE_START_MULTI_COMMAND_SCHEMA({"device_name": "Kitchen"})
+        self.assertEqual(data["device_name"], ["Kitchen"])
+
+    def test_spotify_device_id_is_dropped(self):
+        data = SERVICE_START_MULTI_COMMAND_SCHEMA(
+            {"device_name": ["Kitchen"], "spotify_device_id": "abc"}
+        )
+        self.assertNotIn("spotify_device_id", data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+"""Tests of the reuse of the Spotify tokens"""
+
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from custom_components.spotcast.spotcast_controller import SpotifyToken
+
+
+class TestSpotifyToken(unittest.TestCase):
+    def setUp(self):
+        self.token = SpotifyToken(MagicMock(), "dc", "key")
+        patcher = patch.object(
+            self.token, "get_spotify_token", side_effect=self.renew
+        )
+        self.get_spotify_token = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def renew(self):
+        self.token._token = ("new", int(time.time()) + 3600)
+        return "new", 3600
+
+    def test_valid_token_is_reused(self):
+        self.token._token = ("current", int(time.time()) + 1200)
+
+        self.assertEqual(self.token.ensure_token_valid(600)[0], "current")
+        self.get_spotify_token.assert_not_called()
+
+    def test_token_expiring_soon_is_renewed(self):
+        self.token._token = ("current", int(time.time()) + 300)
+
+        self.assertEqual(self.token.access_token, "current")
+        self.assertEqual(self.token.ensure_token_valid(600)[0], "new")
+        self.get_spotify_token.assert_called_once()
+
+    def test_expired_token_is_renewed(self):
+        self.assertEqual(self.token.access_token, "new")
+        self.assertEqual(self.token.access_token, "new")
+        self.get_spotify_token.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""Tests of the errors of the spotcast websocket commands"""
+
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.spotcast import DOMAIN, async_setup
+from custom_components.spotcast.const import SPOTCAST_CONFIG_SCHEMA
+
+CONTROLLER = "custom_components.spotcast.spotcast_controller.SpotcastController"
+
+
+class FakeConnection:
+    """Websocket connection collecting the messages sent to it"""
+
+    def __init__(self) -> None:
+        self.messages: asyncio.Queue = asyncio.Queue()
+        self.subscriptions: dict = {}
+
+    def send_message(self, message) -> None:
+        self.messages.put_nowait(message)
+
+    def send_error(self, msg_id, code, message) -> None:
+        self.messages.put_nowait(websocket_api.error_message(msg_id, code, message))
+
+
+class TestWebsocketErrors(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        config_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(config_dir.cleanup)
+        self.hass = HomeAssistant(config_dir.name)
+
+        for patcher in (
+            patch(f"{CONTROLLER}.initialize_tokens"),
+            patch("custom_components.spotcast.import_cast_modules"),
+            patch(
+                f"{CONTROLLER}.get_spotify_client",
+                side_effect=HomeAssistantError("Could not get spotify token."),
+            ),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        config = SPOTCAST_CONFIG_SCHEMA({DOMAIN: {"sp_dc": "dc", "sp_key": "key"}})
+        self.assertTrue(await async_setup(self.hass, config))
+
+    async def asyncTearDown(self):
+        await self.hass.async_stop(force=True)
+
+    async def call(self, request: dict) -> tuple[FakeConnection, dict]:
+        handler, schema = self.hass.data[websocket_api.DOMAIN][request["type"]]
+        connection = FakeConnection()
+        handler(self.hass, connection, schema({"id": 1, **request}))
+
+        async with asyncio.timeout(5):
+            return connection, await connection.messages.get()
+
+    async def test_failed_command_sends_error(self):
+        _, message = await self.call({"type": "spotcast/player"})
+
+        self.assertFalse(message["success"])
+        self.assertEqual(
+            message["error"],
+            {
+                "code": websocket_api.ERR_HOME_ASSISTANT_ERROR,
+                "message": "Could not get spotify token.",
+            },
+        )
+
+    async def test_failed_batch_request_is_reported(self):
+        _, message = await self.call(
+            {"type": "spotcast/batch", "requests": [{"type": "spotcast/player"}]}
+        )
+
+        self.assertTrue(message["success"])
+        self.assertEqual(
+            message["result"],
+            [{"success": False, "error": "Could not get spotify token."}],
+        )
+
+    async def test_failed_stream_is_rejected(self):
+        connection, message = await self.call(
+            {"type": "spotcast/playlists", "playlist_type": "user", "stream": True}
+        )
+
+        self.assertFalse(message["success"])
+        self.assertEqual(connection.subscriptions, {})
+
+
+if __name__ == "__main__":
+    unittest.main()